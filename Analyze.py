@@ -4,6 +4,7 @@ Code review Main
 #---------------------------------------------------------------------------------------------------
 # Python Modules
 #---------------------------------------------------------------------------------------------------
+import argparse
 import datetime
 import os
 import sys
@@ -30,6 +31,7 @@ from utils.util import ThreadSignal
 
 from tools.pcLint import PcLint
 from tools.u4c import u4c
+from tools.u4c.u4cChecks import eChecks
 
 #---------------------------------------------------------------------------------------------------
 # Data
@@ -38,6 +40,22 @@ from tools.u4c import u4c
 #---------------------------------------------------------------------------------------------------
 # Functions
 #---------------------------------------------------------------------------------------------------
+def ParseArgs( args):
+    """ Analyze.py projFile [-checks naming,formats] [-ids Naming.Var,...]
+        Selecting checks or violationIds re-checks the current Understand DB with just those
+        checks (no PC-Lint, no Understand analysis) which is how a rule is tuned
+    """
+    parser = argparse.ArgumentParser( description='Run a Knowlogic code review analysis')
+    parser.add_argument( 'projFile')
+    parser.add_argument( '-checks', default='',
+                         help='comma separated Knowlogic checks: %s' % ', '.join( eChecks))
+    parser.add_argument( '-ids', default='', help='comma separated violationId prefixes')
+    opts = parser.parse_args( args)
+
+    checks = [i.strip() for i in opts.checks.split(',') if i.strip()]
+    violationIds = [i.strip() for i in opts.ids.split(',') if i.strip()]
+    return opts.projFile, checks, violationIds
+
 
 #---------------------------------------------------------------------------------------------------
 # Classes
@@ -67,8 +85,10 @@ class Analyzer:
         self.status = sts
 
     #-----------------------------------------------------------------------------------------------
-    def Analyze( self, fullAnalysis = True, pcLintRun=True, u4cRun=True):
+    def Analyze( self, fullAnalysis = True, pcLintRun=True, u4cRun=True, checks=None,
+                 violationIds=None):
         """ Analyze the project file with the tools selected
+            checks/violationIds: run only some of the Knowlogic checks, see U4c.SelectChecks
         """
         status = True
         start = DateTime.DateTime.today()
@@ -78,7 +98,8 @@ class Analyzer:
         if pcLintRun:
             pcs = PcLint.PcLintSetup( self.projFile)
             pcs.CreateProject()
-        if u4cRun:
+        # the U4c files describe the DB build, a load only run must leave them as they are
+        if u4cRun and fullAnalysis:
             u4s = u4c.U4cSetup( self.projFile)
             u4s.CreateProject()
 
@@ -87,6 +108,11 @@ class Analyzer:
         # create the tool analyzers
         pcl = PcLint.PcLint( self.projFile, True)
         u4co = u4c.U4c( self.projFile, True)
+        try:
+            u4co.SelectChecks( checks, violationIds)
+        except ValueError as e:
+            self.SetStatus( 'Check selection error: %s' % e)
+            return False
 
         if fullAnalysis:
             # check if we can open the DB and stop U4c if running
@@ -149,11 +175,17 @@ class Analyzer:
 #===================================================================================================
 if __name__ == '__main__':
     import sys
-    if len(sys.argv) == 2:
-        projFile = sys.argv[1]
+    checks = []
+    violationIds = []
+    if len(sys.argv) >= 2:
+        projFile, checks, violationIds = ParseArgs( sys.argv[1:])
         fullAnalysis = True
         pcRun = True
         u4cRun = True
+        if checks or violationIds:
+            # tuning a rule: just re-check the current Understand DB
+            fullAnalysis = False
+            pcRun = False
     else:
         #jvDesk
         #projFile = r'C:\Knowlogic\tools\CR-Projs\G4-A\G4A.crp'
@@ -184,7 +216,7 @@ if __name__ == '__main__':
     analyzer = Analyzer(projFile)
 
     if analyzer.isValid:
-        analyzer.Analyze(fullAnalysis, pcRun, u4cRun)
+        analyzer.Analyze(fullAnalysis, pcRun, u4cRun, checks, violationIds)
     else:
         print( 'Errors:\n%s' % '\n'.join(analyzer.projFile.errors))
 
@@ -136,6 +136,9 @@ class Ui_MainWindow(object):
         self.runAnalysis = QtGui.QPushButton(self.groupBox_2)
         self.runAnalysis.setObjectName("runAnalysis")
         self.verticalLayout_5.addWidget(self.runAnalysis)
+        self.runSelectedChecks = QtGui.QPushButton(self.groupBox_2)
+        self.runSelectedChecks.setObjectName("runSelectedChecks")
+        self.verticalLayout_5.addWidget(self.runSelectedChecks)
         self.abortAnalysis = QtGui.QPushButton(self.groupBox_2)
         self.abortAnalysis.setObjectName("abortAnalysis")
         self.verticalLayout_5.addWidget(self.abortAnalysis)
@@ -827,7 +830,8 @@ class Ui_MainWindow(object):
         MainWindow.setTabOrder(self.projectFileSelector, self.browseProjectFile)
         MainWindow.setTabOrder(self.browseProjectFile, self.toolOutput)
         MainWindow.setTabOrder(self.toolOutput, self.runAnalysis)
-        MainWindow.setTabOrder(self.runAnalysis, self.abortAnalysis)
+        MainWindow.setTabOrder(self.runAnalysis, self.runSelectedChecks)
+        MainWindow.setTabOrder(self.runSelectedChecks, self.abortAnalysis)
         MainWindow.setTabOrder(self.abortAnalysis, self.reviewedViolations)
         MainWindow.setTabOrder(self.reviewedViolations, self.totalViolations)
         MainWindow.setTabOrder(self.totalViolations, self.acceptedViolations)
@@ -900,6 +904,8 @@ class Ui_MainWindow(object):
         self.browseProjectFile.setText(QtGui.QApplication.translate("MainWindow", "Browse...", None, QtGui.QApplication.UnicodeUTF8))
         self.label_7.setText(QtGui.QApplication.translate("MainWindow", "User Name", None, QtGui.QApplication.UnicodeUTF8))
         self.runAnalysis.setText(QtGui.QApplication.translate("MainWindow", "Run Analysis", None, QtGui.QApplication.UnicodeUTF8))
+        self.runSelectedChecks.setToolTip(QtGui.QApplication.translate("MainWindow", "Re-run selected Knowlogic checks against the current U4C DB", None, QtGui.QApplication.UnicodeUTF8))
+        self.runSelectedChecks.setText(QtGui.QApplication.translate("MainWindow", "Run Selected Checks...", None, QtGui.QApplication.UnicodeUTF8))
         self.abortAnalysis.setText(QtGui.QApplication.translate("MainWindow", "Abort Analysis", None, QtGui.QApplication.UnicodeUTF8))
         self.showPcLintLog.setText(QtGui.QApplication.translate("MainWindow", "Show PC-Lint Log", None, QtGui.QApplication.UnicodeUTF8))
         self.showKsLog.setText(QtGui.QApplication.translate("MainWindow", "Show Knowlogic Log", None, QtGui.QApplication.UnicodeUTF8))
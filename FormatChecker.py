@@ -13,13 +13,20 @@ did it end.
 For example if the Keyword was <TheParameters> and the function header was being
 checked, it could tell you that the parameters started on line x and end on line y
 Or if the keyword was <TheLocalFunctions> where was that keyword in the file
+
+All the description patterns are compiled when the checker is built, checking a line is a slide of
+the line buffer window and a match of the items not yet found.  The first line patterns of all the
+items are merged into one automaton, a single search of it tells if any item can start on a line and
+only then are the items checked in full (see FormatTemplate.CompileAutomaton).
 """
 #---------------------------------------------------------------------------------------------------
 # Python Modules
 #---------------------------------------------------------------------------------------------------
-from collections import OrderedDict
+from collections import OrderedDict, deque
 
+import itertools
 import re
+import threading
 
 #---------------------------------------------------------------------------------------------------
 # Third Party Modules
@@ -28,7 +35,6 @@ import re
 #---------------------------------------------------------------------------------------------------
 # Knowlogic Modules
 #---------------------------------------------------------------------------------------------------
-from utils.util import Holder
 
 #---------------------------------------------------------------------------------------------------
 # Data
@@ -36,22 +42,48 @@ from utils.util import Holder
 eAnyText = '.*?'
 ePosDef = r'(:[0-9]+:|:D:)$'
 
+ePosDefRe = re.compile( ePosDef)
+eKeywordRe = re.compile( r'<[A-Z][A-Za-z0-9_]+>')
+
+# patterns that can not be merged into the automaton: back references (they count/name the groups
+# of the pattern) and inline flags (they apply to the whole pattern)
+eNoMergeRe = re.compile( r'\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)')
+
+# the lines a file format check collects for a keyword, once all the items are found and the last
+# keyword has this many lines the rest of a file can not change the check (see IsDone)
+eMaxKeywordLines = 100
+
+# how the items are matched against the line buffer
+eEngineScan = 'scan'            # each item is tried in turn
+eEngineAutomaton = 'automaton'  # one search tells if any item can start on the line
+
 #---------------------------------------------------------------------------------------------------
 # Functions
 #---------------------------------------------------------------------------------------------------
-class Item( Holder):
-    """ This holds the info about an item (or a group of items that go together).  It allows for
-        checking the existence of the item in the line buffer.
+class KeywordSpan:
+    """ Where the item holding a keyword was found (line0) and the lines collected for it """
+    __slots__ = ('line0', 'lines')
+
+    def __init__( self):
+        self.line0 = -1
+        self.lines = []
+
+#---------------------------------------------------------------------------------------------------
+class ItemFormat:
+    """ The description of an item (or a group of items that go together) as parsed from the
+        format description, it is part of a FormatTemplate and is not changed by checking.
     """
+    __slots__ = ('itemId', 'raw', 'desc', 'offset', 'span', 'keywords', 'dependsOn', 'matchers')
+
     def __init__( self, itemId, raw, desc, dependsOn = None):
         self.itemId = itemId
         self.raw = [raw]
         self.desc = [desc]
         self.offset = [0]
         self.span = 1    # how many lines does this item span
-        self.index = -1  # what line in the file did we find this
-        self.keywords = OrderedDict()
-        self.dependsOn = dependsOn
+        self.keywords = []
+        self.dependsOn = dependsOn  # the ItemFormat that must be found first
+        self.matchers = ()  # (line buffer index, compiled desc) see Compile
 
     #-----------------------------------------------------------------------------------------------
     def AddGroupItem( self, raw, desc, span):
@@ -62,26 +94,20 @@ class Item( Holder):
         self.offset.append( offset)
 
     #-----------------------------------------------------------------------------------------------
-    def Reset( self):
-        self.index = -1
-        for k in self.keywords:
-            h = self.keywords[k]
-            h.line0 = -1
-            h.lines = []
+    def AddKeywords( self, keywords):
+        for keyword in keywords:
+            if keyword not in self.keywords:
+                self.keywords.append( keyword)
 
     #-----------------------------------------------------------------------------------------------
     def Keywords( self):
-        keyRe = re.compile( r'<[A-Z][A-Za-z0-9_]+>')
-
         newDesc = []
         for i in self.desc:
-            key = keyRe.findall( i)
+            key = eKeywordRe.findall( i)
             for keyword in key:
                 # remove keyword from desc Item - needed when something expected after the keyword
                 i = i.replace( keyword, eAnyText).strip()
-
-                if keyword not in self.keywords:
-                    self.keywords[keyword] = Holder( line0 = -1, lines=[])
+                self.AddKeywords( [keyword])
             newDesc.append(i)
 
         self.desc = newDesc
@@ -96,26 +122,74 @@ class Item( Holder):
                 break
         return isEmpty
 
+    #-----------------------------------------------------------------------------------------------
+    def Compile( self):
+        """ compile each description line once and work out the line buffer index it is matched
+            against (its position in the group plus the group offsets before it), then freeze
+        """
+        matchers = []
+        lbx = 0
+        for ix, desc in enumerate(self.desc):
+            lbx += self.offset[ix]
+            matchers.append( (ix + lbx, re.compile( desc, re.DOTALL)))
+
+        self.matchers = tuple( matchers)
+        self.raw = tuple( self.raw)
+        self.desc = tuple( self.desc)
+        self.offset = tuple( self.offset)
+        self.keywords = tuple( self.keywords)
+
+#---------------------------------------------------------------------------------------------------
+class Item:
+    """ This holds the info about an item (or a group of items that go together) for one check.
+        It allows for checking the existence of the item in the line buffer.
+    """
+    __slots__ = ('fmt', 'index', 'keywords', 'dependsOn')
+
+    def __init__( self, fmt, dependsOn = None):
+        self.fmt = fmt
+        self.index = -1  # what line in the file did we find this
+        self.keywords = OrderedDict( [(k, KeywordSpan()) for k in fmt.keywords])
+        self.dependsOn = dependsOn
+
+    #-----------------------------------------------------------------------------------------------
+    @property
+    def itemId( self):
+        return self.fmt.itemId
+
+    @property
+    def raw( self):
+        return self.fmt.raw
+
+    @property
+    def desc( self):
+        return self.fmt.desc
+
+    @property
+    def span( self):
+        return self.fmt.span
+
+    #-----------------------------------------------------------------------------------------------
+    def Reset( self):
+        self.index = -1
+        for k in self.keywords:
+            h = self.keywords[k]
+            h.line0 = -1
+            h.lines = []
+
     #-----------------------------------------------------------------------------------------------
     def JoinRaw( self):
-        return '\n'.join( self.raw)
+        return '\n'.join( self.fmt.raw)
 
     #-----------------------------------------------------------------------------------------------
     def MatchBuffer( self, lineCount, maxSpan, lineBuffer):
-        """ start at the top of the buffer and see if we match all we need """
-        if self.index == -1 and len(lineBuffer) >= self.span:
-            lbx = 0
+        """ start at the top of the buffer and see if we match all we need
+            the buffered lines are already stripped
+        """
+        if self.index == -1 and len(lineBuffer) >= self.fmt.span:
             isMatch = True
-            for ix, desc in enumerate(self.desc):
-                lbx += self.offset[ix]
-                bufLine = lineBuffer[ix+lbx].strip()
-
-                try:
-                    descLineRe = re.compile( desc, re.DOTALL)
-                except:
-                    raise
-                m = descLineRe.search( bufLine)
-                if not m:
+            for at, descRe in self.fmt.matchers:
+                if not descRe.search( lineBuffer[at]):
                     isMatch = False
                     break
 
@@ -130,70 +204,188 @@ class Item( Holder):
         return isMatch
 
 #---------------------------------------------------------------------------------------------------
-class FormatChecker:
-    def __init__( self, detector, updateTime, desc, rawDesc):
+# Classes
+#---------------------------------------------------------------------------------------------------
+class FormatTemplate:
+    """ A format description parsed and compiled into its items.  A template is not changed by
+        checking so one is shared by all the checks of a description (see formatTemplates), and it
+        pickles so it can be handed to other processes.
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, desc, rawDesc):
         """ desc - the string of lines describing the format
             lines followed by a :#: indicate how many lines after the previous descLine it can be
             in the actual file, this allows defining grouping
             NEW: groups are looked for together as a block or group or flock or chunck or ...
         """
-        posDefRe = re.compile( ePosDef)
-
-        self.detector = detector
-        self.updateTime = updateTime
-        self.desc = desc
         dl = desc.split('\n')
-        self.descLines = [i.strip() for i in dl if i.strip()]
+        descLines = [i.strip() for i in dl if i.strip()]
         dl = rawDesc.split('\n')
-        self.rawDescLines = [i for i in dl if i.strip()]
+        rawDescLines = [i for i in dl if i.strip()]
 
-        self.items = []
-        for ix, i in enumerate(self.descLines):
-            iid = len(self.items)
-            posDef = posDefRe.findall( i.strip())
+        items = []
+        for ix, i in enumerate(descLines):
+            iid = len(items)
+            posDef = ePosDefRe.findall( i.strip())
             if posDef:
                 posDef = posDef[0]
                 if posDef == ':D:':
-                    descLine = self.descLines[ix].replace( posDef, '').strip()
-                    item = Item( iid, self.rawDescLines[ix], descLine, self.items[-1])
-                    self.items.append(item)
+                    descLine = descLines[ix].replace( posDef, '').strip()
+                    item = ItemFormat( iid, rawDescLines[ix], descLine, items[-1])
+                    items.append(item)
                 else:
                     span = int(posDef.replace(':', ''))
-                    item = self.items[-1]
-                    descLine = self.descLines[ix].replace( posDef, '').strip()
-                    item.AddGroupItem( self.rawDescLines[ix], descLine, span)
+                    item = items[-1]
+                    descLine = descLines[ix].replace( posDef, '').strip()
+                    item.AddGroupItem( rawDescLines[ix], descLine, span)
             else:
-                item = Item( iid, self.rawDescLines[ix], self.descLines[ix])
-                self.items.append(item)
+                item = ItemFormat( iid, rawDescLines[ix], descLines[ix])
+                items.append(item)
 
         # find out how big our line buffer needs to be
-        maxSpan = [i.span for i in self.items]
+        maxSpan = [i.span for i in items]
         if maxSpan:
             maxSpan.sort()
             self.maxSpan = maxSpan[-1]
         else:
             self.maxSpan = 1
 
-        self.lineBuffer = []
-
-        self.lineCount = 0
-
         # find lineSpan limits for a line of keywords in the description items
-        for item in self.items:
+        for item in items:
             item.Keywords()
 
         # move empty item's keywords to the item before them, and dependers too
-        for ix, item in enumerate( self.items):
+        for ix, item in enumerate( items):
             if item.IsEmptyDesc():
                 if ix == 0:
                     # move keywords forward special case
-                    self.items[1].keywords.update( item.keywords)
+                    items[1].AddKeywords( item.keywords)
                 else:
                     # move it back one item
-                    self.items[ix-1].keywords.update( item.keywords)
+                    items[ix-1].AddKeywords( item.keywords)
 
         # clear out the empty descriptors
-        self.items = [i for i in self.items if not i.IsEmptyDesc()]
+        self.items = tuple( [i for i in items if not i.IsEmptyDesc()])
+
+        for item in self.items:
+            item.Compile()
+
+        self.automaton = self.CompileAutomaton()
+
+        # the automaton searches for all the items, trying the open items in turn is cheaper once
+        # most of them have been found
+        self.automatonMin = max( 2, len( self.items) // 2)
+
+    #-----------------------------------------------------------------------------------------------
+    def CompileAutomaton( self):
+        """ merge the first desc line of every item into one alternation, an item can only start
+            on a line this finds a match in.  Returns None when the patterns can not be merged (back
+            references, inline flags), the items are then always tried in turn.
+        """
+        firsts = []
+        for item in self.items:
+            first = item.desc[0]
+            if eNoMergeRe.search( first):
+                return None
+            if first not in firsts:
+                firsts.append( first)
+
+        if not firsts:
+            return None
+
+        try:
+            automaton = re.compile( '|'.join( ['(?:%s)' % i for i in firsts]), re.DOTALL)
+        except (re.error, OverflowError, RecursionError):
+            automaton = None
+
+        return automaton
+
+    #-----------------------------------------------------------------------------------------------
+    def NewItems( self):
+        """ return the per check items of this template """
+        items = []
+        byFormat = {}
+        for fmt in self.items:
+            dependsOn = None
+            if fmt.dependsOn is not None:
+                # an item can depend on an empty (removed) item, which is never found
+                dependsOn = byFormat.get( fmt.dependsOn) or Item( fmt.dependsOn)
+            item = Item( fmt, dependsOn)
+            byFormat[fmt] = item
+            items.append( item)
+
+        return items
+
+#---------------------------------------------------------------------------------------------------
+class TemplateCache:
+    """ The FormatTemplate of each format description, a description is parsed and compiled once
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self):
+        self.templates = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    #-----------------------------------------------------------------------------------------------
+    def Get( self, desc, rawDesc):
+        """ return the template for a format description """
+        key = (desc, rawDesc)
+        with self.lock:
+            template = self.templates.get( key)
+            if template is not None:
+                self.hits += 1
+                return template
+
+            self.misses += 1
+            template = FormatTemplate( desc, rawDesc)
+            self.templates[key] = template
+
+        return template
+
+    #-----------------------------------------------------------------------------------------------
+    def Put( self, desc, rawDesc, template):
+        """ add a template compiled elsewhere (i.e., in the parent of a worker process) """
+        with self.lock:
+            self.templates.setdefault( (desc, rawDesc), template)
+
+    #-----------------------------------------------------------------------------------------------
+    def Stats( self):
+        return 'Format Templates hits/misses: %d/%d' % (self.hits, self.misses)
+
+    #-----------------------------------------------------------------------------------------------
+    def Clear( self):
+        with self.lock:
+            self.templates = {}
+
+#---------------------------------------------------------------------------------------------------
+class FormatChecker:
+    def __init__( self, detector, updateTime, desc, rawDesc, engine=eEngineAutomaton,
+                  maxKeywordLines=None):
+        """ desc - the string of lines describing the format, see FormatTemplate
+            the checker holds the state of a check of one set of lines against the template
+            engine: eEngineAutomaton or eEngineScan, both give the same results
+            maxKeywordLines: the most lines collected for a keyword (None for no limit)
+        """
+        self.detector = detector
+        self.updateTime = updateTime
+        self.desc = desc
+        self.maxKeywordLines = maxKeywordLines
+
+        self.template = formatTemplates.Get( desc, rawDesc)
+        self.automaton = self.template.automaton if engine == eEngineAutomaton else None
+        self.automatonMin = self.template.automatonMin
+        self.maxSpan = self.template.maxSpan
+        self.items = self.template.NewItems()
+
+        # the window of the last maxSpan (stripped) lines
+        self.lineBuffer = deque( maxlen=self.maxSpan)
+
+        self.lineCount = 0
+
+        # the items not found yet in item order, only these are matched against the buffer
+        self.unmatched = list( self.items)
 
     #-----------------------------------------------------------------------------------------------
     def GetKeywordItems( self, keyword):
@@ -234,17 +426,41 @@ class FormatChecker:
     def BufferCheck( self, lx, line):
         # now that we have the line buffer filled
         # lets scan through our items for matchs
-        for ix, item in enumerate(self.items):
-            if item.MatchBuffer( lx, self.maxSpan, self.lineBuffer):
-                # only assign this to one item and start at the top
-                self.InitKeyword( item, lx-self.maxSpan, line)
-                break
+        if self.automaton is not None and len( self.unmatched) >= self.automatonMin:
+            ix, item = self.AutomatonMatch( lx)
+        else:
+            ix, item = self.ScanMatch( lx)
+
+        if item is not None:
+            # a match on the lines left from the previous check can land on index -1, then
+            # the item is still open
+            if item.index != -1:
+                del self.unmatched[ix]
+            # only assign this to one item and start at the top
+            self.InitKeyword( item, lx-self.maxSpan, line)
         else:
             # collecting info for an open keyword
             self.SaveKeyWordData( line)
 
         # toss out the oldest
-        self.lineBuffer = self.lineBuffer[1:]
+        self.lineBuffer.popleft()
+
+    #-----------------------------------------------------------------------------------------------
+    def AutomatonMatch( self, lx):
+        """ return the (unmatched index, item) of the 1st item that matches the buffer, the items
+            are only tried when the automaton finds one of them could start on the top line
+        """
+        if self.automaton.search( self.lineBuffer[0]):
+            return self.ScanMatch( lx)
+        return -1, None
+
+    #-----------------------------------------------------------------------------------------------
+    def ScanMatch( self, lx):
+        """ return the (unmatched index, item) of the 1st item that matches the buffer """
+        for ix, item in enumerate(self.unmatched):
+            if item.MatchBuffer( lx, self.maxSpan, self.lineBuffer):
+                return ix, item
+        return -1, None
 
     #-----------------------------------------------------------------------------------------------
     def FinishBuffer( self):
@@ -265,6 +481,7 @@ class FormatChecker:
         # keep the location each item is found at
         for i in self.items:
             i.Reset()
+        self.unmatched = list( self.items)
 
         self.activeItem = None
         self.lineCount = 0
@@ -278,14 +495,32 @@ class FormatChecker:
 
         for keyword in item.keywords:
             item.keywords[keyword].line0 = lx
-            item.keywords[keyword].lines = self.lineBuffer[:item.span]
+            item.keywords[keyword].lines = list( itertools.islice( self.lineBuffer, item.span))
             self.activeItem = item
 
     #-----------------------------------------------------------------------------------------------
     def SaveKeyWordData( self, line):
         if self.activeItem:
             for keyword in self.activeItem.keywords:
-                self.activeItem.keywords[keyword].lines.append(line)
+                lines = self.activeItem.keywords[keyword].lines
+                if self.maxKeywordLines is None or len( lines) < self.maxKeywordLines:
+                    lines.append(line)
+
+    #-----------------------------------------------------------------------------------------------
+    def IsDone( self):
+        """ True when more lines can not change the check: all the items are found and the open
+            keyword (if any) has collected maxKeywordLines.  A file check can stop feeding lines
+            then, FinishBuffer and ReportErrors work the same.
+        """
+        if self.unmatched or self.maxKeywordLines is None:
+            return False
+
+        if self.activeItem:
+            for keyword in self.activeItem.keywords:
+                if len( self.activeItem.keywords[keyword].lines) < self.maxKeywordLines:
+                    return False
+
+        return True
 
     #-----------------------------------------------------------------------------------------------
     def ReportErrors( self, db, rpfn, lineNum, checkDesc, func, errMsg):
@@ -311,26 +546,31 @@ class FormatChecker:
 
         # report items out of sequence in the header
         expectSeq = found[:]
-        foundItems = len(found)
         found.sort( key=lambda x: x.index)
         ordSave = [item.desc for item in found]
-        itemSeq = ordSave[:]
 
+        # the first position of each desc in the description and in the found order
+        expectPos = {}
+        for opx, opi in enumerate(self.items):
+            expectPos.setdefault( opi.desc, opx)
+        actualPos = {}
+        foundAt = {}
+        for apx, api in enumerate(ordSave):
+            actualPos.setdefault( api, apx)
+            foundAt.setdefault( api, deque()).append( apx)
+
+        # walk the expected order against the found order, an item not at the head of the found
+        # items left is out of sequence, each item uses up the 1st of its desc still left
+        used = [False] * len(ordSave)
+        head = 0
         for ix, item in enumerate(expectSeq):
-            if itemSeq and item.desc != itemSeq[0]:
-                itemSeq.remove( item.desc)
-
-                # get original pos/count
-                for opx, opi in enumerate(self.items):
-                    if opi.desc == item.desc:
-                        break
-                expPc = '%d/%d' % (opx, len(self.items))
+            while head < len(ordSave) and used[head]:
+                head += 1
 
-                # find in it our actual data
-                for apx, api in enumerate(ordSave):
-                    if api == item.desc:
-                        break
-                actPc = '%d/%d' % (apx, len(ordSave))
+            used[foundAt[item.desc].popleft()] = True
+            if head < len(ordSave) and item.desc != ordSave[head]:
+                expPc = '%d/%d' % (expectPos[item.desc], len(self.items))
+                actPc = '%d/%d' % (actualPos[item.desc], len(ordSave))
 
                 # header field order
                 severity = 'Warning'
@@ -342,8 +582,10 @@ class FormatChecker:
                 details = msgStr % (rawText, ix, expPc, actPc, item.index)
                 db.Insert(rpfn, func, severity, violationId, desc,
                           details, lineSeq, self.detector, self.updateTime)
-            else:
-                itemSeq = itemSeq[1:]
+
+#---------------------------------------------------------------------------------------------------
+# the process wide format template cache
+formatTemplates = TemplateCache()
 
 #===================================================================================================
 if __name__ == '__main__':
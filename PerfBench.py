@@ -0,0 +1,256 @@
+"""
+Performance Benchmarks
+This file times the hot spots of the code review tools on synthetic data, each benchmark times two
+ways of doing the same work and checks they give the same results.  The roots bench compares the
+root trie with the scan of the roots it replaced.  The format bench compares the two FormatChecker
+engines, both use the compiled template, tests/test_format_report.py checks the violations they
+report are the ones the checker reported before the template.
+
+    python PerfBench.py [-bench format|roots] [-runs N] [-seed N]
+
+    format - FormatChecker item matching, the automaton vs. trying each item in turn
+             [-files N] [-lines N] [-items N]
+    roots  - ProjectFile.RelativePathName/IsLibraryFile per entity, the root trie vs. a scan of
+             the roots [-files N] [-roots N] [-entities N]
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import argparse
+import datetime
+import os
+import random
+import time
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+import FormatChecker as FC
+from utils.RootTrie import RootResolver
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eDefaultFiles = 200
+eDefaultLines = 3000
+eDefaultItems = 40
+
+eDefaultRoots = 8
+eDefaultEntities = 50000
+
+eBodyLines = (
+    'static UINT32 counter;',
+    '    counter = counter + 1;',
+    '    if ( counter > LIMIT)',
+    '    {',
+    '        counter = 0;',
+    '    }',
+    '/* keep the count in range */',
+    '',
+    '    return counter;',
+    '}',
+    )
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def Report( title, times):
+    """ show the best time of each engine and the speed up over the first """
+    print( '\n%s' % title)
+    base = None
+    for name in times:
+        best = min( times[name])
+        if base is None:
+            base = best
+        print( '    %-12s %8.3fs  x%.1f' % (name, best, base / best if best else 0.0))
+
+#---------------------------------------------------------------------------------------------------
+def ScanRelativePathName( srcRoots, fpfn):
+    """ ProjectFile.RelativePathName before the root trie """
+    fn = fpfn
+    for sr in srcRoots:
+        fn = fpfn.replace(sr, '')
+        if fn != fpfn:
+            if fn[0] in ('/', '\\'):
+                fn = fn[1:]
+                break
+    rpfn = fn
+    fn = os.path.split(rpfn)[1]
+    return rpfn, fn
+
+#---------------------------------------------------------------------------------------------------
+def ScanIsLibraryFile( includeDirs, fpfn):
+    """ ProjectFile.IsLibraryFile before the root trie """
+    isLibrary = False
+    for i in includeDirs:
+        if fpfn.find(i) != -1:
+            isLibrary = True
+    return isLibrary
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class FormatBench:
+    """ File format checks of a synthetic corpus, each file has a header block of the description
+        items and then a long body.  Some headers miss an item or have two swapped, some are of
+        an older layout that only has the first third of the items.
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, files, lines, items, seed):
+        self.rnd = random.Random( seed)
+        self.updateTime = datetime.datetime.now()
+
+        self.desc = self.Description( items)
+        self.corpus = [self.File( items, lines) for i in range( files)]
+
+    #-----------------------------------------------------------------------------------------------
+    def Description( self, items):
+        """ a file description of items fields, every 5th field has a 2nd line in a group """
+        lines = ['/\\*+', 'File: <TheFileName>']
+        for ix in range( items):
+            lines.append( '\\* Field%02d:\\s+\\S+' % ix)
+            if ix % 5 == 4:
+                lines.append( '\\* Field%02d Note: :1:' % ix)
+        lines.append( '\\*+/')
+        return '\n'.join( lines)
+
+    #-----------------------------------------------------------------------------------------------
+    def File( self, items, lines):
+        fields = list( range( items))
+        if self.rnd.random() < 0.3:
+            fields = fields[:max( 2, items // 3)]
+
+        # drop a field and swap two others now and then
+        if self.rnd.random() < 0.3:
+            fields.remove( self.rnd.choice( fields))
+        if self.rnd.random() < 0.3:
+            a = self.rnd.randrange( len( fields) - 1)
+            fields[a], fields[a+1] = fields[a+1], fields[a]
+
+        text = ['/**********', 'File: Module.c']
+        for ix in fields:
+            text.append( '* Field%02d: value%d' % (ix, ix))
+            if ix % 5 == 4:
+                text.append( '* Field%02d Note: more' % ix)
+        text.append( '**********/')
+
+        while len( text) < lines:
+            text.append( self.rnd.choice( eBodyLines))
+        return text
+
+    #-----------------------------------------------------------------------------------------------
+    def Run( self, engine):
+        """ check the corpus, return the seconds and what was found """
+        results = []
+        start = time.time()
+        for text in self.corpus:
+            fc = FC.FormatChecker( 'PerfBench', self.updateTime, self.desc, self.desc, engine)
+            for lx, line in enumerate( text):
+                fc.CheckLine( lx, line)
+            fc.FinishBuffer()
+            results.append( [(item.index, [(k, item.keywords[k].line0, len( item.keywords[k].lines))
+                                           for k in item.keywords])
+                             for item in fc.items])
+        return time.time() - start, results
+
+    #-----------------------------------------------------------------------------------------------
+    def Compare( self, runs):
+        times = {FC.eEngineScan: [], FC.eEngineAutomaton: []}
+        found = {}
+        for runNr in range( runs):
+            for engine in times:
+                seconds, found[engine] = self.Run( engine)
+                times[engine].append( seconds)
+
+        lines = sum( [len( text) for text in self.corpus])
+        Report( 'FormatChecker: %d files, %d lines, %d items' % (
+            len( self.corpus), lines, len( FC.formatTemplates.Get( self.desc, self.desc).items)),
+            times)
+
+        same = found[FC.eEngineScan] == found[FC.eEngineAutomaton]
+        print( '    results match: %s' % same)
+        return same
+
+#---------------------------------------------------------------------------------------------------
+class RootsBench:
+    """ The relative path and library file lookups the naming checks make for each entity, the
+        entities are spread over the files of a project with a few src roots and include dirs.
+        One src root ends in a separator and some files name their dir in another case.
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, files, roots, entities, seed):
+        self.rnd = random.Random( seed)
+
+        base = os.path.join( os.sep, 'projects', 'Product')
+        self.srcRoots = [os.path.join( base, 'src%d' % i) for i in range( roots)]
+        self.includeDirs = [os.path.join( base, 'lib%d' % i, 'include') for i in range( roots)]
+
+        dirs = self.srcRoots + self.includeDirs
+        paths = []
+        for fx in range( files):
+            subdir = os.path.join( *['mod%d' % self.rnd.randrange( 10)
+                                     for i in range( self.rnd.randint( 0, 3))] or [''])
+            dirName = self.rnd.choice( dirs)
+            if self.rnd.random() < 0.1:
+                dirName = dirName.upper()
+            paths.append( os.path.join( dirName, subdir, 'file%d.c' % fx))
+
+        if roots > 1:
+            self.srcRoots[roots // 2] += os.sep
+
+        self.entities = [self.rnd.choice( paths) for i in range( entities)]
+
+    #-----------------------------------------------------------------------------------------------
+    def RunScan( self):
+        return [(ScanRelativePathName( self.srcRoots, fpfn),
+                 ScanIsLibraryFile( self.includeDirs, fpfn)) for fpfn in self.entities]
+
+    #-----------------------------------------------------------------------------------------------
+    def RunTrie( self):
+        resolver = RootResolver( self.srcRoots, self.includeDirs)
+        return [(resolver.RelativePathName( fpfn),
+                 resolver.IsLibraryFile( fpfn)) for fpfn in self.entities]
+
+    #-----------------------------------------------------------------------------------------------
+    def Compare( self, runs):
+        engines = (('scan', self.RunScan), ('trie', self.RunTrie))
+        times = dict( [(name, []) for name, run in engines])
+        found = {}
+        for runNr in range( runs):
+            for name, run in engines:
+                start = time.time()
+                found[name] = run()
+                times[name].append( time.time() - start)
+
+        Report( 'Root lookups: %d entities, %d files, %d src roots, %d include dirs' % (
+            len( self.entities), len( set( self.entities)), len( self.srcRoots),
+            len( self.includeDirs)), times)
+        for name in times:
+            print( '    %-12s %8.2fus per entity' % (
+                name, min( times[name]) * 1e6 / max( 1, len( self.entities))))
+
+        same = found['scan'] == found['trie']
+        print( '    results match: %s' % same)
+        return same
+
+#===================================================================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( description='Time the code review hot spots')
+    parser.add_argument( '-bench', choices=['format', 'roots'], default='format')
+    parser.add_argument( '-runs', type=int, default=3)
+    parser.add_argument( '-seed', type=int, default=1)
+    parser.add_argument( '-files', type=int, default=eDefaultFiles, help='files')
+    parser.add_argument( '-lines', type=int, default=eDefaultLines, help='format: lines per file')
+    parser.add_argument( '-items', type=int, default=eDefaultItems, help='format: desc items')
+    parser.add_argument( '-roots', type=int, default=eDefaultRoots, help='roots: src roots')
+    parser.add_argument( '-entities', type=int, default=eDefaultEntities, help='roots: entities')
+    args = parser.parse_args()
+
+    if args.bench == 'format':
+        FormatBench( args.files, args.lines, args.items, args.seed).Compare( args.runs)
+    elif args.bench == 'roots':
+        RootsBench( args.files, args.roots, args.entities, args.seed).Compare( args.runs)
@@ -49,9 +49,13 @@ The following is a list of project configuraiton items currently support :
 from collections import OrderedDict
 
 import copy
+import hashlib
 #import inspect
-import threading
+import io
+import json
 import os
+import re
+import threading
 
 #---------------------------------------------------------------------------------------------------
 # Third Party Modules
@@ -60,6 +64,9 @@ import os
 #---------------------------------------------------------------------------------------------------
 # Knowlogic Modules
 #---------------------------------------------------------------------------------------------------
+from utils.SrcCache import srcCache
+from utils.RootTrie import RootResolver
+from utils.SrcInventory import SrcInventory
 
 #---------------------------------------------------------------------------------------------------
 # Data
@@ -103,6 +110,18 @@ eRestrictedFunc = 'Functions'
 
 eAnalysisComments = 'Analysis_Comments'
 
+# the [header] of a section
+eSectionRe = re.compile( r'\[([^\[\]]*)\]')
+
+# the parsed project is kept as data (JSON) in <project dir>/tool/<project name>.snapshot.json, it
+# is used when the project file hash matches (bump the version when what Open builds changes)
+eSnapshotRoot = r'tool'
+eSnapshotExt = '.snapshot.json'
+eSnapshotVersion = 1
+eSnapshotState = ('projectFileData', 'sectionIndex', 'paths', 'defines', 'undefines', 'exclude',
+                  'formats', 'rawFormats', 'metrics', 'naming', 'options', 'restricted',
+                  'baseTypes', 'analysisComments')
+
 #---------------------------------------------------------------------------------------------------
 # Functions
 #---------------------------------------------------------------------------------------------------
@@ -133,6 +152,21 @@ class ProjectFile:
 
         self.dbLock = threading.Lock()
 
+    #-----------------------------------------------------------------------------------------------
+    def __getstate__(self):
+        """ the project file is sent to the check worker processes, leave out the lock and the
+            (closed) file object as they can't be pickled
+        """
+        state = self.__dict__.copy()
+        state.pop( 'dbLock', None)
+        state.pop( 'projectFile', None)
+        return state
+
+    #-----------------------------------------------------------------------------------------------
+    def __setstate__(self, state):
+        self.__dict__.update( state)
+        self.dbLock = threading.Lock()
+
     #-----------------------------------------------------------------------------------------------
     def Reset(self, ffn):
         """ Init/declare all the variable for this class
@@ -241,11 +275,23 @@ class ProjectFile:
         self.analysisComments = []
         self.sectionTips['[Analysis_Comments]'] = 'A list of canned comments to alpply to your analysis of the tool findings.'
 
+        # the project file lines, the line of each [section] and the formats before the regex
+        # substitutions, see Open
+        self.projectFileData = []
+        self.sectionIndex = {}
+        self.rawFormats = OrderedDict()
+
         self.modified = False
         self.isValid = False
 
         self.errors = []
 
+        # the files under the src roots, listed once for the session
+        self.srcInventory = SrcInventory()
+
+        # the root prefix lookups of RelativePathName/IsLibraryFile, see GetRootResolver
+        self.rootResolver = None
+
     #-----------------------------------------------------------------------------------------------
     def GetTip( self, iniGroup):
         """ Get the tip associated with the iniGroup
@@ -262,27 +308,23 @@ class ProjectFile:
     #-----------------------------------------------------------------------------------------------
     def GetSrcCodeFiles( self, extensions=('.h','.c','.cpp','.hpp'), excludeDirs=(), excludedFiles=()):
         """ Walk all srcCode roots and files with extension in extensions unless
-            the file is in the excludeFileList
+            the file is in the excludeFileList, the dirs in excludeDirs are not walked
+            (see utils.ExcludeMatcher for the forms of the excludes)
 
             All .h files seen have their src directory returned in includeDirs
+            The walk is served from the project's source inventory
         """
-        srcFiles = []
-        includeDirs = []
-        for root in self.paths[ePathSrcRoot]:
-            for dirPath, dirs, fileNames in os.walk( root):
-                if dirPath not in excludeDirs:
-                    for f in fileNames:
-                        ffn = os.path.join( dirPath, f)
-                        ext = os.path.splitext( f)[1]
-
-                        if ext == '.h' and dirPath not in includeDirs:
-                            includeDirs.append( dirPath)
-
-                        if os.path.isfile(ffn) and ext in extensions:
-                            if f not in excludedFiles:
-                                srcFiles.append( ffn)
+        return self.srcInventory.SrcCodeFiles( self.paths[ePathSrcRoot], extensions,
+                                               excludeDirs, excludedFiles, self.pathCaseMatters)
 
-        return includeDirs, srcFiles
+    #-----------------------------------------------------------------------------------------------
+    def GetSrcSkipReport( self, extensions=('.h','.c','.cpp','.hpp'), excludeDirs=(),
+                          excludedFiles=()):
+        """ return the lines reporting the dirs and files the excludes skipped in the
+            GetSrcCodeFiles with the same arguments
+        """
+        return self.srcInventory.SkipReport( self.paths[ePathSrcRoot], extensions,
+                                             excludeDirs, excludedFiles, self.pathCaseMatters)
 
     #-----------------------------------------------------------------------------------------------
     def GetErrorText( self):
@@ -298,14 +340,27 @@ class ProjectFile:
     # Open / Read Operations
     #-----------------------------------------------------------------------------------------------
     def Open( self):
-        """ Read in the contents of a project file
+        """ Read in the contents of a project file, from its snapshot when it has not changed
         """
         if os.path.isfile( self.projFileName):
-            self.projectFile = open( self.projFileName , 'r')
-            rawLines = self.projectFile.readlines()
+            f = open( self.projFileName, 'rb')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+
+            snapshotKey = '%s:%d:%s' % (hashlib.md5( data).hexdigest(), eSnapshotVersion, os.name)
+            if self.LoadSnapshot( snapshotKey):
+                # the paths may have come or gone since the snapshot
+                self.CheckPaths()
+                self.isValid = self.errors == []
+                return
+
+            # read it as a text mode open() would
+            rawLines = io.TextIOWrapper( io.BytesIO( data)).readlines()
             # remove comment lines
             self.projectFileData = [i for i in rawLines if i[0:2] != '##']
-            self.projectFile.close()
+            self.IndexSections()
 
             self.ReadPaths()
             self.ReadDefs()
@@ -335,9 +390,95 @@ class ProjectFile:
 
             # good project file ?
             self.isValid = self.errors == []
+
+            self.SaveSnapshot( snapshotKey)
         else:
             self.errors.append( '<%s> does not exist.' % self.projFileName)
 
+    #-----------------------------------------------------------------------------------------------
+    def IndexSections( self):
+        """ index the line of the 1st [header] of each section, see GetHdr """
+        self.sectionIndex = {}
+        for at, line in enumerate( self.projectFileData):
+            for m in eSectionRe.finditer( line):
+                self.sectionIndex.setdefault( m.group(1), at)
+
+    #-----------------------------------------------------------------------------------------------
+    def SnapshotName( self):
+        """ the snapshot goes in the tool dir of the project dir the project file is in """
+        projDir = os.path.split( self.projFileName)[0]
+        return os.path.join( projDir, eSnapshotRoot, self.projName + eSnapshotExt)
+
+    #-----------------------------------------------------------------------------------------------
+    def LoadSnapshot( self, snapshotKey):
+        """ restore the parsed project from its snapshot, return False if there is no snapshot
+            for this version of the project file (or it does not hold what Open builds)
+        """
+        try:
+            f = open( self.SnapshotName(), 'r', encoding='utf-8')
+        except IOError:
+            return False
+
+        try:
+            snapshot = json.load( f, object_pairs_hook=OrderedDict)
+        except ValueError:
+            return False
+        finally:
+            f.close()
+
+        if not isinstance( snapshot, dict) or snapshot.get( 'key') != snapshotKey:
+            return False
+
+        state = snapshot.get( 'state')
+        if not isinstance( state, dict):
+            return False
+        for name in eSnapshotState:
+            # each item must be of the type Reset gives it (i.e., no None for a list)
+            if name not in state or not isinstance( state[name], type( getattr( self, name))):
+                return False
+
+        for name in eSnapshotState:
+            setattr( self, name, state[name])
+
+        # JSON has no tuples: (max length, regex)
+        self.naming = OrderedDict( [(k, tuple( v) if isinstance( v, list) else v)
+                                    for k, v in self.naming.items()])
+        self.sectionIndex = dict( self.sectionIndex)
+
+        return True
+
+    #-----------------------------------------------------------------------------------------------
+    def SaveSnapshot( self, snapshotKey):
+        """ save the parsed project in the tool dir, a project dir we can not write to just goes
+            without
+        """
+        snapshot = {
+            'key': snapshotKey,
+            'state': OrderedDict( [(name, getattr( self, name)) for name in eSnapshotState]),
+            }
+
+        # the tools open the project at the same time, write it under a temp name and move it
+        fn = self.SnapshotName()
+        tmp = '%s.%d' % (fn, os.getpid())
+        try:
+            if not os.path.isdir( os.path.split( fn)[0]):
+                os.makedirs( os.path.split( fn)[0])
+            f = open( tmp, 'w', encoding='utf-8')
+            try:
+                json.dump( snapshot, f)
+            finally:
+                f.close()
+            os.replace( tmp, fn)
+        except (OSError, TypeError, ValueError):
+            pass
+        finally:
+            # never leave the temp file behind
+            if os.path.isfile( tmp):
+                try:
+                    os.remove( tmp)
+                except OSError:
+                    pass
+
     #-----------------------------------------------------------------------------------------------
     def ReadPaths( self):
         """ Write the project and src code root info to the file """
@@ -349,14 +490,7 @@ class ProjectFile:
         self.paths[ePathViewer] = self.GetLine( 'Path_Viewer')
 
         # verify all paths are valid
-        for p in self.paths:
-            v = self.paths[p]
-            if type(v) == str:
-                v = [v]
-
-            for vx in v:
-                if not vx or not self.CheckPath( vx):
-                    self.errors.append( '%s Invalid Path/File: <%s>' % (p, vx))
+        self.CheckPaths()
 
         # normalize the paths
         # TODO: not needed when the proj builder is completed
@@ -368,6 +502,18 @@ class ProjectFile:
             self.paths[ePathInclude][vx] = os.path.normpath( vl)
 
 
+    #-----------------------------------------------------------------------------------------------
+    def CheckPaths( self):
+        """ add an error for each invalid path """
+        for p in self.paths:
+            v = self.paths[p]
+            if type(v) == str:
+                v = [v]
+
+            for vx in v:
+                if not vx or not self.CheckPath( vx):
+                    self.errors.append( '%s Invalid Path/File: <%s>' % (p, vx))
+
     #-----------------------------------------------------------------------------------------------
     def CheckPath( self, aPath):
         """ Validate the path info provided in the project file.
@@ -566,26 +712,14 @@ class ProjectFile:
     # Utilities
     #-----------------------------------------------------------------------------------------------
     def GetFileContents( self, fpfn):
-        lines = []
-        if os.path.isfile( fpfn):
-            f = open( fpfn, 'r')
-            lines = f.readlines()
-            f.close()
-        return lines
+        """ return the lines of fpfn as readlines() would, served from the shared source cache """
+        return srcCache.GetLines( fpfn)
 
     #-----------------------------------------------------------------------------------------------
     def GetHdr( self, header):
-        """ Find the Project File header
+        """ Find the Project File header, the line of the 1st [header] or -1
         """
-        at = 0
-        hdr = '[%s]' % header
-        while at < len(self.projectFileData) and self.projectFileData[at].find( hdr) == -1:
-            at += 1
-
-        if at >= len(self.projectFileData):
-            at = -1
-
-        return at
+        return self.sectionIndex.get( header, -1)
 
     #-----------------------------------------------------------------------------------------------
     def GetLine( self, header):
@@ -671,66 +805,37 @@ class ProjectFile:
     #-----------------------------------------------------------------------------------------------
     def FullPathName( self, rpfn):
         """ Convert a relative path file name into a full path filename, unless
-            it already is a full path name
+            it already is a full path name.  A bare filename returns every file with that name
+            under the src roots (more than one is ambiguous).
+            The names are looked up in the source inventory index
         """
-        if os.path.isfile( rpfn):
-            fullPathNames = [rpfn]
-        else:
-            fullPathNames = []
-
-            # see what we got
-            path, title = os.path.split( rpfn)
-            srcRoots = self.paths[ePathSrcRoot]
-
-            if path:
-                for i in srcRoots:
-                    # see if it is in the root dir
-                    fpfn = os.path.join( i, title)
-                    if os.path.isfile(fpfn):
-                        fullPathNames.append( fpfn)
-                    else:
-                        fpfn = os.path.join( i, rpfn)
-                        if os.path.isfile( fpfn):
-                            fullPathNames.append( fpfn)
-            else:
-                includes, names = self.GetSrcCodeFiles()
-                for s in srcRoots:
-                    for i in includes:
-                        fpfn = os.path.join( s, i, rpfn)
-                        if os.path.isfile( fpfn):
-                            fullPathNames.append( fpfn)
+        return self.srcInventory.Resolve( self.paths[ePathSrcRoot], rpfn, self.pathCaseMatters)
 
-        return fullPathNames
+    #-----------------------------------------------------------------------------------------------
+    def GetRootResolver( self):
+        """ return the RootResolver for the current src roots and include dirs
+            The roots are matched case sensitive (even where paths are not) so the relative path
+            of a file, which the violations in the DB are recorded by, does not change
+        """
+        key = (tuple( self.paths[ePathSrcRoot]), tuple( self.paths[ePathInclude]), True)
+        if self.rootResolver is None or self.rootResolver.key != key:
+            self.rootResolver = RootResolver( key[0], key[1], True)
+        return self.rootResolver
 
     #-----------------------------------------------------------------------------------------------
     def RelativePathName( self, fpfn):
-        """ Convert a full path name to a relative path file name
+        """ Convert a full path name to a relative path file name, the first srcRoot the file is
+            under is taken off the front
             return: rpfn, title
         """
-        srcRoots = self.paths[ePathSrcRoot]
-
-        # compute the relative path from a srcRoot
-        fn = fpfn
-        for sr in srcRoots:
-            fn = fpfn.replace(sr, '')
-            if fn != fpfn:
-                if fn[0] in ('/', '\\'):
-                    fn = fn[1:]
-                    break
-        rpfn = fn
-        fn = os.path.split(rpfn)[1]
-        return rpfn, fn
+        return self.GetRootResolver().RelativePathName( fpfn)
 
     #-----------------------------------------------------------------------------------------------
     def IsLibraryFile( self, fpfn):
         """ Return true if this file is held in a include path.  These files are considered library
             files and so we have no control over them, don't report errors
         """
-        isLibrary = False
-        for i in self.paths[ePathInclude]:
-            if fpfn.find(i) != -1:
-                isLibrary = True
-        return isLibrary
+        return self.GetRootResolver().IsLibraryFile( fpfn)
 
 #===================================================================================================
 if __name__ == '__main__':
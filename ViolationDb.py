@@ -9,7 +9,10 @@ their analysis was.
 #---------------------------------------------------------------------------------------------------
 import csv
 import os
+import queue
 import re
+import threading
+import time
 
 #---------------------------------------------------------------------------------------------------
 # Third Party Modules
@@ -29,9 +32,39 @@ eDbName = r'KsCrDb.db'
 eNotReported = 'Not Reported'
 eAutoWho = 'Auto'
 
+# violation sink: queue bound (back pressure), commit batch size and max seconds between commits
+eSinkQueueSize = 5000
+eSinkBatchSize = 500
+eSinkMaxDelay = 2.0
+
+# how many runs of function metrics are kept for each tool
+eMetricRunsKept = 5
+
+# function metric limits checked in SQL: column, violationId, description, details
+eMetricRules = (
+    ('countLine', 'Metric.Func', 'Function Length exceeded in ', 'Total Line Count'),
+    ('cyclomatic', 'Metric.Cyclomatic', 'Function Cyclomatic Complexity exceeded in ',
+     'Cyclomatic Complexity'),
+    ('maxNesting', 'Metric.Nesting', 'Function Nesting exceeded in ', 'Nesting Levels'),
+    ('returns', 'Metric.Returns', 'Function Return Points exceeded in ', 'Return Points'),
+    )
+
+eSinkInsert = 'insert'
+eSinkCall = 'call'
+eSinkStop = 'stop'
+
 #---------------------------------------------------------------------------------------------------
 # Functions
 #---------------------------------------------------------------------------------------------------
+def IdPrefixes( prefixes):
+    """ return the (sql, params) that match a violationId starting with one of prefixes, a like
+        pattern would take the '_' and '%' in an id as wildcards
+    """
+    sql = ' or '.join( ['substr(violationId, 1, length(?)) = ?'] * len( prefixes))
+    params = []
+    for i in prefixes:
+        params += [i, i]
+    return sql, params
 
 #---------------------------------------------------------------------------------------------------
 # Classes
@@ -76,6 +109,43 @@ class ViolationDb( DB_SQLite):
             if self.Execute(query):
                 self.Commit()
 
+            # the metrics of every function, one set per run
+            fields = ( 'runTime timestamp',
+                       'detectedBy text',
+                       'filename text',
+                       'function text',
+                       'lineStart integer',
+                       'lineEnd integer',
+                       'countLine integer',
+                       'cyclomatic integer',
+                       'maxNesting integer',
+                       'returns integer',
+                       'primary key (runTime,detectedBy,filename,function,lineStart)',
+                       )
+            query  = 'CREATE TABLE if not exists FunctionMetrics(%s)' % ','.join(fields)
+            if self.Execute(query):
+                self.Commit()
+
+            # the runs of a tool (i.e., LastMetricsRun and the retention in InsertFunctionMetrics)
+            query = """CREATE INDEX if not exists FunctionMetricsRuns
+                       on FunctionMetrics(detectedBy,runTime)"""
+            if self.Execute(query):
+                self.Commit()
+
+            # the content/config hash of each file when its per file checks were last run
+            #   checkTime: when the file was last checked, seenTime: the last run it was in
+            fields = ( 'detectedBy text',
+                       'filename text',
+                       'contentHash text',
+                       'configHash text',
+                       'checkTime timestamp',
+                       'seenTime timestamp',
+                       'primary key (detectedBy,filename)',
+                       )
+            query  = 'CREATE TABLE if not exists FileState(%s)' % ','.join(fields)
+            if self.Execute(query):
+                self.Commit()
+
         self.insertNew = 0
         self.insertUpdate = 0
         self.insertSelErr = 0
@@ -463,8 +533,16 @@ class ViolationDb( DB_SQLite):
         return desc
 
     #-----------------------------------------------------------------------------------------------
-    def MarkNotReported( self, detectedBy, updateTime):
-        """ mark all items not reported this run and return the count of those """
+    def MarkNotReported( self, detectedBy, updateTime, violationIds=None):
+        """ mark all items not reported this run and return the count of those
+            violationIds: only mark the violationIds starting with one of these, None for all
+        """
+        idsOnly = ''
+        idParams = []
+        if violationIds:
+            idsOnly, idParams = IdPrefixes( violationIds)
+            idsOnly = 'and (%s)' % idsOnly
+
         # count how many will be marked
         s = """
             select count(*)
@@ -472,8 +550,9 @@ class ViolationDb( DB_SQLite):
             where lastReport != ?
             and detectedBy = '%s'
             and reviewDate is Null
-            """ % (detectedBy,)
-        self.Execute( s, updateTime)
+            %s
+            """ % (detectedBy, idsOnly)
+        self.Execute( s, updateTime, *idParams)
         data = self.GetOne()
 
         # mark them as not being reported anymore
@@ -482,13 +561,212 @@ class ViolationDb( DB_SQLite):
                 where lastReport != ?
                 and detectedBy = '%s'
                 and reviewDate is Null
-            """ % (detectedBy)
-        self.Execute( s, eNotReported, updateTime, updateTime)
+                %s
+            """ % (detectedBy, idsOnly)
+        self.Execute( s, eNotReported, updateTime, updateTime, *idParams)
 
         self.Commit()
 
         return data[0]
 
+    #-----------------------------------------------------------------------------------------------
+    def InsertFunctionMetrics( self, detectedBy, runTime, rows, keepRuns=eMetricRunsKept):
+        """ save the metrics of every function for this run, only the last keepRuns runs of
+            detectedBy are kept
+            rows: [(filename, function, lineStart, lineEnd, countLine, cyclomatic, maxNesting,
+                    returns), ...]
+        """
+        s = """
+            insert or replace into FunctionMetrics
+            (runTime,detectedBy,filename,function,lineStart,lineEnd,
+             countLine,cyclomatic,maxNesting,returns)
+            values (?,?,?,?,?,?,?,?,?,?)
+            """
+        count = 0
+        for row in rows:
+            if self.Execute( s, runTime, detectedBy, *row) == 1:
+                count += 1
+
+        s = """
+            delete from FunctionMetrics
+            where detectedBy=? and runTime not in
+                (select distinct runTime from FunctionMetrics
+                 where detectedBy=? order by runTime desc limit ?)
+            """
+        self.Execute( s, detectedBy, detectedBy, keepRuns)
+        self.Commit()
+
+        return count
+
+    #-----------------------------------------------------------------------------------------------
+    def LastMetricsRun( self, detectedBy):
+        """ return the time of the latest run that saved function metrics, None if there is none """
+        s = 'select max(runTime) from FunctionMetrics where detectedBy=?'
+        self.Execute( s, detectedBy)
+        data = self.GetOne()
+        return data[0] if data else None
+
+    #-----------------------------------------------------------------------------------------------
+    def FunctionMetricViolations( self, detectedBy, runTime, limits):
+        """ return the functions of a run that exceed the metric limits
+            limits: {column: limit} for the columns in eMetricRules
+            Returns: [(filename, function, violationId, description, details, lineStart), ...]
+        """
+        selects = []
+        params = []
+        for column, violationId, descText, detailsText in eMetricRules:
+            if column not in limits:
+                continue
+            selects.append( """
+                select filename, function, '%s', '%s' || function,
+                       '%s ' || %s || ' exceeds ' || ?, lineStart
+                from FunctionMetrics
+                where runTime=? and detectedBy=? and %s > ?
+                """ % (violationId, descText, detailsText, column, column))
+            params.extend( [limits[column], runTime, detectedBy, limits[column]])
+
+        violations = []
+        if selects:
+            s = ' union all '.join( selects) + ' order by 1, 6, 3'
+            if self.Execute( s, *params) == 1:
+                violations = self.GetAll()
+
+        return violations
+
+    #-----------------------------------------------------------------------------------------------
+    def CheckFunctionMetrics( self, detectedBy, runTime, limits, updateTime=None, files=None):
+        """ report the function metric violations for a run, runTime None is the latest run
+            files: only report the violations in these files, None for all of them
+            returns the number of violations reported
+        """
+        if runTime is None:
+            runTime = self.LastMetricsRun( detectedBy)
+        if updateTime is None:
+            updateTime = runTime
+
+        violations = self.FunctionMetricViolations( detectedBy, runTime, limits)
+        if files is not None:
+            violations = [v for v in violations if v[0] in files]
+        for filename, func, violationId, desc, details, line in violations:
+            self.Insert( filename, func, 'Error', violationId, desc,
+                         details, line, detectedBy, updateTime)
+        self.Commit()
+
+        return len( violations)
+
+    #-----------------------------------------------------------------------------------------------
+    def FileStates( self, detectedBy):
+        """ return {filename: (contentHash, configHash)} as of the last check of each file """
+        s = 'select filename, contentHash, configHash from FileState where detectedBy=?'
+        states = {}
+        if self.Execute( s, detectedBy) == 1:
+            for filename, contentHash, configHash in self.GetAll():
+                states[filename] = (contentHash, configHash)
+        return states
+
+    #-----------------------------------------------------------------------------------------------
+    def CarryForward( self, detectedBy, updateTime, states, checked, prefixes):
+        """ Carry the violations of the files that were not checked this run forward and record
+            the file states of the run
+            states: [(filename, contentHash, configHash), ...] for every file in the run
+            checked: the filenames whose per file checks were run
+            prefixes: the violationIds owned by the per file checks (e.g., 'Metric.')
+
+            The violations still reported by the last run of an unchanged file get lastReport set
+            to updateTime in one update, returns how many were carried forward
+        """
+        unchanged = [(i[0],) for i in states if i[0] not in checked]
+
+        self.Execute( 'create temp table if not exists Unchanged(filename text primary key)')
+        self.Execute( 'delete from Unchanged')
+        self.cursor.executemany( 'insert or ignore into Unchanged values (?)', unchanged)
+
+        owned, ownedParams = IdPrefixes( prefixes)
+        s = """
+            update Violations set lastReport=?
+            where detectedBy=? and (%s)
+            and filename in (select filename from Unchanged)
+            and lastReport = (select seenTime from FileState f
+                              where f.detectedBy=Violations.detectedBy
+                              and f.filename=Violations.filename)
+            """ % owned
+        params = [updateTime, detectedBy] + ownedParams
+        carried = 0
+        if self.Execute( s, *params) == 1:
+            carried = self.cursor.rowcount
+
+        # the checked files take their new state, the others were just seen
+        s = """
+            insert or replace into FileState
+            (detectedBy,filename,contentHash,configHash,checkTime,seenTime)
+            values (?,?,?,?,?,?)
+            """
+        for filename, contentHash, configHash in states:
+            if filename in checked:
+                self.Execute( s, detectedBy, filename, contentHash, configHash,
+                              updateTime, updateTime)
+
+        s = 'update FileState set seenTime=? where detectedBy=? and filename=?'
+        self.cursor.executemany( s, [(updateTime, detectedBy, i[0]) for i in unchanged])
+
+        # forget the files that are no longer in the project
+        self.Execute( 'delete from FileState where detectedBy=? and seenTime!=?',
+                      detectedBy, updateTime)
+        self.Commit()
+
+        return carried
+
+    #-----------------------------------------------------------------------------------------------
+    def CarryPartial( self, detectedBy, updateTime, states, prefixes, reported):
+        """ Carry the violations a partial run did not check forward, so the next full run still
+            finds them reported in the last run each file was in (see CarryForward)
+            states: [(filename, contentHash, configHash), ...] for every file in the run
+            prefixes: the violationIds owned by the per file checks
+            reported: the violationIds the partial run reported (and marked not reported)
+
+            Only the files whose state matches the one recorded are carried and have their
+            seenTime moved to updateTime, the others are checked by the next full run anyway.
+            Returns how many were carried forward
+        """
+        recorded = self.FileStates( detectedBy)
+        unchanged = [(i[0],) for i in states if recorded.get( i[0]) == (i[1], i[2])]
+
+        self.Execute( 'create temp table if not exists Unchanged(filename text primary key)')
+        self.Execute( 'delete from Unchanged')
+        self.cursor.executemany( 'insert or ignore into Unchanged values (?)', unchanged)
+
+        owned, ownedParams = IdPrefixes( prefixes)
+        skip, skipParams = IdPrefixes( reported or [])
+        if skip:
+            skip = 'and not (%s)' % skip
+        s = """
+            update Violations set lastReport=?
+            where detectedBy=? and (%s) %s
+            and filename in (select filename from Unchanged)
+            and lastReport = (select seenTime from FileState f
+                              where f.detectedBy=Violations.detectedBy
+                              and f.filename=Violations.filename)
+            """ % (owned, skip)
+        params = [updateTime, detectedBy] + ownedParams + skipParams
+        carried = 0
+        if self.Execute( s, *params) == 1:
+            carried = self.cursor.rowcount
+
+        s = 'update FileState set seenTime=? where detectedBy=? and filename=?'
+        self.cursor.executemany( s, [(updateTime, detectedBy, i[0]) for i in unchanged])
+        self.Commit()
+
+        return carried
+
+    #-----------------------------------------------------------------------------------------------
+    def ForgetFileStates( self, detectedBy, filenames):
+        """ forget the state of files so the next run checks them again (i.e., an aborted run
+            reported some of their violations but did not carry the others forward)
+        """
+        s = 'delete from FileState where detectedBy=? and filename=?'
+        self.cursor.executemany( s, [(detectedBy, i) for i in filenames])
+        self.Commit()
+
     #-----------------------------------------------------------------------------------------------
     def Unanalyzed(self, detectedBy):
         """ report the current number of unanalyzed violations reported by detectedBy """
@@ -544,6 +822,210 @@ class ViolationDb( DB_SQLite):
         self.Execute( 'vacuum')
         self.Commit()
 
+#---------------------------------------------------------------------------------------------------
+class ViolationSink:
+    """ Write behind violation inserts
+        Checkers put violations on a bounded queue (they block when it is full) and a writer thread
+        that owns its own ViolationDb connection does the inserts/updates.  The writer commits when
+        a batch is full or has been waiting too long, so the explicit Commit calls made by the
+        checkers do not force a commit.
+
+        Anything else that needs the DB in order with the inserts (e.g., MarkNotReported) is run on
+        the writer thread with Call.
+
+        A write that fails on the writer is latched, the writer stops writing (and running calls)
+        and the error is raised by the next Insert/Call and by Close.
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, projRoot, queueSize=eSinkQueueSize, batchSize=eSinkBatchSize,
+                  maxDelay=eSinkMaxDelay):
+        self.projRoot = projRoot
+        self.batchSize = batchSize
+        self.maxDelay = maxDelay
+
+        self.queue = queue.Queue( queueSize)
+
+        self.insertNew = 0
+        self.insertUpdate = 0
+        self.insertSelErr = 0
+        self.insertInErr = 0
+        self.insertUpErr = 0
+
+        self.commits = 0
+        self.error = None
+
+        self.opened = threading.Event()
+        self.writer = threading.Thread( target=self.Writer, name='ViolationSink')
+        self.writer.daemon = True
+        self.writer.start()
+        self.opened.wait()
+
+    #-----------------------------------------------------------------------------------------------
+    def CheckWriter( self, raiseError=True):
+        """ return True if the writer is running, raiseError: raise the latched write error and
+            an error when the writer thread is gone instead of returning False
+        """
+        if raiseError and self.error is not None:
+            raise self.error
+
+        if not self.writer.is_alive():
+            if raiseError:
+                raise RuntimeError( 'ViolationSink writer has stopped')
+            return False
+
+        return True
+
+    #-----------------------------------------------------------------------------------------------
+    def Put( self, item, raiseError=True):
+        """ queue an item for the writer, waiting for room only while the writer is running
+            returns False if the writer is gone (raiseError False)
+        """
+        while self.CheckWriter( raiseError):
+            try:
+                self.queue.put( item, timeout=self.maxDelay)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    #-----------------------------------------------------------------------------------------------
+    def Insert( self, fName, func, sev, violationId, desc, details, line, detectedBy, updateTime):
+        """ queue a violation insert, see ViolationDb.Insert """
+        self.Put( (eSinkInsert, (fName, func, sev, violationId, desc, details, line,
+                                 detectedBy, updateTime)))
+
+    #-----------------------------------------------------------------------------------------------
+    def Commit( self):
+        """ the writer commits on batch size/time, see Flush to wait for the writes """
+        pass
+
+    #-----------------------------------------------------------------------------------------------
+    def Call( self, func, *args):
+        """ run func( vDb, *args) on the writer thread after all queued inserts and return its
+            value, the inserts are committed first
+        """
+        return self.Run( func, args)
+
+    #-----------------------------------------------------------------------------------------------
+    def Run( self, func, args, raiseError=True):
+        """ see Call, with raiseError False a latched write error or a stopped writer returns None
+        """
+        result = []
+        done = threading.Event()
+        if not self.Put( (eSinkCall, (func, args, result, done)), raiseError):
+            return None
+
+        while not done.wait( self.maxDelay):
+            if not self.CheckWriter( raiseError):
+                return None
+
+        # an insert queued ahead of the call may have failed
+        self.CheckWriter( raiseError)
+        if result and isinstance( result[0], Exception):
+            raise result[0]
+        return result[0] if result else None
+
+    #-----------------------------------------------------------------------------------------------
+    def Flush( self):
+        """ wait until all queued violations are written and committed.  A write error is left
+            for Close to raise, Flush is called in finally blocks that must release the DB lock
+        """
+        self.Run( ViolationDb.Commit, (), False)
+
+    #-----------------------------------------------------------------------------------------------
+    def MarkNotReported( self, detectedBy, updateTime, violationIds=None):
+        return self.Call( ViolationDb.MarkNotReported, detectedBy, updateTime, violationIds)
+
+    #-----------------------------------------------------------------------------------------------
+    def Unanalyzed( self, detectedBy):
+        return self.Call( ViolationDb.Unanalyzed, detectedBy)
+
+    #-----------------------------------------------------------------------------------------------
+    def DebugState( self, state):
+        return self.Call( ViolationDb.DebugState, state)
+
+    #-----------------------------------------------------------------------------------------------
+    def Close( self):
+        """ write everything still queued, close the writer's connection and collect its stats """
+        if self.writer.is_alive():
+            self.queue.put( (eSinkStop, None))
+            self.writer.join()
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    #-----------------------------------------------------------------------------------------------
+    def Writer( self):
+        """ the writer thread, it owns the DB connection from open to close """
+        try:
+            vDb = ViolationDb( self.projRoot)
+        except Exception as e:
+            vDb = None
+            self.error = e
+        self.opened.set()
+
+        pending = 0
+        batchStart = time.time()
+        running = True
+        while running:
+            try:
+                cmd, data = self.queue.get( timeout=self.maxDelay)
+            except queue.Empty:
+                cmd, data = None, None
+
+            if cmd == eSinkStop:
+                running = False
+
+            elif cmd == eSinkInsert:
+                if vDb is not None and self.error is None:
+                    try:
+                        vDb.Insert( *data)
+                        # the delay counts from the first insert of a batch, not from the last
+                        # commit (an idle writer would commit every insert)
+                        if pending == 0:
+                            batchStart = time.time()
+                        pending += 1
+                    except Exception as e:
+                        # keep draining the queue so the checkers never block on us
+                        self.error = e
+
+            elif cmd == eSinkCall:
+                func, args, result, done = data
+                # nothing runs after a failed write (i.e., MarkNotReported would mark the
+                # violations that were not written)
+                if self.error is None:
+                    try:
+                        if pending:
+                            vDb.Commit()
+                            self.commits += 1
+                            pending = 0
+                        result.append( func( vDb, *args))
+                    except Exception as e:
+                        result.append( e)
+                done.set()
+                batchStart = time.time()
+
+            # commit on batch size or time
+            if pending and (pending >= self.batchSize or time.time() - batchStart > self.maxDelay):
+                try:
+                    vDb.Commit()
+                    self.commits += 1
+                except Exception as e:
+                    self.error = e
+                pending = 0
+                batchStart = time.time()
+
+        if vDb is not None:
+            self.insertNew = vDb.insertNew
+            self.insertUpdate = vDb.insertUpdate
+            self.insertSelErr = vDb.insertSelErr
+            self.insertInErr = vDb.insertInErr
+            self.insertUpErr = vDb.insertUpErr
+            # Close commits anything left
+            vDb.Close()
+
 #===================================================================================================
 if __name__ == '__main__':
     import ProjFile as PF
@@ -27,7 +27,7 @@ import time
 import PySide
 from PySide import QtCore
 from PySide.QtGui import QApplication, QMainWindow, QMessageBox
-from PySide.QtGui import QFileDialog
+from PySide.QtGui import QFileDialog, QInputDialog
 
 #---------------------------------------------------------------------------------------------------
 # Knowlogic Modules
@@ -36,6 +36,7 @@ from utils import DateTime, util
 
 from tools.pcLint.PcLint import PcLint
 from tools.u4c.u4c import U4c
+from tools.u4c.u4cChecks import eChecks
 
 from CrtGui import Ui_MainWindow
 from ViolationDb import ViolationDb
@@ -134,6 +135,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.lineEdit_userName.setFocus()
 
         self.runAnalysis.clicked.connect(self.RunAnalysis)
+        self.runSelectedChecks.clicked.connect(self.RunSelectedChecks)
         self.abortAnalysis.clicked.connect(self.AbortAnalysis)
         self.abortAnalysis.setEnabled( False)
         self.showPcLintLog.clicked.connect(lambda x=eLogPc,fx=self.ShowLog: fx(x))
@@ -606,10 +608,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
     #-----------------------------------------------------------------------------------------------
     # Tool Analysis
     #-----------------------------------------------------------------------------------------------
-    def RunAnalysis(self):
+    def RunAnalysis(self, selection=None):
         """ Run the analysis tools for PcLint and U4C
+            selection: the Analyze.py arguments of the checks to re-run (see GetCheckSelection)
         """
         if self.projFile:
+            selection = selection or []
+
             # --- DO THIS FIRST ---
             # TODO can be removed when project file editing is working
             self.ResetProject( self.projFile)
@@ -625,6 +630,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.CrErrPopup(msg)
 
             self.runAnalysis.setEnabled(False)
+            self.runSelectedChecks.setEnabled(False)
             self.abortAnalysis.setEnabled(True)
             self.analysisActive = True
 
@@ -637,7 +643,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
             cwd = os.getcwd()
             cmdPath = os.path.join( cwd, 'Analyze.py')
-            cmd = [sys.executable, cmdPath, self.projFileName]
+            cmd = [sys.executable, cmdPath, self.projFileName] + selection
             rootDir = self.projFile.paths[PF.ePathProject]
 
             self.analysisProcess = subprocess.Popen( cmd,
@@ -657,6 +663,38 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         else:
             self.CrErrPopup('Please select a project file.')
 
+    #-----------------------------------------------------------------------------------------------
+    def RunSelectedChecks(self):
+        """ Re-run selected Knowlogic checks against the current U4C DB """
+        if self.projFile:
+            selection = self.GetCheckSelection()
+            if selection:
+                self.RunAnalysis( selection)
+        else:
+            self.CrErrPopup('Please select a project file.')
+
+    #-----------------------------------------------------------------------------------------------
+    def GetCheckSelection(self):
+        """ Ask for the Knowlogic checks and/or violationId prefixes to run
+            returns the Analyze.py arguments for them, None if the user cancelled
+        """
+        msg  = 'Knowlogic checks (%s)\n' % ', '.join( eChecks)
+        msg += 'and/or violationId prefixes (e.g., Naming.Var) separated by commas'
+        text, ok = QInputDialog.getText( self, 'Select Checks', msg)
+        if not ok:
+            return None
+
+        items = [i.strip() for i in text.split(',') if i.strip()]
+        checks = [i for i in items if i in eChecks]
+        violationIds = [i for i in items if i not in eChecks]
+
+        selection = []
+        if checks:
+            selection += ['-checks', ','.join( checks)]
+        if violationIds:
+            selection += ['-ids', ','.join( violationIds)]
+        return selection
+
     #-----------------------------------------------------------------------------------------------
     def AnalysisUpdate( self):
         #for line in self.analysisProcess.stdout:
@@ -693,6 +731,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.analysisActive = False
 
             self.runAnalysis.setEnabled(True)
+            self.runSelectedChecks.setEnabled(True)
             self.abortAnalysis.setEnabled(False)
 
     #-----------------------------------------------------------------------------------------------
@@ -1098,27 +1137,26 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             filename = self.v.filename
             filename = filename.replace('(W)', '').strip()
             fpfn = self.projFile.FullPathName( filename)
-            if fpfn:
-                if len(fpfn) == 1:
-                    viewerCommand = self.projFile.paths[PF.ePathViewer]
+            if len(fpfn) == 1:
+                viewerCommand = self.projFile.paths[PF.ePathViewer]
 
-                    viewerCommand = viewerCommand.replace( '<fullPathFileName>', '"%s"' % fpfn[0])
+                viewerCommand = viewerCommand.replace( '<fullPathFileName>', '"%s"' % fpfn[0])
 
-                    linenumber = self.v.lineNumber
-                    if linenumber >= 0:
-                        viewerCommand = viewerCommand.replace('<lineNumber>', str(linenumber))
-                    else:
-                        viewerCommand = viewerCommand.replace('<lineNumber>', '')
+                linenumber = self.v.lineNumber
+                if linenumber >= 0:
+                    viewerCommand = viewerCommand.replace('<lineNumber>', str(linenumber))
+                else:
+                    viewerCommand = viewerCommand.replace('<lineNumber>', '')
 
-                    subprocess.Popen(viewerCommand)
-            else:
-                if filename:
-                    if fpfn:
-                        theFpfn = '\n'.join(fpfn)
-                    else:
-                        theFpfn = "No file found"
-                    msg = 'Ambiguous filename (%s)\n%s' % (filename, theFpfn)
-                    self.CrErrPopup( msg)
+                subprocess.Popen(viewerCommand)
+            elif filename:
+                # none or more than one file by that name
+                if fpfn:
+                    theFpfn = '\n'.join(fpfn)
+                else:
+                    theFpfn = "No file found"
+                msg = 'Ambiguous filename (%s)\n%s' % (filename, theFpfn)
+                self.CrErrPopup( msg)
         else:
             msg = 'No matching violations.'
             self.CrErrPopup( msg)
@@ -0,0 +1,45 @@
+"""
+Analyze Counts Tests
+The U4c settings are recorded (and the next run is incremental) when the und analysis finished
+without errors, warnings do not count, see u4c.AnalyzeCounts and U4c.RecordSettings.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import os
+import sys
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+# the fake understand module stands in for the licensed one, see tools/u4c/u4cBench.py
+eRoot = os.path.dirname( os.path.dirname( os.path.abspath( __file__)))
+sys.path.insert( 0, os.path.join( eRoot, 'tools', 'u4c', 'fake'))
+sys.path.insert( 1, eRoot)
+os.environ.setdefault( 'PYTHONPATH', '')
+
+from tools.u4c.u4c import AnalyzeCounts
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def test_clean():
+    assert AnalyzeCounts( 'Analyze Completed (Errors:0 Warnings:0)') == (0, 0)
+
+#---------------------------------------------------------------------------------------------------
+def test_warnings():
+    assert AnalyzeCounts( 'Analyze Completed (Errors:0 Warnings:127)') == (0, 127)
+
+#---------------------------------------------------------------------------------------------------
+def test_errors():
+    assert AnalyzeCounts( 'Analyze Completed (Errors:3 Warnings:12)') == (3, 12)
+
+#---------------------------------------------------------------------------------------------------
+def test_not_finished():
+    assert AnalyzeCounts( '') is None
+    assert AnalyzeCounts( 'Analyze') is None
+    assert AnalyzeCounts( 'File: main.c has been added.') is None
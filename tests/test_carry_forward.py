@@ -0,0 +1,143 @@
+"""
+Carry Forward Tests
+The per file violations of the files a run does not check are carried forward (see
+ViolationDb.CarryForward), these tests run a full run, then a partial or aborted one and then a full
+run again and check nothing still reported is marked not reported.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import datetime
+import os
+import sys
+import time
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__))))
+import ViolationDb as VDB
+
+# the DB layer times its queries with time.clock, gone since Python 3.8
+if not hasattr( time, 'clock'):
+    time.clock = time.perf_counter
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eDetectId = 'Knowlogic'
+eFileCheckIds = ('Metric.', 'FileFmt', 'FuncHdr', 'Misc.')
+
+eConfig = 'config'
+
+# filename -> content hash
+eFiles = {'a.c': 'a1', 'b.c': 'b1'}
+
+# filename -> the per file violations found in it
+eViolations = {
+    'a.c': (('func', 'Metric.Cyclomatic', 'Too complex'), ('N/A', 'FileFmt', 'Bad header')),
+    'b.c': (('func', 'Misc.LineLength', 'Too long'),),
+    }
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def RunTime( n):
+    return datetime.datetime( 2024, 1, 1) + datetime.timedelta( hours=n)
+
+#---------------------------------------------------------------------------------------------------
+def Report( vDb, updateTime, files, prefixes=eFileCheckIds):
+    for fn in files:
+        for func, violationId, desc in eViolations[fn]:
+            if [p for p in prefixes if violationId.startswith( p)]:
+                vDb.Insert( fn, func, 'Error', violationId, desc, '', 1, eDetectId, updateTime)
+    vDb.Commit()
+
+#---------------------------------------------------------------------------------------------------
+def FullRun( vDb, updateTime):
+    """ check the files that changed, carry the others forward (see U4c.RunChecks) """
+    states = [(fn, eFiles[fn], eConfig) for fn in eFiles]
+    recorded = vDb.FileStates( eDetectId)
+    checked = set( [fn for fn, content, config in states if recorded.get( fn) != (content, config)])
+
+    Report( vDb, updateTime, checked)
+    vDb.CarryForward( eDetectId, updateTime, states, checked, eFileCheckIds)
+    return vDb.MarkNotReported( eDetectId, updateTime)
+
+#---------------------------------------------------------------------------------------------------
+def PartialRun( vDb, updateTime, violationIds, abort=False):
+    """ check every file for some violationIds (see U4c.SelectChecks) """
+    states = [(fn, eFiles[fn], eConfig) for fn in eFiles]
+    Report( vDb, updateTime, eFiles, violationIds)
+    if abort:
+        vDb.ForgetFileStates( eDetectId, list( eFiles))
+        return 0
+
+    vDb.CarryPartial( eDetectId, updateTime, states, eFileCheckIds, violationIds)
+    return vDb.MarkNotReported( eDetectId, updateTime, violationIds)
+
+#---------------------------------------------------------------------------------------------------
+def Reported( vDb, updateTime):
+    vDb.Execute( 'select filename, violationId from Violations where lastReport=?', updateTime)
+    return sorted( vDb.GetAll())
+
+#---------------------------------------------------------------------------------------------------
+def AllViolations():
+    return sorted( [(fn, v[1]) for fn in eViolations for v in eViolations[fn]])
+
+#---------------------------------------------------------------------------------------------------
+def test_full_partial_full( tmp_path):
+    vDb = VDB.ViolationDb( str( tmp_path))
+    assert FullRun( vDb, RunTime( 1)) == 0
+    assert Reported( vDb, RunTime( 1)) == AllViolations()
+
+    assert PartialRun( vDb, RunTime( 2), ['Metric.']) == 0
+    assert Reported( vDb, RunTime( 2)) == AllViolations()
+
+    # nothing changed, every violation is carried forward
+    assert FullRun( vDb, RunTime( 3)) == 0
+    assert Reported( vDb, RunTime( 3)) == AllViolations()
+    vDb.Close()
+
+#---------------------------------------------------------------------------------------------------
+def test_partial_not_reported_stays( tmp_path):
+    vDb = VDB.ViolationDb( str( tmp_path))
+    FullRun( vDb, RunTime( 1))
+
+    # the partial run no longer finds the metric violation, the full run must not bring it back
+    saved = eViolations['a.c']
+    eViolations['a.c'] = saved[1:]
+    try:
+        assert PartialRun( vDb, RunTime( 2), ['Metric.']) == 1
+        assert FullRun( vDb, RunTime( 3)) == 0
+    finally:
+        eViolations['a.c'] = saved
+
+    expected = [i for i in AllViolations() if i != ('a.c', 'Metric.Cyclomatic')]
+    assert Reported( vDb, RunTime( 3)) == expected
+    vDb.Close()
+
+#---------------------------------------------------------------------------------------------------
+def test_full_aborted_full( tmp_path):
+    vDb = VDB.ViolationDb( str( tmp_path))
+    FullRun( vDb, RunTime( 1))
+
+    PartialRun( vDb, RunTime( 2), ['Metric.', 'Misc.'], abort=True)
+
+    assert FullRun( vDb, RunTime( 3)) == 0
+    assert Reported( vDb, RunTime( 3)) == AllViolations()
+    vDb.Close()
+
+#---------------------------------------------------------------------------------------------------
+def test_partial_prefix_is_literal( tmp_path):
+    vDb = VDB.ViolationDb( str( tmp_path))
+    FullRun( vDb, RunTime( 1))
+
+    # a '_' in a selected id is not a wildcard, the FileFmt violation was not checked
+    assert PartialRun( vDb, RunTime( 2), ['FileFm_']) == 0
+    assert Reported( vDb, RunTime( 2)) == AllViolations()
+    vDb.Close()
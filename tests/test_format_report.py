@@ -0,0 +1,96 @@
+"""
+Format Check Report Tests
+The MissingItem and Seq violations FormatChecker.ReportErrors reports, pinned to what the checker
+reported before the items were compiled into a template and an automaton.  Each case is checked with
+both engines.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import datetime
+import os
+import sys
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+import pytest
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+sys.path.insert( 0, os.path.dirname( os.path.dirname( os.path.abspath( __file__))))
+import FormatChecker as FC
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eUpdateTime = datetime.datetime( 2024, 1, 1)
+eEngines = (FC.eEngineScan, FC.eEngineAutomaton)
+
+eMissing = 'FileFmt.MissingItem'
+eSeq = 'FileFmt.Seq'
+
+# name -> (description, lines, the (severity, violationId, desc, details, line) reported)
+eCases = {
+    # the same desc twice, each is matched to the first of its lines still left
+    'duplicateDesc': (
+        'Author\nRevision\nAuthor\nNotes',
+        ['Revision 1', 'Author: a', 'Notes', 'Author: b'],
+        [('Warning', eSeq, 'File Format Sequence Error\nAuthor[Item 0]',
+          'Author[Item 0]\nexpected position 0/4 found in position 1/4 (line 2)', 2),
+         ('Warning', eSeq, 'File Format Sequence Error\nAuthor[Item 2]',
+          'Author[Item 2]\nexpected position 0/4 found in position 1/4 (line 4)', 4)]),
+
+    'swappedItems': (
+        'File: <TheFileName>\nDescription: <TheDescription>\nAuthor: .*\nRevision',
+        ['File: a.c', 'Author: me', 'Description: x', 'Revision 2'],
+        [('Warning', eSeq, 'File Format Sequence Error\nDescription: <TheDescription>[Item 1]',
+          'Description: <TheDescription>[Item 1]\n'
+          'expected position 1/4 found in position 2/4 (line 3)', 3)]),
+
+    # a :D: item is not looked for when the item it depends on is missing
+    'dependentMissing': (
+        'Function: <TheFunctionName>\nDescription:\nAuthor :D:\nReturns',
+        ['Function: Foo', 'Returns: none', 'Author: me'],
+        [('Error', eMissing, 'File Format\nDescription:[Item 1]\nmissing in f.c',
+          'Description:[Item 1]\nnot found in 3 possible lines', -1),
+         ('Error', eMissing, 'File Format\nAuthor :D:[Item 2]\nmissing in f.c',
+          'Author :D:[Item 2]\nnot found in 3 possible lines', -1)]),
+
+    'dependentFound': (
+        'Function: <TheFunctionName>\nDescription:\nAuthor :D:\nReturns',
+        ['Function: Foo', 'Returns: none', 'Description: d', 'Author: me'],
+        [('Warning', eSeq, 'File Format Sequence Error\nDescription:[Item 1]',
+          'Description:[Item 1]\nexpected position 1/4 found in position 2/4 (line 3)', 3),
+         ('Warning', eSeq, 'File Format Sequence Error\nAuthor :D:[Item 2]',
+          'Author :D:[Item 2]\nexpected position 2/4 found in position 3/4 (line 4)', 4)]),
+    }
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class Collector:
+    """ Collect the violations reported, same interface as ViolationDb.Insert """
+    def __init__( self):
+        self.violations = []
+
+    def Insert( self, fName, func, sev, violationId, desc, details, line, detectedBy, updateTime):
+        self.violations.append( (sev, violationId, desc, details, line))
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+@pytest.mark.parametrize( 'engine', eEngines)
+@pytest.mark.parametrize( 'name', sorted( eCases))
+def test_ReportErrors( name, engine):
+    desc, lines, expected = eCases[name]
+
+    fc = FC.FormatChecker( 'test', eUpdateTime, desc, desc, engine=engine)
+    for lx, line in enumerate( lines):
+        fc.CheckLine( lx, line)
+    fc.FinishBuffer()
+
+    db = Collector()
+    fc.ReportErrors( db, 'f.c', -1, 'File Format', 'f.c', 'FileFmt')
+    assert db.violations == expected
@@ -134,8 +134,8 @@ class ToolManager:
         """ Load the DB with violations
         """
         if not self.abortRequest:
-            # create a connections to the Violation DB
-            self.vDb = VDB.ViolationDb( self.projFile.paths[PF.ePathProject])
+            # violations are written behind by the sink's thread on its own DB connection
+            self.vDb = VDB.ViolationSink( self.projFile.paths[PF.ePathProject])
             self.vDb.DebugState( 1)
 
             try:
@@ -145,11 +145,11 @@ class ToolManager:
                 self.vDb.Close()
                 raise
 
-        self.GetUpdateStats()
-
-        # we have to close the DB in the thread it was opened in
+        # finish the writes, the stats are final once the sink is closed
         self.vDb.Close()
 
+        self.GetUpdateStats()
+
     #-----------------------------------------------------------------------------------------------
     def Log(self, msg):
         if self.log:
@@ -35,6 +35,7 @@ eToolRoot = r'tool\pclint'
 
 eBatchName = r'runLint.bat'
 eSrcFilesName = r'srcFiles.lnt'
+eExcludedName = r'excluded.txt'
 eResultFile = r'results\result.csv'
 
 ePcLintStdOptions = r"""
@@ -130,6 +131,8 @@ class PcLintSetup( ToolSetup):
         srcFileData = ['"%s"' % i for i in srcCodeFiles]
         self.CreateFile( 'srcFiles.lnt', '\n'.join(srcFileData))
         self.CreateFile( 'options.lnt', options)
+        self.CreateFile( eExcludedName, '\n'.join( self.projFile.GetSrcSkipReport(
+            ['.c','.cpp'], excludeDirs, excludeFiles)))
 
         self.fileCount = len( srcCodeFiles)
 
@@ -401,7 +404,8 @@ class PcLint( ToolManager):
         except:
             raise
         finally:
-            self.vDb.Commit()
+            # all the writes must be done before someone else can have the DB
+            self.vDb.Flush()
             self.projFile.dbLock.release()
             pass
 
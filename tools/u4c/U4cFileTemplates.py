@@ -26,6 +26,17 @@ eU4cBatTemplate = r"""
 "%s" process "%s"
 """
 
+# Params
+# 1. und command - full path to und command
+# 2. DB Name
+# 3. Name of command file to process
+eU4cIncBatTemplate = r"""
+@echo off
+::- Update the U4c DB for a particular project
+::- und -db Db.udb process CmdFile.txt
+"%s" -db "%s" process "%s"
+"""
+
 # Params
 # 1. DB Name
 # 2. Name of file holding Src Files to Add
@@ -48,6 +59,20 @@ analyze
 metrics
 """
 
+# Params
+# 1. remove/add commands for the files that left/joined the project as a set of lines
+eCmdIncTemplate = r"""
+# U4C command file
+# Updates the existing DB, the settings are unchanged since it was created
+%s
+
+# update database, only files changed since the last analyze are parsed
+analyze -changed
+
+# generate metrics
+metrics
+"""
+
 #---------------------------------------------------------------------------------------------------
 # Functions
 #---------------------------------------------------------------------------------------------------
@@ -0,0 +1,318 @@
+"""
+Fake Understand Module
+This file replays an Understand DB from a fixture so U4c can be run (and timed) without a licensed
+Understand install.  It implements the part of the understand API that U4c uses.
+
+Put this directory ahead of the real module on the path (i.e., sys.path.insert(0, <this dir>)).
+
+The fixture is written by u4cRecorder.py from a real DB, or by u4cBench.py for a synthetic
+project.  open(name) reads the fixture named by the U4C_FIXTURE environment variable, or when that
+is not set the file name + eFixtureExt (i.e., db.udb.fixture).
+
+Fixture layout (pickled dictionary):
+    version: the Understand build the fixture was recorded from
+    ents: [entity dictionary, ...] the list index is the entity id
+        name, longname, kindname, type, parent (id or None),
+        refs: [(kindname, file id, line, ent id), ...]
+        lexer: [(token, text, lineBegin, lineEnd), ...] or None
+        metrics: {metric: value}
+        contents, comments
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import builtins
+import os
+import pickle
+import re
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eFixtureEnv = 'U4C_FIXTURE'
+eFixtureExt = '.fixture'
+
+eFakeVersion = 'fixture'
+
+# the build of the fixture last opened
+openVersion = eFakeVersion
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def FixtureName( name):
+    """ the fixture that replays the DB name """
+    return os.environ.get( eFixtureEnv) or name + eFixtureExt
+
+#---------------------------------------------------------------------------------------------------
+def open( name):
+    """ open the fixture for DB name """
+    global openVersion
+
+    fixture = FixtureName( name)
+    try:
+        # open() is the understand API name here
+        f = builtins.open( fixture, 'rb')
+    except IOError as e:
+        raise UnderstandError( 'DBUnableOpen %s: %s' % (fixture, e))
+
+    try:
+        data = pickle.load( f)
+    except Exception as e:
+        raise UnderstandError( 'DBCorrupt %s: %s' % (fixture, e))
+    finally:
+        f.close()
+
+    openVersion = data.get( 'version', eFakeVersion)
+    return Db( data)
+
+#---------------------------------------------------------------------------------------------------
+def version():
+    return openVersion
+
+#---------------------------------------------------------------------------------------------------
+def KindMatch( kindname, kindstring):
+    """ does an entity/ref kind name match an Understand kind filter
+        kindstring is a comma separated list of alternatives, each a space separated list of words
+        that must all be in the kind name ('~word' must not be)
+    """
+    if not kindstring:
+        return True
+
+    words = kindname.lower().split()
+    for alt in kindstring.lower().split( ','):
+        match = True
+        for w in alt.split():
+            if w.startswith( '~'):
+                match = w[1:] not in words
+            else:
+                match = w in words
+            if not match:
+                break
+        if match:
+            return True
+
+    return False
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class UnderstandError( Exception):
+    pass
+
+#---------------------------------------------------------------------------------------------------
+class Db:
+    """ The replayed DB """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, data):
+        self.version = data.get( 'version', eFakeVersion)
+        self.entData = data['ents']
+        self.entObjs = [None] * len( self.entData)
+
+        # kindstring -> ent ids, every lookup is a scan so keep the scans short
+        self.kindIds = {}
+
+    #-----------------------------------------------------------------------------------------------
+    def Ent( self, ex):
+        """ return the Ent for an id, None for None """
+        if ex is None:
+            return None
+        ent = self.entObjs[ex]
+        if ent is None:
+            ent = Ent( self, ex)
+            self.entObjs[ex] = ent
+        return ent
+
+    #-----------------------------------------------------------------------------------------------
+    def KindIds( self, kindstring):
+        ids = self.kindIds.get( kindstring)
+        if ids is None:
+            ids = [ex for ex, e in enumerate( self.entData)
+                   if KindMatch( e['kindname'], kindstring)]
+            self.kindIds[kindstring] = ids
+        return ids
+
+    #-----------------------------------------------------------------------------------------------
+    def ents( self, kindstring=''):
+        return [self.Ent( ex) for ex in self.KindIds( kindstring)]
+
+    #-----------------------------------------------------------------------------------------------
+    def lookup( self, name, kindstring=''):
+        """ the entities whose name matches name (a regular expression) """
+        if isinstance( name, str):
+            name = re.compile( name)
+        return [self.Ent( ex) for ex in self.KindIds( kindstring)
+                if name.search( self.entData[ex]['name'])]
+
+    #-----------------------------------------------------------------------------------------------
+    def close( self):
+        pass
+
+#---------------------------------------------------------------------------------------------------
+class Ent:
+    """ A replayed entity """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, db, ex):
+        self.db = db
+        self.ex = ex
+        self.data = db.entData[ex]
+
+    #-----------------------------------------------------------------------------------------------
+    def __repr__( self):
+        return self.data['longname']
+
+    #-----------------------------------------------------------------------------------------------
+    def id( self):
+        return self.ex
+
+    #-----------------------------------------------------------------------------------------------
+    def name( self):
+        return self.data['name']
+
+    #-----------------------------------------------------------------------------------------------
+    def longname( self):
+        return self.data['longname']
+
+    #-----------------------------------------------------------------------------------------------
+    def kindname( self):
+        return self.data['kindname']
+
+    #-----------------------------------------------------------------------------------------------
+    def type( self):
+        return self.data.get( 'type')
+
+    #-----------------------------------------------------------------------------------------------
+    def parent( self):
+        return self.db.Ent( self.data.get( 'parent'))
+
+    #-----------------------------------------------------------------------------------------------
+    def refs( self, refkindstring='', entkindstring=''):
+        refs = []
+        for kindname, fileEx, line, entEx in self.data.get( 'refs', []):
+            if KindMatch( kindname, refkindstring):
+                ref = Ref( self.db, kindname, fileEx, line, entEx)
+                if not entkindstring or KindMatch( ref.ent().kindname(), entkindstring):
+                    refs.append( ref)
+        return refs
+
+    #-----------------------------------------------------------------------------------------------
+    def ents( self, refkindstring='', entkindstring=''):
+        """ the distinct entities referenced by this entity """
+        ents = []
+        seen = set()
+        for ref in self.refs( refkindstring, entkindstring):
+            ent = ref.ent()
+            if ent.ex not in seen:
+                seen.add( ent.ex)
+                ents.append( ent)
+        return ents
+
+    #-----------------------------------------------------------------------------------------------
+    def lexer( self, *args):
+        tokens = self.data.get( 'lexer')
+        if tokens is None:
+            raise UnderstandError( 'NoLexer %s' % self.longname())
+        return Lexer( tokens)
+
+    #-----------------------------------------------------------------------------------------------
+    def metric( self, metrics):
+        values = self.data.get( 'metrics', {})
+        if isinstance( metrics, str):
+            return values.get( metrics)
+        return dict( [(m, values.get( m)) for m in metrics])
+
+    #-----------------------------------------------------------------------------------------------
+    def metrics( self):
+        return list( self.data.get( 'metrics', {}))
+
+    #-----------------------------------------------------------------------------------------------
+    def contents( self):
+        return self.data.get( 'contents', '')
+
+    #-----------------------------------------------------------------------------------------------
+    def comments( self, *args):
+        return self.data.get( 'comments', '')
+
+#---------------------------------------------------------------------------------------------------
+class Ref:
+    """ A replayed reference """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, db, kindname, fileEx, line, entEx):
+        self.db = db
+        self.kind = kindname
+        self.fileEx = fileEx
+        self.lineNumber = line
+        self.entEx = entEx
+
+    #-----------------------------------------------------------------------------------------------
+    def kindname( self):
+        return self.kind
+
+    #-----------------------------------------------------------------------------------------------
+    def file( self):
+        return self.db.Ent( self.fileEx)
+
+    #-----------------------------------------------------------------------------------------------
+    def line( self):
+        return self.lineNumber
+
+    #-----------------------------------------------------------------------------------------------
+    def column( self):
+        return 0
+
+    #-----------------------------------------------------------------------------------------------
+    def ent( self):
+        return self.db.Ent( self.entEx)
+
+#---------------------------------------------------------------------------------------------------
+class Lexer:
+    """ A replayed lexer, iterating it gives the lexemes in file order """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, tokens):
+        self.tokens = tokens
+
+    #-----------------------------------------------------------------------------------------------
+    def __iter__( self):
+        for t in self.tokens:
+            yield Lexeme( *t)
+
+    #-----------------------------------------------------------------------------------------------
+    def lexemes( self, start=None, end=None):
+        return [Lexeme( *t) for t in self.tokens
+                if (start is None or t[2] >= start) and (end is None or t[3] <= end)]
+
+#---------------------------------------------------------------------------------------------------
+class Lexeme:
+    """ A replayed lexeme """
+    __slots__ = ('tok', 'txt', 'lineBegin', 'lineEnd')
+
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, token, text, lineBegin, lineEnd):
+        self.tok = token
+        self.txt = text
+        self.lineBegin = lineBegin
+        self.lineEnd = lineEnd
+
+    #-----------------------------------------------------------------------------------------------
+    def token( self):
+        return self.tok
+
+    #-----------------------------------------------------------------------------------------------
+    def text( self):
+        return self.txt
+
+    #-----------------------------------------------------------------------------------------------
+    def line_begin( self):
+        return self.lineBegin
+
+    #-----------------------------------------------------------------------------------------------
+    def line_end( self):
+        return self.lineEnd
@@ -13,11 +13,12 @@ enclosing the token in <> brackets and providing a regular expression.
 #---------------------------------------------------------------------------------------------------
 from collections import OrderedDict
 
-import copy
 import datetime
+import hashlib
 import os
 import re
 import subprocess
+import time
 
 #---------------------------------------------------------------------------------------------------
 # Third Party Modules
@@ -26,13 +27,23 @@ import subprocess
 #---------------------------------------------------------------------------------------------------
 # Knowlogic Modules
 #---------------------------------------------------------------------------------------------------
-from FormatChecker import FormatChecker
 #print('%s : PYTHONPATH=%s' % (__name__, os.environ['PYTHONPATH']))
 from tools.u4c import U4cFileTemplates
 from tools.u4c import u4cDbWrapper as udb
+from tools.u4c.u4cChecks import FileFacts, NameFacts, TypeFacts, CheckRunner
+from tools.u4c.u4cChecks import CheckFileWorker, CheckNamesWorker, SaveFacts, ReadLineN
+from tools.u4c.u4cChecks import CheckConfigHash, SelectChecks, eFactsName, eNameChunk, eNamingKeys
+from tools.u4c.u4cChecks import eFileCheckIds, eCheckMetrics, eCheckFormats, eCheckNaming
+from tools.u4c.u4cChecks import eCheckRestrictions, eCheckBaseTypes, eFuncMetricLimits
+from tools.u4c.u4cChecks import eToolRoot, eDbDetectId
+from tools.u4c.u4cCache import ContentHash
+from tools.u4c.u4cMetrics import eMetricsName, eFuncMetrics
+from tools.u4c.u4cTypes import TypeResolver
+from utils.SrcCache import srcCache
 from tools.ToolMgr import ToolSetup, ToolManager
 
 import ProjFile as PF
+import ViolationDb as VDB
 
 try:
     import wingdbstub
@@ -42,20 +53,35 @@ except:
 #---------------------------------------------------------------------------------------------------
 # Data
 #---------------------------------------------------------------------------------------------------
-eDbDetectId = 'Knowlogic'
-
-eToolRoot = r'tool\u4c'
 eDbName = 'db.udb'
 
 eBatchName = r'runU4c.bat'
 eU4cCmdFileName = r'u4cCmds.txt'
 eSrcFilesName = r'srcFiles.lnt'
+eExcludedName = r'excluded.txt'
+
+# incremental DB update: the files to add/remove and the hash of the settings the DB was built with
+eSrcAddName = r'srcFilesAdd.lnt'
+eSrcRemoveName = r'srcFilesRemove.lnt'
+eSettingsName = r'settings.md5'
+eSettingsNewName = r'settings.new'
 
 eResultFile = r'results\result.csv'
 
+# the last line und prints for an analysis, e.g. Analyze Completed (Errors:0 Warnings:12)
+eAnalyzeDoneRe = re.compile( r'Analyze Completed \(Errors:\s*(\d+)\s+Warnings:\s*(\d+)\)')
+
 #---------------------------------------------------------------------------------------------------
 # Functions
 #---------------------------------------------------------------------------------------------------
+def AnalyzeCounts( line):
+    """ return the (errors, warnings) counts of the und analyze completed line, None when line
+        is not one (i.e., the analysis did not finish)
+    """
+    m = eAnalyzeDoneRe.search( line)
+    if m is None:
+        return None
+    return int( m.group(1)), int( m.group(2))
 
 #---------------------------------------------------------------------------------------------------
 # Classes
@@ -70,10 +96,13 @@ class U4cSetup( ToolSetup):
 
         ToolSetup.__init__( self, self.projRoot)
         self.projToolRoot = os.path.join( self.projRoot, eToolRoot)
+        self.incremental = False
 
     #-----------------------------------------------------------------------------------------------
     def CreateProject( self):
         """ Create all of the files needed for this project
+            When the DB exists and was built with the same settings it is updated in place (only
+            added/removed/changed files), otherwise it is created from scratch.
         """
         batTmpl = U4cFileTemplates.eU4cBatTemplate
         optTmpl = U4cFileTemplates.eCmdTemplate
@@ -91,15 +120,52 @@ class U4cSetup( ToolSetup):
         options['C++Includes'] = incDirs + self.projFile.paths['IncludeDirs']
         options['C++Macros'] = self.projFile.defines
         options['C++Undefined'] = self.projFile.undefines
+        # the metrics export the U4c load reads the function metrics from
+        options['MetricFileName'] = [os.path.join( self.projToolRoot, eMetricsName)]
+        options['MetricMetrics'] = eFuncMetrics
+        options['MetricShowDeclaredInFile'] = ['on']
+        options['MetricDeclaredInFileDisplayMode'] = ['FullPath']
         options = self.ConvertOptions( options)
 
+        dbName = os.path.join( self.projToolRoot, eDbName)
+        settings = '\n'.join( [toolExe] + options)
+        settingsHash = hashlib.md5( settings.encode( 'utf-8')).hexdigest()
+        self.incremental = (os.path.isfile( dbName) and
+                            self.ReadFile( eSettingsName) == settingsHash)
+
         # create the required files
-        self.CreateFile( eBatchName, batTmpl % (toolExe, cmdFilePath))
-        cmdContents = optTmpl % (os.path.join( self.projToolRoot, eDbName),
-                                 os.path.join( self.projToolRoot, eSrcFilesName),
-                                 '\n'.join(options))
+        if self.incremental:
+            oldFiles = [i for i in self.ReadFile( eSrcFilesName).split('\n') if i]
+            oldSet = set( oldFiles)
+            newSet = set( srcFiles)
+            added = [i for i in srcFiles if i not in oldSet]
+            removed = [i for i in oldFiles if i not in newSet]
+
+            cmds = []
+            if removed:
+                cmds.append( 'remove @"%s"' % os.path.join( self.projToolRoot, eSrcRemoveName))
+            if added:
+                cmds.append( 'add @"%s"' % os.path.join( self.projToolRoot, eSrcAddName))
+
+            batContents = U4cFileTemplates.eU4cIncBatTemplate % (toolExe, dbName, cmdFilePath)
+            cmdContents = U4cFileTemplates.eCmdIncTemplate % '\n'.join( cmds)
+            self.CreateFile( eSrcAddName, '\n'.join(added))
+            self.CreateFile( eSrcRemoveName, '\n'.join(removed))
+        else:
+            batContents = batTmpl % (toolExe, cmdFilePath)
+            cmdContents = optTmpl % (dbName,
+                                     os.path.join( self.projToolRoot, eSrcFilesName),
+                                     '\n'.join(options))
+            # the DB gets new settings, they are recorded once it has been built
+            for name in (eSrcAddName, eSrcRemoveName, eSettingsName):
+                self.RemoveFile( name)
+            self.CreateFile( eSettingsNewName, settingsHash)
+
+        self.CreateFile( eBatchName, batContents)
         self.CreateFile( eU4cCmdFileName, cmdContents)
         self.CreateFile( eSrcFilesName, '\n'.join(srcFiles))
+        self.CreateFile( eExcludedName, '\n'.join( self.projFile.GetSrcSkipReport(
+            ['.h','.c','.cpp','.hpp'], excludeDirs, excludeFiles)))
 
         self.fileCount = len( srcFiles)
 
@@ -131,6 +197,23 @@ class U4cSetup( ToolSetup):
         fullPath = os.path.join( self.projToolRoot, name)
         ToolSetup.CreateFile( self, fullPath, content)
 
+    #-----------------------------------------------------------------------------------------------
+    def ReadFile( self, name):
+        """ return the contents of a file in the tool directory, '' if there is none """
+        fullPath = os.path.join( self.projToolRoot, name)
+        content = ''
+        if os.path.isfile( fullPath):
+            f = open( fullPath, 'r')
+            content = f.read().strip()
+            f.close()
+        return content
+
+    #-----------------------------------------------------------------------------------------------
+    def RemoveFile( self, name):
+        fullPath = os.path.join( self.projToolRoot, name)
+        if os.path.isfile( fullPath):
+            os.remove( fullPath)
+
     #-----------------------------------------------------------------------------------------------
     def FileCount( self):
         f = open( os.path.join( self.projToolRoot, 'srcFiles.lnt'), 'r')
@@ -154,8 +237,23 @@ class U4c( ToolManager):
 
         # this holds all the file/function info data
         self.fileFuncInfo = {}
-        # this holds keyword data info by file
-        self.fileKeywordData = {}
+
+        # the facts extracted from the Understand DB
+        self.fileFacts = []
+        self.nameFacts = []
+
+        # the files whose per file checks run this time (i.e., changed since they were checked)
+        self.checkFacts = []
+
+        # the Understand DB settings/headers the facts were extracted with, see UdbStamp
+        self.udbStamp = ''
+
+        # the checks to run and the violationIds they report, None for all, see SelectChecks
+        self.checks = None
+        self.violationIds = None
+
+        # seconds spent in each task of the last load
+        self.taskTimes = OrderedDict()
 
     #-----------------------------------------------------------------------------------------------
     def IsReadyToAnalyze(self, kill=False):
@@ -164,9 +262,14 @@ class U4c( ToolManager):
         """
         # TODO: if U4C fixes the db open we can use that to find out if some one has the Db open
         #       right now we will try to delete it, and hopefully get an exception
+        #       an incremental update keeps the DB so just see if we can open it for writing
         try:
             if os.path.isfile( self.dbName):
-                os.remove( self.dbName)
+                if self.IsIncremental():
+                    f = open( self.dbName, 'r+b')
+                    f.close()
+                else:
+                    os.remove( self.dbName)
             status = True
         except OSError:
             status = False
@@ -175,6 +278,46 @@ class U4c( ToolManager):
 
         return status
 
+    #-----------------------------------------------------------------------------------------------
+    def IsIncremental(self):
+        """ is the tool run an update of the existing DB (see U4cSetup.CreateProject) """
+        return os.path.isfile( os.path.join( self.projToolRoot, eSrcAddName))
+
+    #-----------------------------------------------------------------------------------------------
+    def RecordSettings(self, parseOk):
+        """ A DB built with new settings is only trusted for updates once it parsed without
+            error, a DB that fails to parse is rebuilt on the next run
+        """
+        settingsName = os.path.join( self.projToolRoot, eSettingsName)
+        settingsNewName = os.path.join( self.projToolRoot, eSettingsNewName)
+        if parseOk:
+            if os.path.isfile( settingsNewName):
+                os.replace( settingsNewName, settingsName)
+        else:
+            for name in (settingsName, settingsNewName):
+                if os.path.isfile( name):
+                    os.remove( name)
+
+    #-----------------------------------------------------------------------------------------------
+    def UdbStamp(self, srcFiles):
+        """ return a hash of what the Understand analysis of a file depends on besides the file
+            itself: the settings the DB was built with (settings.new until the build is recorded,
+            see RecordSettings) and the contents of the project headers
+        """
+        settings = ''
+        for name in (eSettingsNewName, eSettingsName):
+            fullPath = os.path.join( self.projToolRoot, name)
+            if os.path.isfile( fullPath):
+                f = open( fullPath, 'r')
+                settings = f.read().strip()
+                f.close()
+                break
+
+        headers = sorted( [(i, ContentHash( i)) for i in srcFiles
+                           if os.path.splitext( i)[1] in ('.h', '.hpp')])
+        stamp = repr( [settings, headers])
+        return hashlib.md5( stamp.encode( 'utf-8')).hexdigest()
+
     #-----------------------------------------------------------------------------------------------
     def KillU4c(self):
         proc = subprocess.Popen( 'taskkill /im understand.exe /f', shell=True)
@@ -224,11 +367,17 @@ class U4c( ToolManager):
 
         self.LoadViolations()
 
-        parseOk = line == "Analyze Completed (Errors:0 Warnings:0)"
+        # parse warnings are normal for a C project, only errors make the DB untrustworthy
+        counts = AnalyzeCounts( line)
+        parseOk = counts is not None and counts[0] == 0
         openOk = self.udb.isOpen
+        self.RecordSettings( parseOk)
 
         if parseOk and openOk:
-            self.SetStatusMsg(100, 'Processing Complete')
+            if counts[1]:
+                self.SetStatusMsg(100, 'Processing Complete (%d Parse Warnings)' % counts[1])
+            else:
+                self.SetStatusMsg(100, 'Processing Complete')
         elif openOk:
             # if we could not open it the reason is in the status so leave it.
             self.SetStatusMsg(100, 'Processing Error Occurred - see Log File')
@@ -247,49 +396,73 @@ class U4c( ToolManager):
         excludeFiles = self.projFile.exclude[PF.eExcludeU4c]
         x, srcFiles = self.projFile.GetSrcCodeFiles( ['.h','.c','.cpp','.hpp'],
                                                      excludeDirs, excludeFiles)
+        self.Log( self.projFile.GetSrcSkipReport( ['.h','.c','.cpp','.hpp'],
+                                                  excludeDirs, excludeFiles)[0])
 
         # exclude all files that reside in library directories
         self.srcFiles = [i for i in srcFiles if not self.projFile.IsLibraryFile(i)]
 
         self.updateTime = datetime.datetime.today()
 
+        self.fileFacts = []
+        self.nameFacts = []
+        self.checkFacts = []
+
         self.SetStatusMsg( msg = 'Open %s DB' % eDbDetectId)
         self.Sleep()
 
-        self.udb = udb.U4cDb( self.dbName)
+        self.udbStamp = self.UdbStamp( srcFiles)
+        keywords = self.projFile.exclude[PF.eExcludeKeywords]
+        self.udb = udb.U4cDb( self.dbName, self.udbStamp, keywords)
         if not self.udb.isOpen:
             self.KillU4c()
-            self.udb = udb.U4cDb( self.dbName)
+            self.udb = udb.U4cDb( self.dbName, self.udbStamp, keywords)
 
         if self.udb.isOpen:
             self.SetStatusMsg( msg = 'Acquire DB Lock')
             try:
                 self.projFile.dbLock.acquire()
 
+                # extract facts/check against the Understand DB, then check the facts
                 tasks = (
-                    self.CheckMetrics,
-                    self.CheckNaming,
-                    self.CheckLanguageRestrictions,
-                    self.CheckFormats,
-                    self.CheckBaseTypes
+                    (self.ExtractFileFacts, (eCheckMetrics, eCheckFormats)),
+                    (self.CheckFunctionMetrics, (eCheckMetrics,)),
+                    (self.CheckNaming, (eCheckNaming,)),
+                    (self.CheckLanguageRestrictions, (eCheckRestrictions,)),
+                    (self.CheckBaseTypes, (eCheckBaseTypes,)),
+                    (self.RunChecks, (eCheckMetrics, eCheckFormats, eCheckNaming)),
                     )
+                tasks = [t for t, checks in tasks if [c for c in checks if self.IsSelected( c)]]
 
                 step = 1
                 totalTasks = len( tasks)
+                self.taskTimes = OrderedDict()
                 for t in tasks:
+                    start = time.time()
                     t(step,totalTasks)
+                    self.taskTimes[t.__name__] = time.time() - start
+                    self.Log( '%s: %.3fs' % (t.__name__, self.taskTimes[t.__name__]))
                     step += 1
 
                     if self.abortRequest:
                         break
 
                 if not self.abortRequest:
-                    self.insertDeleted = self.vDb.MarkNotReported( self.toolName, self.updateTime)
+                    self.insertDeleted = self.vDb.MarkNotReported( self.toolName, self.updateTime,
+                                                                   self.violationIds)
                     self.unanalyzed = self.vDb.Unanalyzed( self.toolName)
+                elif self.checkFacts:
+                    # some violations of these files were reported, the others were not carried
+                    self.vDb.Call( VDB.ViolationDb.ForgetFileStates, eDbDetectId,
+                                   [i.rpfn for i in self.checkFacts])
 
             except:
                 raise
             finally:
+                # all the writes must be done before someone else can have the DB
+                self.vDb.Flush()
+                self.Log( self.udb.CacheStats())
+                self.Log( srcCache.Stats())
                 self.udb.Close()
                 self.projFile.dbLock.release()
                 pass
@@ -297,11 +470,32 @@ class U4c( ToolManager):
             self.SetStatusMsg( 100, msg = 'Processing Error (see Log)\nU4C DB Open Error: %s' % self.udb.status)
 
     #-----------------------------------------------------------------------------------------------
-    def CheckMetrics(self,step,totalTasks):
-        """ This function verifies all of the length limits are met on a file by fail basis.
+    def SelectChecks(self, checks=None, violationIds=None):
+        """ Only run some of the checks (see u4cChecks.eChecks) and/or the checks that report
+            some violationId prefixes.  Only the violationIds selected are marked not reported, so
+            a rule can be tuned without running everything.
         """
-        self.SetStatusMsg( msg = 'Metrics/File Format Checks [Step %d of %d]'%(step,totalTasks))
-        fileLimit = self.projFile.metrics[PF.eMetricFile]
+        self.checks, self.violationIds = SelectChecks( checks, violationIds)
+        if self.checks is not None:
+            self.Log( 'Selected Checks: %s (%s)' % (', '.join( sorted( self.checks)),
+                                                    ', '.join( self.violationIds)))
+
+    #-----------------------------------------------------------------------------------------------
+    def IsSelected(self, check):
+        return self.checks is None or check in self.checks
+
+    #-----------------------------------------------------------------------------------------------
+    def TrackFiles(self):
+        """ the file states are only kept when all the per file checks are run """
+        return self.IsSelected( eCheckMetrics) and self.IsSelected( eCheckFormats)
+
+    #-----------------------------------------------------------------------------------------------
+    def ExtractFileFacts(self,step,totalTasks):
+        """ Collect the facts for the per file checks (file/function metrics, line checks and the
+            file/function header formats).  All the Understand work for these checks is done here,
+            the checks themselves are run in RunChecks.
+        """
+        self.SetStatusMsg( msg = 'Metrics/File Format Facts [Step %d of %d]'%(step,totalTasks))
 
         pctCtr = 0
         totalFiles = len(self.srcFiles)
@@ -315,286 +509,92 @@ class U4c( ToolManager):
             # compute the relative path from a srcRoot
             rpfn, fn = self.projFile.RelativePathName( fpfn)
 
-            # Get file/function information
+            # Get file/function information, the function contents are not needed by the checks
             funcInfo = self.udb.GetFileFunctionInfo( fn)
-            func = 'N/A'
+            funcFacts = OrderedDict()
+            for func in funcInfo:
+                funcFacts[func] = OrderedDict( [(k, v) for k, v in funcInfo[func].items()
+                                                if k != udb.eFiContent])
 
-            lines = self.projFile.GetFileContents(fpfn)
+            self.fileFacts.append( FileFacts( fpfn, rpfn, fn, funcFacts, ContentHash( fpfn)))
 
-            if fn == 'AircraftConfigMgr.h':
-                pass
+        self.SelectChangedFiles()
 
-            # check to file size violation
-            fileSize = len(lines)
-            if fileSize > fileLimit:
-                line = fileSize
-                severity = 'Error'
-                violationId = 'Metric.File'
-                desc = 'File Length Exceeded: %s total lines %d' % (fn, fileSize)
-                details = 'Total line count exceeds project maximum %d' % (fileLimit)
-                self.vDb.Insert(rpfn, func, severity, violationId, desc,
-                                details, line, eDbDetectId, self.updateTime)
-                self.vDb.Commit()
-
-            # check the file structure against the specified layout
-            #self.CheckFileFormat( fpfn, lines)
-            # check the function metrics
-            self.CheckFunctionMetrics( rpfn, funcInfo)
-
-            # check the length of each line
-            self.CheckLine( rpfn, funcInfo, lines)
-
-    #-----------------------------------------------------------------------------------------------
-    def CheckFunctionMetrics(self, rpfn, funcInfo):
-        """ Check all the function metrics
-        1. Line count
-        2. Cyclomatic
-        3. Max Nesting
-        4. returns
+    #-----------------------------------------------------------------------------------------------
+    def SelectChangedFiles(self):
+        """ Pick the files the per file checks need to run on, a file is checked again when its
+            contents or the check config changed since it was last checked.  The config includes
+            the Understand DB stamp (settings and headers, see UdbStamp) so every file is checked
+            again when the DB was built with other settings or a header changed.
         """
-        funcLimit = self.projFile.metrics[PF.eMetricFunc]
-        mccabeLimit = self.projFile.metrics[PF.eMetricMcCabe]
-        nestingLimit = self.projFile.metrics[PF.eMetricNesting]
-        returnLimit = self.projFile.metrics[PF.eMetricReturns]
-
-        severity = 'Error'
-        for func in funcInfo:
-            info = funcInfo[func]
-            u4cLine = info['start']
-
-            # this is the total count of lines in the function including comments
-            lines = info['metrics']['CountLine']
-            if lines > funcLimit:
-                violationId = 'Metric.Func'
-                desc = 'Function Length exceeded in %s' % (func)
-                details = 'Total Line Count %d exceeds %d' % (lines, funcLimit)
-                self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                    details, u4cLine, eDbDetectId, self.updateTime)
-
-            mccabe = info['metrics']['Cyclomatic']
-            if mccabe > mccabeLimit:
-                violationId = 'Metric.Cyclomatic'
-                desc = 'Function Cyclomatic Complexity exceeded in %s' % (func)
-                details = 'Cyclomatic Complexity %d exceeds %d' % (mccabe, mccabeLimit)
-                self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                    details, u4cLine, eDbDetectId, self.updateTime)
-
-            nesting = info['metrics']['MaxNesting']
-            if nesting > nestingLimit:
-                violationId = 'Metric.Nesting'
-                desc = 'Function Nesting exceeded in %s' % (func)
-                details = 'Nesting Levels %d exceeds %d' % (nesting, nestingLimit)
-                self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                    details, u4cLine, eDbDetectId, self.updateTime)
-
-            returns = info['returns']
-            if returns > returnLimit:
-                violationId = 'Metric.Returns'
-                desc = 'Function Return Points exceeded in %s' % (func)
-                details = 'Return Points %d exceeds %d' % (returns, returnLimit)
-                self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                    details, u4cLine, eDbDetectId, self.updateTime)
-
-        self.vDb.Commit()
-
-    #-----------------------------------------------------------------------------------------------
-    def CheckLine(self, rpfn, funcInfo, lines):
-        """ Analyze for:
-        1. Lines exceed the max line length
-        2. Lines with the word TODO, TBD
-        3. No tabs in the file
-        report the line number(s) for the above
+        self.configHash = CheckConfigHash( self.projFile, self.udbStamp)
+
+        if not self.TrackFiles():
+            self.checkFacts = list( self.fileFacts)
+            return
+
+        states = self.vDb.Call( VDB.ViolationDb.FileStates, eDbDetectId)
+        self.checkFacts = [i for i in self.fileFacts
+                           if states.get( i.rpfn) != (i.contentHash, self.configHash)]
+        self.Log( 'Changed Files: %d of %d' % (len(self.checkFacts), len(self.fileFacts)))
+    #-----------------------------------------------------------------------------------------------
+    def CheckFunctionMetrics(self,step,totalTasks):
+        """ Save the metrics of every function for this run, then report the functions over the
+            project limits with a query against the saved metrics
         """
-        # File Specific keywords
-        eFileName = '<TheFileName>'
-        eTheDescription = '<TheDescription>'
-        # leave these - PCLint should report these may need to do some work on it
-        eLocalFuncProto = '<TheLocalFunctionPrototypes>'
-        eLocalFunctions = '<TheLocalFunctions>'
-        eGlobalFunctions = '<TheGlobalFunctions>'
-
-        # check all line lengths
-        fileSize = len(lines)
-        fn = os.path.split(rpfn)[1]
-        lineLimit = self.projFile.metrics[PF.eMetricLine]
-
-        # get the filename and start/end line numbers
-        data = {}
-        for func in funcInfo:
-            start = funcInfo[func]['start']
-            end = funcInfo[func]['end']
-            data[(start,end)] = func
-
-        #--------------------------------- init the file format check
-        # determine file type c/h
-        ext = os.path.splitext( rpfn)[1]
-        # build format name
-        fmtName = 'File_%s' % ext.replace('.','').upper()
-        fileDescLines = self.projFile.formats.get( fmtName, '')
-        rawDescLines = self.projFile.rawFormats.get( fmtName, '')
-        fc = FormatChecker( eDbDetectId, self.updateTime, fileDescLines, rawDescLines)
-
-        for lx, line in enumerate( lines):
-            txt = line.rstrip()
-            lineLen = len(txt)
-            u4cLine = lx + 1 # U4C refs start at line 1
-
-            func = None
-
-            # feed the file format checker
-            fc.CheckLine( lx, line)
-
-            if lineLen > lineLimit:
-                func = 'N/A'
-                for ds,de in data:
-                    if u4cLine >= ds and u4cLine <= de:
-                        func = data[(ds,de)]
-
-                severity = 'Warning'
-                violationId = 'Metric.Line'
-                desc = 'Line Length in %s line %d' % (fn, lx)
-                details = '%3d: %s' % (lineLen, txt.strip())
-                self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                                 details, u4cLine, eDbDetectId, self.updateTime)
-
-            # check for TO-DO or T.B.D.
-            txtl = txt.lower()
-            todoRe = re.compile( r' ?todo[: ]+')
-            tbdRe = re.compile( r' ?tbd[: ]+')
-            if todoRe.search( txtl) or tbdRe.search(txtl):
-                if func is None:
-                    func = 'N/A'
-                    for ds,de in data:
-                        if ds <= u4cLine <= de:
-                            func = data[(ds,de)]
-                severity = 'Info'
-                violationId = 'Misc.TODO'
-                desc = 'Line contains TODO/TBD %s line %d' % (fn, lx)
-                details = '%s' % (txt.strip())
-                self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                                 details, u4cLine, eDbDetectId, self.updateTime)
-
-            # check for tabs
-            if txt.find('\t') != -1:
-                if txt.lower().find('todo') != -1 or txt.lower().find('tbd') != -1:
-                    if func is None:
-                        func = 'N/A'
-                        for ds,de in data:
-                            if u4cLine >= ds and u4cLine <= de:
-                                func = data[(ds,de)]
-                    severity = 'Error'
-                    violationId = 'Misc.TAB'
-                    desc = 'Line contains TAB(s) %s line %d' % (fn, lx)
-                    details = '%s' % (txt.strip())
-                    self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                                     details, u4cLine, eDbDetectId, self.updateTime)
-
-        # check any lines remaining in the line buffer
-        fc.FinishBuffer()
-
-        #------------------------------------------------- report and file format errors
-        # save this info incase we need to do some work for the three eLocal/Global above
-        self.fileKeywordData[rpfn] = copy.deepcopy(fc.items)
-        fc.ReportErrors( self.vDb, rpfn, -1, 'File Format', rpfn, 'FileFmt')
-
-        # check for the filename being were it is supposed to be
-        keyItems = fc.GetKeywordItems( eFileName)
-        if keyItems:
-            for item in keyItems:
-                keyInfo = item.keywords[eFileName]
-                text = '\n'.join(keyInfo.lines)
-                if text.lower().find( fn.lower()) == -1:
-                    # no mention of file name
-                    severity = 'Error'
-                    violationId = 'FileFmt.FileName'
-                    func = 'N/A'
-                    desc = 'Missing Filename near line %d' % keyInfo.line0
-                    details = 'Expected filename at line %d [Item %d]' % (keyInfo.line0,
-                                                                          item.itemId)
-                    self.vDb.Insert( rpfn, func, severity, violationId,
-                                     desc, details, keyInfo.line0, eDbDetectId, self.updateTime)
-
-        # check for a file description
-        keyItems = fc.GetKeywordItems( eTheDescription)
-        if keyItems:
-            for item in keyItems:
-                keyInfo = item.keywords[eTheDescription]
-                text = '\n'.join(keyInfo.lines)
-                rawText = item.JoinRaw()
-                replaceTxt = rawText.replace( eTheDescription, '').strip()
-                text = text.replace( replaceTxt, '').strip()
-                if not text:
-                    # no mention of file name
-                    severity = 'Error'
-                    violationId = 'FileFmt.NoDesc'
-                    func = 'N/A'
-                    desc = 'Missing File Desc near line %d' % keyInfo.line0
-                    details = 'Expected file description at line %d [Item %d]' % (keyInfo.line0,
-                                                                                  item.itemId)
-                    self.vDb.Insert( rpfn, func, severity, violationId,
-                                     desc, details, keyInfo.line0, eDbDetectId, self.updateTime)
-
-        self.vDb.Commit()
+        self.SetStatusMsg( msg = 'Function Metrics [Step %d of %d]'%(step,totalTasks))
+
+        rows = []
+        for facts in self.fileFacts:
+            for func in facts.funcInfo:
+                info = facts.funcInfo[func]
+                metrics = info[udb.eFiMetrics]
+                rows.append( (facts.rpfn, func, info[udb.eFiStart], info[udb.eFiEnd],
+                              metrics['CountLine'], metrics['Cyclomatic'],
+                              metrics['MaxNesting'], info[udb.eFiReturns]))
+
+        limits = dict( [(column, self.projFile.metrics[metric])
+                        for metric, column in eFuncMetricLimits.items()])
+
+        # unchanged files keep their violations, see RunChecks
+        checked = set( [i.rpfn for i in self.checkFacts])
+
+        saved = self.vDb.Call( VDB.ViolationDb.InsertFunctionMetrics, eDbDetectId,
+                               self.updateTime, rows)
+        found = self.vDb.Call( VDB.ViolationDb.CheckFunctionMetrics, eDbDetectId,
+                               self.updateTime, limits, self.updateTime, checked)
+        self.Log( 'Function Metrics saved/violations: %d/%d' % (saved, found))
 
     #-----------------------------------------------------------------------------------------------
     def CheckNaming(self,step,totalTasks):
-        """ Perform naming checks for all supplied item types
+        """ Collect the naming facts for all supplied item types, the checks are run in RunChecks
         """
-        x = 0
         self.SetStatusMsg( msg = 'Naming Checks [Step %d of %d]'%(step,totalTasks))
 
-        size, fmt = self.projFile.naming[PF.eNameVar]
-        try:
-            varRe = re.compile( fmt)
-        except:
-            print("Failed variable re compile <%s>" % fmt)
-            raise
-        theItems = self.udb.db.lookup( re.compile(r'.*'), 'Object')
-        self.NamingChecker( step, totalTasks, varRe, size, theItems,
-                            'Var', 'Variable', self.GetFuncVarName)
-
-        size, fmt = self.projFile.naming[PF.eNameFunc]
-        try:
-            funcRe  = re.compile( fmt)
-        except:
-            print("Failed function re compile <%s>" % fmt)
-            raise
-        theItems = self.udb.db.lookup( re.compile(r'.*'), 'Function')
-        self.NamingChecker( step+0.25, totalTasks, funcRe, size, theItems,
-                            'Func', 'Function', self.GetFuncFuncName)
-
-        size, fmt = self.projFile.naming[PF.eNameDef]
-        try:
-            macRe  = re.compile( fmt)
-        except:
-            print("Failed Define re compile <%s>" % fmt)
-            raise
-        theItems = self.udb.db.lookup( re.compile(r'.*'), 'Macro')
-        self.NamingChecker( step+0.25, totalTasks, macRe, size, theItems,
-                            'Def', 'Define', self.GetFuncVarName)
-
-        size, fmt = self.projFile.naming[PF.eNameEnum]
-        try:
-            enumRe  = re.compile( fmt)
-        except:
-            print("Failed Enum re compile <%s>" % fmt)
-        theItems = self.udb.db.lookup( re.compile(r'.*'), 'Enumerator')
-        self.NamingChecker( step+0.25, totalTasks, enumRe, size, theItems,
-                            'Enum', 'Enum', self.GetFuncVarName)
+        kinds = (
+            # name, longname, U4c kind, getFunc
+            ('Var', 'Variable', 'Object', self.GetFuncVarName),
+            ('Func', 'Function', 'Function', self.GetFuncFuncName),
+            ('Def', 'Define', 'Macro', self.GetFuncVarName),
+            ('Enum', 'Enum', 'Enumerator', self.GetFuncVarName),
+            )
+
+        for kx, (name, longname, kindIs, getFunc) in enumerate( kinds):
+            size, fmt = self.projFile.naming[eNamingKeys[name]]
+            try:
+                re.compile( fmt)
+            except:
+                print("Failed %s re compile <%s>" % (longname, fmt))
+                raise
+            theItems = self.udb.db.lookup( re.compile(r'.*'), kindIs)
+            self.NamingFacts( step + (0.25 if kx else 0), totalTasks, theItems,
+                              name, longname, getFunc)
 
     #-----------------------------------------------------------------------------------------------
-    def NamingChecker( self, step, totalTasks, theRe, maxLength, theItems, name, longname, getFunc):
-        """ Verify all variable names - global, local, static global/local
-        match the naming regex
+    def NamingFacts( self, step, totalTasks, theItems, name, longname, getFunc):
+        """ Collect where each item is defined and declared for the naming checks
         """
-
-        # Check all the vairable names
         totalItems = len(theItems)
-
-        good = 0
-        bad = 0
-        badNr = 0
-        libItem = 0
         pctCtr = 0
 
         msg = '%s(%d) Naming [Step %.2f of %d]'%(longname, totalItems, step, totalTasks)
@@ -608,61 +608,24 @@ class U4c( ToolManager):
             self.SetStatusMsg( pct)
 
             parent = item.parent()
-            # don't report library file problems
-            if parent and not self.projFile.IsLibraryFile( parent.longname()):
+            parentName = parent.longname() if parent else None
+            func = 'N/A'
+            defLoc = None
+            decLoc = None
+
+            # library file problems are not reported so skip the ref lookups for them
+            if parentName and not self.projFile.IsLibraryFile( parentName):
                 # find out where the variable is defined and declared
                 defFile, defLine = self.udb.RefAt( item)
                 decFile, decLine = self.udb.RefAt( item, 'Declare')
-
-                # log a declared but not defined variable
-                if defFile == '' and decFile != '':
-                    violationId = 'Undefined.%s' % (name)
-                    defFile = decFile
-                    defLine = decLine
-                    fpfn = decFile.longname()
-                    rpfn, fn = self.projFile.RelativePathName(fpfn)
-                    desc = '%s not defined: %s declared at line %d' % (longname,
-                                                                       item.name(),
-                                                                       decLine)
-                    details = self.ReadLineN( fpfn, decLine)
-                    # TODO: remove if U4C responds with a fix
-                    # PWC Specific
-                    if details.strip().find('EXPORT') != 0:
-                        self.vDb.Insert( rpfn, 'N/A', 'Error', violationId, desc,
-                                         details, decLine, eDbDetectId, self.updateTime)
-
-                match = theRe.match( item.name())
-                iLen = len(item.name())
-                tooBig = iLen > maxLength
-                if not match or tooBig:
-                    bad += 1
-                    severity = 'Error'
-                    violationId = 'Naming.%s' % name
-                    func = getFunc( item)
-
-                    if defFile != '':
-                        fpfn = defFile.longname()
-                        rpfn, fn = self.projFile.RelativePathName(fpfn)
-                        dispName = '%s%s' % (item.name(), '(Len:%d)' % iLen if tooBig else '')
-                        desc = '%s naming error: %s defined at line %d' % (longname,
-                                                                           dispName,
-                                                                           defLine)
-                        details = self.ReadLineN( fpfn, defLine)
-                        self.vDb.Insert( rpfn, func, severity, violationId, desc,
-                                         details, defLine, eDbDetectId, self.updateTime)
-                    else:
-                        badNr += 1
-                        self.Log('CheckBadNr %s - %s' % (name, item.name()))
-                else:
-                    good += 1
-            else:
-                libItem += 1
-                self.Log('CheckLib %s - %s' % (name, item.name()))
-
-        self.Log('%s Good/Bad(BadNr)/libItem: %d/%d(%d)/%d' % (name,good,bad,badNr,libItem))
-
-        self.vDb.Commit()
-
+                if defFile != '':
+                    defLoc = (defFile.longname(), defLine)
+                if decFile != '':
+                    decLoc = (decFile.longname(), decLine)
+                func = getFunc( item)
+
+            self.nameFacts.append( NameFacts( name, longname, item.name(), func,
+                                              parentName, defLoc, decLoc))
     #-----------------------------------------------------------------------------------------------
     def GetFuncVarName(self, item):
         """ Used by Naming rules to find a function when checking variable/enum/? """
@@ -702,7 +665,7 @@ class U4c( ToolManager):
             pctCtr += 1
             pct = (float(pctCtr)/totalItems) * 100.0
             self.SetStatusMsg( pct)
-            itemRefs = self.udb.GetItemRefs( item, 'Function')
+            itemRefs = self.RefLocations( self.udb.GetItemRefs( item, 'Function'))
             self.ReportExcluded( item, itemRefs, 'Error', 'Excluded.Func',
                                  'Excluded function %s at line %d')
 
@@ -714,7 +677,8 @@ class U4c( ToolManager):
             if item in specialProcessing:
                 itemRefs = specialProcessing[item]()
             else:
-                itemRefs = self.udb.GetItemRefs( item)
+                itemRefs = self.RefLocations( self.udb.GetItemRefs( item))
+                itemRefs = sorted( set( itemRefs + self.KeywordRefs( item)))
             self.ReportExcluded( item, itemRefs, 'Error', 'Excluded.Keyword',
                                  'Excluded keyword %s at line %d')
 
@@ -723,24 +687,37 @@ class U4c( ToolManager):
             pctCtr += 1
             pct = (float(pctCtr)/totalItems) * 100.0
             self.SetStatusMsg( pct)
-            itemRefs = self.udb.GetItemRefs( item, 'Function')
+            itemRefs = self.RefLocations( self.udb.GetItemRefs( item, 'Function'))
             self.ReportExcluded( item, itemRefs, 'Warning', 'Restricted.Func',
                                  'Restricted function %s at line %d')
 
     #-----------------------------------------------------------------------------------------------
     def HandleRegister( self):
-        """ handle the declaration of a register variable if the user has disallowed this """
-        # TODO: check that no local variable type is declared as a register
-        return []
+        """ handle the declaration of a register variable if the user has disallowed this
+            register is only legal on locals and parameters so every use is a declaration
+        """
+        return self.KeywordRefs( 'register')
+
+    #-----------------------------------------------------------------------------------------------
+    def KeywordRefs( self, keyword):
+        """ return the (fpfn, line) of every use of keyword in the source files """
+        refs = []
+        for fpfn in self.srcFiles:
+            rpfn, fn = self.projFile.RelativePathName( fpfn)
+            refs.extend( self.udb.GetKeywordRefs( fn, keyword))
+        return refs
+
+    #-----------------------------------------------------------------------------------------------
+    def RefLocations( self, itemRefs):
+        """ turn Understand refs into (fpfn, line) pairs """
+        return [(ref.file().longname(), ref.line()) for ref in itemRefs]
 
     #-----------------------------------------------------------------------------------------------
     def ReportExcluded( self, item, itemRefs, severity, violationId, descFmt):
         """ This is a common reporting function for excluded functions/keywords and restricted
-            functions
+            functions, itemRefs holds the (fpfn, line) of each use
         """
-        for ref in itemRefs:
-            u4cLine = ref.line()
-            fpfn = ref.file().longname()
+        for fpfn, u4cLine in itemRefs:
             refFunc, info = self.udb.InFunction( fpfn, u4cLine)
             rpfn, title = self.projFile.RelativePathName( fpfn)
             desc = descFmt % (item, u4cLine)
@@ -748,138 +725,6 @@ class U4c( ToolManager):
             self.vDb.Insert( rpfn, refFunc, severity, violationId, desc,
                              details, u4cLine, eDbDetectId, self.updateTime)
 
-        if itemRefs:
-            self.vDb.Commit()
-
-    #-----------------------------------------------------------------------------------------------
-    def CheckFormats(self,step,totalTasks):
-        """ Perform file/function header format checks
-            This must be done last to ensure all the function info has already been filled in
-        """
-        self.SetStatusMsg( msg = 'Format Checks [Step %d of %d]'%(step,totalTasks))
-
-        self.FunctionHeaderFormat()
-
-    #-----------------------------------------------------------------------------------------------
-    def FunctionHeaderFormat(self):
-        """ Verify the function header format and content
-            keywords:
-                <TheFunctionName> matches the current functions name
-                <TheParameters> names of parameters must match, void matches empty string
-                <TheReturnType> names the return type, void matches empty string
-
-        """
-        # Function Header Specific keywords
-        eFunctionName = '<TheFunctionName>'
-        eParams = '<TheParameters>'
-        eParamsIn = '<TheParametersIn>'
-        eParamsOut = '<TheParametersOut>'
-        eParamsInOut = '<TheParametersInOut>'
-        eReturnType = '<TheReturnType>'
-
-        self.SetStatusMsg( msg = 'Check Function Header Format')
-
-        # in the function header we look for important items
-        fhDesc = self.projFile.formats[PF.eFmtFunction]
-        fhRawDesc = self.projFile.rawFormats[PF.eFmtFunction]
-
-        fc = FormatChecker( eDbDetectId, self.updateTime, fhDesc, fhRawDesc)
-
-        pctCtr = 0
-        totalFiles = len(self.srcFiles)
-        for i in self.srcFiles:
-            if self.abortRequest:
-                break
-
-            pctCtr += 1
-            self.SetStatusMsg( (pctCtr/float(totalFiles)*100))
-
-            # compute the relative path from a srcRoot
-            rpfn, fn = self.projFile.RelativePathName( i)
-
-            # Get file/function information
-            funcInfo = self.udb.GetFileFunctionInfo( fn)
-
-            for func in funcInfo:
-                if func == 'ConvertToDegC':
-                    pass
-
-                # get function info
-                fi = funcInfo[func]
-                hdr = fi[udb.eFiHeader]
-                params = fi[udb.eFiParams]
-                lineNum = fi[udb.eFiStart]
-
-                # header split by line
-                if hdr:
-                    hdrLines = hdr.split('\n')
-                    fc.Check(hdr)
-                    fc.ReportErrors( self.vDb, rpfn, lineNum, 'Function Header',
-                                     func, 'FuncHdr')
-                else:
-                    # No function header
-                    severity = 'Error'
-                    violationId = 'FuncHdr.NoHeader'
-                    desc = 'Function Header %s is missing' % (func)
-                    details = 'N/A'
-                    self.vDb.Insert(rpfn, func, severity, violationId, desc,
-                                    details, lineNum, eDbDetectId, self.updateTime)
-                    continue
-
-                # is the function name supposed to be in the header?
-                keyItems = fc.GetKeywordItems(eFunctionName)
-                if keyItems:
-                    for item in keyItems:
-                        keyInfo = item.keywords[eFunctionName]
-                        searchIn = '\n'.join(keyInfo.lines)
-                        if searchIn.find( func) == -1:
-                            severity = 'Error'
-                            violationId = 'FuncHdr.FuncName'
-                            desc = 'Function Name %s Missing in header' % func
-                            details = 'Expected at offset %d of %d lines' % (keyInfo.line0, len(hdrLines))
-                            self.vDb.Insert(rpfn, func, severity, violationId, desc,
-                                            details, lineNum, eDbDetectId, self.updateTime)
-
-                # check parameters - if requested and collect associated lines
-                # TODO: detect actual out param types *, & report misplaced comments
-                expectParams = False
-                paramLines = []
-                for p in (eParams, eParamsIn, eParamsOut, eParamsInOut):
-                    keyItems = fc.GetKeywordItems(p)
-                    for item in keyItems:
-                        expectParams = True
-                        paramLines.extend( item.keywords[p].lines)
-
-                # collect any lines associated with parameters and see if all the params are defined
-                if expectParams:
-                    searchIn = '\n'.join( paramLines)
-                    for px,p in enumerate(params):
-                        if searchIn.find( p) == -1:
-                            severity = 'Error'
-                            violationId = 'FuncHdr.Param'
-                            desc = 'Function Header %s Missing Param %s' % (func, p)
-                            details = 'Parameter <%s> not in description' % p
-                            self.vDb.Insert(rpfn, func, severity, violationId, desc,
-                                            details, lineNum, eDbDetectId, self.updateTime)
-
-                # check return type - if requested
-                keyItems = fc.GetKeywordItems(eReturnType)
-                for item in keyItems:
-                    searchIn = '\n'.join(item.keywords[eReturnType].lines)
-                    rawText = item.JoinRaw()
-                    rtnLineDesc = rawText.replace(eReturnType, '')
-                    searchIn = searchIn.replace( rtnLineDesc, '').strip()
-                    if not searchIn and fi[udb.eFiReturnType] != 'void':
-                        severity = 'Error'
-                        violationId = 'FuncHdr.Return'
-                        desc = 'Function Header %s Missing return info' % (func)
-                        details = 'Function header consists of %d lines' % len(hdrLines)
-                        self.vDb.Insert(rpfn, func, severity, violationId, desc,
-                                        details, lineNum, eDbDetectId, self.updateTime)
-
-        self.vDb.Commit()
-
-
     #-----------------------------------------------------------------------------------------------
     def CheckBaseTypes( self,step,totalTasks):
         """ insure that all variables and structure definitions, return types, etc. are based on
@@ -888,6 +733,9 @@ class U4c( ToolManager):
         """
         if self.projFile.baseTypes:
             baseTypes = self.projFile.baseTypes + ['void']
+            typedefs = [(i.name(), i.type()) for i in self.udb.db.ents( 'Typedef')]
+            resolver = TypeResolver( baseTypes, typedefs)
+
             allObjs = sorted(self.udb.db.ents( 'object'),key= lambda ent: ent.name().lower())
             totalObjs = len(allObjs)
 
@@ -895,7 +743,6 @@ class U4c( ToolManager):
 
             pctCtr = 0
             self.SetStatusMsg(msg = 'Check Base Types [Step %d of %d]'%(step,totalTasks))
-            letter0 = None
             for obj in allObjs:
                 if self.abortRequest:
                     break
@@ -905,52 +752,22 @@ class U4c( ToolManager):
                 self.SetStatusMsg( pct)
 
                 oType = obj.type()
-                typeOk = True
-
-                if oType not in baseTypes:
-                    typeOk = False
-                    if oType is None:
-                        # make sure this is a typedef
-                        if obj.kindname().lower() == 'typedef':
-                            typeOk = True
-                    else:
-                        # check is part of type is in any basetype
-                        for b in baseTypes:
-                            if oType.find( b) != -1:
-                                typeOk = True
-                                break
-                        else:
-                            # clean up the type
-                            inOtype = oType
-                            # must be 1st or escaped ']' and '-'
-                            cleanRe = re.compile(r'const|volatile|[()+\-*/]+?')
-                            numRe = re.compile(r'\[[0-9A-Za-z_\- ]*\]')
-                            repStr = cleanRe.findall( oType)
-                            for i in repStr:
-                                oType = oType.replace(i,'')
-
-                            # remove extra numbers
-                            rep1Str = numRe.findall( oType)
-                            for i in rep1Str:
-                                oType = oType.replace(i,'')
-
-                            oType = oType.strip()
-                            #self.Log('In: <%s> Out: <%s> RepStr: %s - %s' % (inOtype, oType,
-                            #                                              str(repStr), str(rep1Str)))
-
-                            tdefFound = self.udb.db.lookup(oType, 'Typedef')
-                            tdefFound = [i for i in tdefFound if i.name() == oType]
-
-                            if len(tdefFound) != 1:
-                                objStats['bad'] += 1
-                            else:
-                                typeOk = True
+
+                if oType is None:
+                    # make sure this is a typedef
+                    typeOk = obj.kindname().lower() == 'typedef'
+                else:
+                    typeOk, cleanType = resolver.Verdict( oType)
+                    if not typeOk:
+                        objStats['bad'] += 1
+                        oType = cleanType
 
                 if not typeOk:
                     defFile, defLine = self.udb.FindEnt( obj)
                     if defFile != '':
                         objStats['bad'] += 1
-                        self.Log( '%s: Type(%s), Kind(%s)' % (obj.name(), oType, obj.kindname()))
+                        chain = ' -> '.join( resolver.Resolve( oType)) if oType else oType
+                        self.Log( '%s: Type(%s), Kind(%s)' % (obj.name(), chain, obj.kindname()))
                         severity = 'Error'
                         violationId = 'BaseType'
                         fpfn = defFile.longname()
@@ -960,9 +777,6 @@ class U4c( ToolManager):
                         desc = 'Base Type Error: %s line %d' % (obj.name(), defLine)
                         self.vDb.Insert( rpfn, func, severity, violationId, desc,
                                          details, defLine, eDbDetectId, self.updateTime)
-                        if letter0 != obj.name()[0]:
-                            letter0 = obj.name()[0]
-                            self.vDb.Commit()
                     else:
                         self.Log('BaseType: Library variable %s' % obj.name())
 
@@ -970,21 +784,126 @@ class U4c( ToolManager):
                     objStats['ok'] += 1
 
             self.Log('ObjStats: ok(%d), bad(%d), other(%d)' % (objStats['ok'], objStats['bad'], objStats['other']))
+            self.Log( resolver.Stats())
+
+    #-----------------------------------------------------------------------------------------------
+    def RunChecks(self,step,totalTasks):
+        """ Check the extracted facts on a pool of worker processes, the violations are handed
+            to the violation sink as each result comes back.  Only the changed files are checked,
+            the per file violations of the others are carried forward.
+        """
+        self.SetStatusMsg( msg = 'Run Checks [Step %d of %d]'%(step,totalTasks))
+
+        # a partial run would leave the saved facts incomplete
+        if self.checks is None:
+            # runTime: the FunctionMetrics run of the same load, see u4cWhatIf
+            facts = {'files': self.fileFacts, 'names': self.nameFacts,
+                     'entities': self.EntityFacts(), 'runTime': self.updateTime}
+            SaveFacts( os.path.join( self.projToolRoot, eFactsName), facts)
+
+        nameChunks = [self.nameFacts[i:i+eNameChunk]
+                      for i in range( 0, len(self.nameFacts), eNameChunk)]
+        totalJobs = len(self.checkFacts) + len(nameChunks)
+
+        fileChecks = [c for c in (eCheckMetrics, eCheckFormats) if self.IsSelected( c)]
+        runner = CheckRunner( self.projFile, self.updateTime, eDbDetectId, totalJobs, fileChecks)
+        self.Log( 'Check Workers: %d' % runner.workers)
+
+        nameStats = OrderedDict()
+        pctCtr = 0
+        written = 0
+        try:
+            for violations in runner.Map( CheckFileWorker, self.checkFacts, 4):
+                for v in violations:
+                    self.vDb.Insert( *v)
+                written += len( violations)
+                pctCtr += 1
+                self.SetStatusMsg( (float(pctCtr)/totalJobs) * 100)
+                if self.abortRequest:
+                    break
+
+            if not self.abortRequest:
+                for violations, stats, log in runner.Map( CheckNamesWorker, nameChunks):
+                    for v in violations:
+                        self.vDb.Insert( *v)
+                    written += len( violations)
+                    for name in stats:
+                        counts = nameStats.setdefault( name, [0, 0, 0, 0])
+                        for cx, count in enumerate( stats[name]):
+                            counts[cx] += count
+                    for i in log:
+                        self.Log( i)
+
+                    pctCtr += 1
+                    self.SetStatusMsg( (float(pctCtr)/totalJobs) * 100)
+                    if self.abortRequest:
+                        break
+        finally:
+            runner.Close( self.abortRequest)
+
+        for name in nameStats:
+            good, bad, badNr, libItem = nameStats[name]
+            self.Log('%s Good/Bad(BadNr)/libItem: %d/%d(%d)/%d' % (name,good,bad,badNr,libItem))
+
+        self.Log( 'Check Violations: %d' % written)
+
+        if not self.abortRequest and self.TrackFiles():
+            states = [(i.rpfn, i.contentHash, self.configHash) for i in self.fileFacts]
+            checked = set( [i.rpfn for i in self.checkFacts])
+            carried = self.vDb.Call( VDB.ViolationDb.CarryForward, eDbDetectId, self.updateTime,
+                                     states, checked, eFileCheckIds)
+            self.Log( 'Carried Forward Violations: %d' % carried)
+
+        elif not self.abortRequest and fileChecks:
+            # a partial run carries what it did not check so the next full run still has it
+            states = [(i.rpfn, i.contentHash, self.configHash) for i in self.fileFacts]
+            carried = self.vDb.Call( VDB.ViolationDb.CarryPartial, eDbDetectId, self.updateTime,
+                                     states, eFileCheckIds, self.violationIds)
+            self.Log( 'Carried Forward Violations: %d' % carried)
+
+    #-----------------------------------------------------------------------------------------------
+    def EntityFacts(self):
+        """ Collect the facts behind the checks that are run against the Understand DB (base types
+            and language restrictions).  The checks don't use them, they are saved so u4cWhatIf.py
+            can evaluate other settings without Understand.
+                typedefs: [(name, type), ...]
+                objects:  [TypeFacts, ...]
+                funcRefs: {function longname: [(fpfn, line), ...]} every ref to each function
+                keywords: {fpfn: {keyword: [line, ...]}} for the source files
+                keywordNames: the keywords whose lines were kept (the excluded keywords)
+        """
+        start = time.time()
+        typedefs = [(i.name(), i.type()) for i in self.udb.db.ents( 'Typedef')]
+
+        objects = []
+        for obj in self.udb.db.ents( 'object'):
+            defFile, defLine = self.udb.FindEnt( obj)
+            defLoc = (defFile.longname(), defLine) if defFile != '' else None
+            objects.append( TypeFacts( obj.name(), obj.type(), obj.kindname(), defLoc))
+
+        funcRefs = {}
+        for func in self.udb.db.ents( 'Function'):
+            refs = funcRefs.setdefault( func.longname(), [])
+            refs.extend( self.RefLocations( func.refs()))
+
+        # only the excluded keywords, the digests also keep the return lines
+        keywords = {}
+        for fn, digest in self.udb.fileDigest.items():
+            if digest is not None:
+                keywords[self.udb.fileFullPath[fn]] = dict(
+                    [(k, v) for k, v in digest.keywords.items() if k in self.udb.keywords])
+
+        self.Log( 'Entity Facts: %d objects, %d functions (%.3fs)' % (
+            len( objects), len( funcRefs), time.time() - start))
+
+        return {'typedefs': typedefs, 'objects': objects, 'funcRefs': funcRefs,
+                'keywords': keywords, 'keywordNames': list( self.udb.keywords)}
 
     #-----------------------------------------------------------------------------------------------
     def ReadLineN( self, filename, lineNumber):
         """ return the text of 'lineNumber' in file 'filename'
         """
-        fullPathName = self.projFile.FullPathName( filename)
-        if fullPathName:
-            # TODO: handle non-unique filenames in different srcRoots
-            f = open( fullPathName[0], 'r')
-            lines = f.readlines()
-            f.close()
-            txt = lines[lineNumber - 1]
-        else:
-            txt = 'Filename: %s does not exist or has been moved.'
-        return txt
+        return ReadLineN( self.projFile, filename, lineNumber)
 
 
 
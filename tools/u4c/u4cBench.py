@@ -0,0 +1,448 @@
+"""
+U4c Benchmark
+This file times each task of the U4c load (U4c.SpecializedLoad) without Understand.  The Understand
+DB is replayed by fake/understand.py from a fixture, either:
+    synthetic - a generated C project and a fixture that matches it (the default)
+    recorded  - a project file and a fixture written by u4cRecorder.py from the project's DB
+
+    python u4cBench.py [-files N] [-funcs N] [-runs N] [-root dir]
+    python u4cBench.py -crp <project.crp> -fixture <db.udb.fixture> [-runs N]
+
+The 1st run computes the function info cache, the runs after it show the warm cache times.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import argparse
+import os
+import pickle
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+# the fake understand module must be found before any real one
+eFakeDir = os.path.join( os.path.dirname( os.path.abspath( __file__)), 'fake')
+sys.path.insert( 0, eFakeDir)
+sys.path.insert( 1, os.path.join( os.path.dirname( os.path.abspath( __file__)), '..', '..'))
+os.environ.setdefault( 'PYTHONPATH', '')
+
+import understand
+
+from tools.u4c import u4c
+from tools.u4c.u4cCache import eCacheName
+
+import ProjFile as PF
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eDefaultFiles = 200
+eDefaultFuncs = 20
+
+eBaseTypes = ['UINT8', 'UINT16', 'UINT32', 'INT32', 'FLOAT32', 'BOOLEAN', 'CHAR']
+eTypedefs = (
+    ('UINT8', 'unsigned char'),
+    ('UINT16', 'unsigned short'),
+    ('UINT32', 'unsigned int'),
+    ('INT32', 'signed int'),
+    ('FLOAT32', 'float'),
+    ('BOOLEAN', 'unsigned char'),
+    ('CHAR', 'char'),
+    ('COUNTER', 'UINT32'),
+    )
+
+eKeywords = set( (
+    'auto', 'break', 'case', 'char', 'const', 'continue', 'default', 'do', 'double', 'else',
+    'enum', 'extern', 'float', 'for', 'goto', 'if', 'int', 'long', 'register', 'return', 'short',
+    'signed', 'sizeof', 'static', 'struct', 'switch', 'typedef', 'union', 'unsigned', 'void',
+    'volatile', 'while',
+    ))
+
+eTokenRe = re.compile( r'''
+     (?P<Newline>\r?\n)
+    |(?P<Whitespace>[ \t]+)
+    |(?P<Comment>//[^\r\n]*|/\*.*?\*/)
+    |(?P<Preprocessor>\#[ \t]*[A-Za-z_]+)
+    |(?P<String>"(?:\\.|[^"\\])*")
+    |(?P<Literal>[0-9][0-9A-Za-z_.]*)
+    |(?P<Identifier>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<Punctuation>[;{}(),\[\]])
+    |(?P<Operator>.)
+    ''', re.S | re.X)
+
+eFileHdr = '''/******************************************************************************
+ File: %s
+ Description: synthetic module %d for the U4c benchmark
+******************************************************************************/
+'''
+
+eFuncHdr = '''/******************************************************************************
+ * Function: %s
+ * Description: synthetic function
+ * Parameters: %s
+ * Returns: %s
+ *****************************************************************************/
+'''
+
+eFmtFile = '''File: <TheFileName>
+Description: <TheDescription>'''
+
+eFmtFunction = '''Function: <TheFunctionName>
+Description:
+Parameters: <TheParameters>
+Returns: <TheReturnType>'''
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def Tokenize( text):
+    """ return the lexer tokens of C source text as the fixture holds them """
+    tokens = []
+    line = 1
+    for m in eTokenRe.finditer( text):
+        token = m.lastgroup
+        txt = m.group()
+        if token == 'Identifier' and txt in eKeywords:
+            token = 'Keyword'
+        lineEnd = line + txt.count( '\n')
+        tokens.append( (token, txt, line, lineEnd))
+        line = lineEnd
+    return tokens
+
+#---------------------------------------------------------------------------------------------------
+def Report( runNr, tool, total):
+    """ show the task times of a run """
+    print( '\nRun %d: %.3fs' % (runNr, total))
+    for task in tool.taskTimes:
+        print( '    %-28s %8.3fs' % (task, tool.taskTimes[task]))
+    print( '    new/updated/deleted: %d/%d/%d' % (tool.insertNew, tool.insertUpdate,
+                                                   tool.insertDeleted))
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class SyntheticProject:
+    """ Generate a C project and the fixture of the DB Understand would build for it """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, root, fileCount, funcCount, seed=1):
+        self.root = root
+        self.srcRoot = os.path.join( root, 'src')
+        self.fileCount = fileCount
+        self.funcCount = funcCount
+        self.rand = random.Random( seed)
+
+        self.ents = []
+        self.restricted = None
+
+    #-----------------------------------------------------------------------------------------------
+    def AddEnt( self, name, kindname, longname=None, entType=None, parent=None):
+        self.ents.append( {
+            'name': name,
+            'longname': longname or name,
+            'kindname': kindname,
+            'type': entType,
+            'parent': parent,
+            'refs': [],
+            })
+        return len( self.ents) - 1
+
+    #-----------------------------------------------------------------------------------------------
+    def AddRef( self, ex, kind, fileEx, line, entEx=None):
+        self.ents[ex]['refs'].append( (kind, fileEx, line, ex if entEx is None else entEx))
+
+    #-----------------------------------------------------------------------------------------------
+    def AddFile( self, name, kindname, text):
+        fpfn = os.path.join( self.srcRoot, name)
+        f = open( fpfn, 'w', newline='')
+        f.write( text.replace( '\n', '\r\n'))
+        f.close()
+
+        fileEx = self.AddEnt( name, kindname, fpfn)
+        self.ents[fileEx]['lexer'] = Tokenize( text)
+        return fileEx
+
+    #-----------------------------------------------------------------------------------------------
+    def Create( self):
+        """ write the sources, the fixture and the project file, return the project file name """
+        os.makedirs( self.srcRoot)
+        toolRoot = os.path.join( self.root, u4c.eToolRoot)
+        os.makedirs( toolRoot)
+
+        self.restricted = self.AddEnt( 'memcpy', 'Unresolved Function', entType='void *')
+
+        lines = ['typedef %s %s;' % (tdType, name) for name, tdType in eTypedefs]
+        typesEx = self.AddFile( 'types.h', 'C Header File', '\n'.join( lines) + '\n')
+        for lx, (name, tdType) in enumerate( eTypedefs):
+            ex = self.AddEnt( name, 'Typedef', entType=tdType, parent=typesEx)
+            self.AddRef( ex, 'Define', typesEx, lx + 1)
+
+        for mx in range( self.fileCount):
+            self.CreateModule( mx)
+
+        fixture = os.path.join( toolRoot, u4c.eDbName) + understand.eFixtureExt
+        f = open( fixture, 'wb')
+        pickle.dump( {'version': 'synthetic', 'ents': self.ents}, f, pickle.HIGHEST_PROTOCOL)
+        f.close()
+
+        return self.CreateProjectFile()
+
+    #-----------------------------------------------------------------------------------------------
+    def CreateProjectFile( self):
+        crp = os.path.join( self.root, 'Bench.crp')
+        pf = PF.ProjectFile( crp)
+        pf.paths[PF.ePathSrcRoot] = [self.srcRoot]
+        pf.formats[PF.eFmtFile_c] = eFmtFile
+        pf.formats[PF.eFmtFile_h] = eFmtFile
+        pf.formats[PF.eFmtFunction] = eFmtFunction
+        pf.naming[PF.eNameFunc] = r'32:[A-Z][A-Za-z0-9]*_[A-Z][A-Za-z0-9]*'
+        pf.naming[PF.eNameVar] = r'32:[A-Za-z][A-Za-z0-9_]*'
+        pf.naming[PF.eNameEnum] = r'32:[A-Z][A-Z0-9_]*'
+        pf.naming[PF.eNameConst] = r'32:[A-Z][A-Z0-9_]*'
+        pf.naming[PF.eNameDef] = r'32:[A-Z][A-Z0-9_]*'
+        pf.baseTypes = list( eBaseTypes)
+        pf.exclude[PF.eExcludeKeywords] = ['register', 'goto']
+        pf.exclude[PF.eExcludeFunc] = ['malloc']
+        pf.restricted[PF.eRestrictedFunc] = ['memcpy']
+        pf.Save( crp)
+        return crp
+
+    #-----------------------------------------------------------------------------------------------
+    def CreateModule( self, mx):
+        """ create modNNN.h/modNNN.c and their entities """
+        base = 'Mod%03d' % mx
+        hName = '%s.h' % base.lower()
+        cName = '%s.c' % base.lower()
+
+        funcs = []
+        for fx in range( self.funcCount):
+            funcs.append( ('%s_Func%d' % (base, fx), self.rand.choice( ('UINT32', 'void')),
+                           [('value', 'UINT32'), ('flag', 'UINT8')][:self.rand.randint( 0, 2)]))
+
+        # header file
+        h = [eFileHdr % (hName, mx)]
+        h.append( '#ifndef %s_H' % base.upper())
+        h.append( '#define %s_H' % base.upper())
+        h.append( '#include "types.h"')
+        h.append( '#define %s_MAX 10U' % base.upper())
+        h.append( 'typedef enum { %s_IDLE, %s_RUN } %s_STATE;' % ((base.upper(),)*3))
+        h.append( 'extern UINT32 %s_Count;' % base)
+        protoAt = len( '\n'.join( h).split( '\n')) + 1
+        for name, retType, params in funcs:
+            h.append( '%s %s( %s);' % (retType, name, self.ParamText( params)))
+        h.append( '#endif')
+        hText = '\n'.join( h) + '\n'
+        hEx = self.AddFile( hName, 'C Header File', hText)
+
+        hLine = lambda text: hText.split( '\n').index( text) + 1
+        ex = self.AddEnt( '%s_MAX' % base.upper(), 'Macro', parent=hEx)
+        self.AddRef( ex, 'Define', hEx, hLine( '#define %s_MAX 10U' % base.upper()))
+        enumLine = hLine( 'typedef enum { %s_IDLE, %s_RUN } %s_STATE;' % ((base.upper(),)*3))
+        for e in ('IDLE', 'RUN'):
+            ex = self.AddEnt( '%s_%s' % (base.upper(), e), 'Enumerator', parent=hEx)
+            self.AddRef( ex, 'Define', hEx, enumLine)
+        # a typedef of a type that is not a base type
+        ex = self.AddEnt( '%s_STATE' % base.upper(), 'Typedef', entType='enum', parent=hEx)
+        self.AddRef( ex, 'Define', hEx, enumLine)
+
+        # source file
+        c = [eFileHdr % (cName, mx)]
+        c.append( '#include "%s"' % hName)
+        c.append( '')
+        c.append( 'UINT32 %s_Count;' % base)
+        c.append( 'static int %s_bad;' % base.lower())
+        c.append( '')
+        lineNr = len( '\n'.join( c).split( '\n'))
+
+        cEx = self.AddEnt( cName, 'C Code File', os.path.join( self.srcRoot, cName))
+        countEx = self.AddEnt( '%s_Count' % base, 'Global Object', entType='UINT32', parent=cEx)
+        self.AddRef( countEx, 'Define', cEx, lineNr - 2)
+        self.AddRef( countEx, 'Declare', hEx, hLine( 'extern UINT32 %s_Count;' % base))
+        self.AddRef( cEx, 'Define', cEx, lineNr - 2, countEx)
+        badEx = self.AddEnt( '%s_bad' % base.lower(), 'Static Global Object', entType='int',
+                             parent=cEx)
+        self.AddRef( badEx, 'Define', cEx, lineNr - 1)
+        self.AddRef( cEx, 'Define', cEx, lineNr - 1, badEx)
+
+        for fx, (name, retType, params) in enumerate( funcs):
+            text = self.CreateFunction( cEx, hEx, lineNr + 1, protoAt + fx, name, retType, params)
+            c.append( text)
+            lineNr += text.count( '\n') + 1
+
+        cText = '\n'.join( c) + '\n'
+        fpfn = self.ents[cEx]['longname']
+        f = open( fpfn, 'w', newline='')
+        f.write( cText.replace( '\n', '\r\n'))
+        f.close()
+        self.ents[cEx]['lexer'] = Tokenize( cText)
+
+    #-----------------------------------------------------------------------------------------------
+    def ParamText( self, params):
+        return ', '.join( ['%s %s' % (pType, pName) for pName, pType in params]) or 'void'
+
+    #-----------------------------------------------------------------------------------------------
+    def CreateFunction( self, cEx, hEx, line, protoLine, name, retType, params):
+        """ return the text of a function that starts on line, add its entities """
+        rand = self.rand
+
+        paramNames = ', '.join( [p[0] for p in params]) or 'None'
+        body = [(eFuncHdr % (name, paramNames, retType)).rstrip( '\n')]
+        defLine = line + body[0].count( '\n') + 1
+        body.append( '%s %s( %s)' % (retType, name, self.ParamText( params)))
+        body.append( '{')
+
+        funcEx = self.AddEnt( name, 'Function', entType=retType, parent=cEx)
+        # comments('before') gives the header without the comment delimiters
+        self.ents[funcEx]['comments'] = body[0][2:-2]
+        self.AddRef( funcEx, 'Define', cEx, defLine)
+        self.AddRef( funcEx, 'Declare', hEx, protoLine)
+        self.AddRef( cEx, 'Define', cEx, defLine, funcEx)
+        for pName, pType in params:
+            ex = self.AddEnt( pName, 'Parameter', '%s.%s' % (name, pName), pType, funcEx)
+            self.AddRef( ex, 'Define', cEx, defLine)
+            self.AddRef( funcEx, 'Define', cEx, defLine, ex)
+
+        def Local( text, lName, lType, kind='Local Object'):
+            ex = self.AddEnt( lName, kind, '%s.%s' % (name, lName), lType, funcEx)
+            at = defLine + len( body) - 1
+            self.AddRef( ex, 'Define', cEx, at)
+            self.AddRef( funcEx, 'Define', cEx, at, ex)
+            body.append( text)
+
+        Local( '    UINT32 result = 0U;', 'result', 'UINT32')
+
+        branches = 0
+        nesting = 0
+        maxNesting = 0
+        returns = 0
+        for sx in range( rand.randint( 4, 40)):
+            pick = rand.random()
+            indent = '    ' * (nesting + 1)
+            if pick < 0.15 and nesting < 7:
+                body.append( '%sif ( result > %dU )' % (indent, sx))
+                body.append( '%s{' % indent)
+                nesting += 1
+                branches += 1
+                maxNesting = max( maxNesting, nesting)
+            elif pick < 0.25 and nesting < 7:
+                body.append( '%sfor ( result = 0U; result < %dU; result++ )' % (indent, sx))
+                body.append( '%s{' % indent)
+                nesting += 1
+                branches += 1
+                maxNesting = max( maxNesting, nesting)
+            elif pick < 0.40 and nesting:
+                nesting -= 1
+                body.append( '%s}' % ('    ' * (nesting + 1)))
+            elif pick < 0.43:
+                body.append( '%s// TODO: finish step %d' % (indent, sx))
+            elif pick < 0.45:
+                body.append( '%sresult = result + %s_Count + 1U; /* a comment that makes this line'
+                             ' much longer than the line length limit */' % (indent, name[:6]))
+            elif pick < 0.47:
+                Local( '%sregister UINT32 fast%d = result;' % (indent, sx), 'fast%d' % sx, 'UINT32')
+            elif pick < 0.49:
+                Local( '%sint temp%d = 0;' % (indent, sx), 'temp%d' % sx, 'int')
+            elif pick < 0.51:
+                body.append( '%s(void)memcpy( &result, &result, sizeof( result));' % indent)
+                self.AddRef( self.restricted, 'Callby', cEx, defLine + len( body) - 2, funcEx)
+                self.AddRef( funcEx, 'Call', cEx, defLine + len( body) - 2, self.restricted)
+            elif pick < 0.53 and nesting:
+                body.append( '%sreturn %s;' % (indent, 'result' if retType != 'void' else ''))
+                returns += 1
+            else:
+                body.append( '%sresult += %dU;' % (indent, sx))
+
+        while nesting:
+            nesting -= 1
+            body.append( '%s}' % ('    ' * (nesting + 1)))
+
+        body.append( '    return%s;' % (' result' if retType != 'void' else ''))
+        body.append( '}')
+        returns += 1
+
+        text = '\n'.join( body)
+        self.ents[funcEx]['contents'] = text[len( body[0]):]
+        self.ents[funcEx]['metrics'] = {
+            'CountLine': len( body) - 1,
+            'Cyclomatic': branches + 1,
+            'MaxNesting': maxNesting,
+            }
+        return text
+
+#---------------------------------------------------------------------------------------------------
+class U4cBench:
+    """ Time the U4c load of a project against the replayed DB """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, crp):
+        self.crp = crp
+        self.projFile = PF.ProjectFile( crp)
+        self.projRoot = self.projFile.paths[PF.ePathProject]
+
+    #-----------------------------------------------------------------------------------------------
+    def ClearCache( self):
+        """ remove the function info cache so the next run is a cold one """
+        cache = os.path.join( self.projRoot, u4c.eToolRoot, eCacheName)
+        if os.path.isfile( cache):
+            os.remove( cache)
+
+    #-----------------------------------------------------------------------------------------------
+    def Run( self):
+        """ run the U4c load once, return the tool manager and the total seconds """
+        tool = u4c.U4c( self.projFile, True)
+        # no need to let a GUI catch up
+        tool.Sleep = lambda duration=2: None
+
+        start = time.time()
+        tool.LoadViolations()
+        total = time.time() - start
+
+        tool.log.close()
+        return tool, total
+
+#===================================================================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( description='Time the U4c load against a replayed DB')
+    parser.add_argument( '-files', type=int, default=eDefaultFiles, help='synthetic modules')
+    parser.add_argument( '-funcs', type=int, default=eDefaultFuncs, help='functions per module')
+    parser.add_argument( '-seed', type=int, default=1)
+    parser.add_argument( '-runs', type=int, default=2)
+    parser.add_argument( '-root', help='synthetic project directory (default: a temp dir)')
+    parser.add_argument( '-crp', help='recorded project file')
+    parser.add_argument( '-fixture', help='the fixture recorded from the project DB')
+    args = parser.parse_args()
+
+    tmpRoot = None
+    if args.crp:
+        crp = args.crp
+        if args.fixture:
+            os.environ[understand.eFixtureEnv] = args.fixture
+    else:
+        root = args.root
+        if root is None:
+            tmpRoot = root = tempfile.mkdtemp( prefix='u4cBench')
+        else:
+            root = os.path.abspath( root)
+
+        start = time.time()
+        crp = SyntheticProject( root, args.files, args.funcs, args.seed).Create()
+        print( 'Created %d modules of %d functions in %s (%.1fs)' % (
+            args.files, args.funcs, root, time.time() - start))
+
+    try:
+        bench = U4cBench( crp)
+        bench.ClearCache()
+        for runNr in range( 1, args.runs + 1):
+            tool, total = bench.Run()
+            Report( runNr, tool, total)
+    finally:
+        if tmpRoot:
+            shutil.rmtree( tmpRoot, ignore_errors=True)
@@ -0,0 +1,110 @@
+"""
+U4c Function Info Cache
+This file implements an on-disk cache of the function info U4cDb computes for each source file.
+Entries are keyed by the file name, a hash of the file contents and the Understand build so a
+re-run only has to go to the Understand API for files that actually changed.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import hashlib
+import os
+import pickle
+import sqlite3
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+from utils.DB.sqlLite.database import DB_SQLite
+from utils.SrcCache import srcCache
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eCacheName = r'funcInfo.db'
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def ContentHash( fpfn):
+    """ return the hex digest of the contents of file fpfn, '' if we can't read it """
+    try:
+        src = srcCache.Get( fpfn)
+    except (IOError, OSError):
+        src = None
+
+    return hashlib.md5( src.buf).hexdigest() if src is not None else ''
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class FuncInfoCache( DB_SQLite):
+    """ Persistent per file function info.
+        The function info is stored pickled, so it must not hold any Understand objects
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, cacheRoot, build):
+        DB_SQLite.__init__( self)
+        self.dbName = os.path.join( cacheRoot, eCacheName)
+        self.build = build
+
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.isdir( cacheRoot):
+            try:
+                os.makedirs( cacheRoot)
+            except OSError:
+                # some one running in parallel must have beat us to it
+                pass
+
+        self.Connect( self.dbName)
+        fields = ( 'filename text primary key',
+                   'contentHash text',
+                   'build text',
+                   'data blob',
+                   )
+        query = 'CREATE TABLE if not exists FileFuncInfo(%s)' % ','.join(fields)
+        if self.Execute( query):
+            self.Commit()
+
+    #-----------------------------------------------------------------------------------------------
+    def Get( self, filename, contentHash):
+        """ return the cached function info for filename or None if it is stale/missing """
+        data = None
+
+        if contentHash:
+            s = 'select data from FileFuncInfo where filename=? and contentHash=? and build=?'
+            if self.Execute( s, filename, contentHash, self.build) == 1:
+                row = self.GetOne()
+                if row:
+                    try:
+                        data = pickle.loads( row[0])
+                    except Exception:
+                        data = None
+
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return data
+
+    #-----------------------------------------------------------------------------------------------
+    def Put( self, filename, contentHash, data):
+        """ save the function info for filename """
+        if contentHash:
+            blob = sqlite3.Binary( pickle.dumps( data, pickle.HIGHEST_PROTOCOL))
+            s = """
+                insert or replace into FileFuncInfo (filename, contentHash, build, data)
+                values (?,?,?,?)
+                """
+            self.Execute( s, filename, contentHash, self.build, blob)
+
+    #-----------------------------------------------------------------------------------------------
+    def Stats( self):
+        return 'FuncInfo Cache hits/misses: %d/%d' % (self.hits, self.misses)
@@ -0,0 +1,621 @@
+"""
+U4c Check Phase
+This file holds the Knowlogic checks that do not need the Understand API.  The U4c run is split in
+two phases:
+    1. extraction - single threaded, walks the Understand DB and saves per file/entity facts
+    2. checking   - the facts are checked by a pool of worker processes and the violations are
+                    gathered for one batched write to the violation DB
+
+Nothing in this module may import understand, the workers are started without it.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+from collections import namedtuple, OrderedDict
+
+import hashlib
+import multiprocessing
+import os
+import pickle
+import re
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+from FormatChecker import FormatChecker, formatTemplates, eEngineAutomaton, eMaxKeywordLines
+from tools.u4c.u4cFuncIndex import FuncIndex, eNoFunc
+from tools.u4c.u4cLineScan import LineScan
+from utils.SrcCache import srcCache
+
+import ProjFile as PF
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eToolRoot = r'tool\u4c'
+eDbDetectId = 'Knowlogic'
+
+eFactsName = r'facts.pkl'
+
+# bump when a per file check changes, all the files are checked again
+eCheckLayout = 1
+
+# the checks that can be run on their own and the violationIds (prefixes) each one reports
+eCheckMetrics = 'metrics'
+eCheckFormats = 'formats'
+eCheckNaming = 'naming'
+eCheckRestrictions = 'restrictions'
+eCheckBaseTypes = 'basetypes'
+
+eChecks = OrderedDict( (
+    (eCheckMetrics, ('Metric.',)),
+    (eCheckFormats, ('FileFmt', 'FuncHdr', 'Misc.')),
+    (eCheckNaming, ('Naming.', 'Undefined.')),
+    (eCheckRestrictions, ('Excluded.', 'Restricted.')),
+    (eCheckBaseTypes, ('BaseType',)),
+    ))
+
+# the violationIds the per file checks report, see FileChecker and ViolationDb.eMetricRules
+eFileCheckIds = eChecks[eCheckMetrics] + eChecks[eCheckFormats]
+
+# the function metric limits checked in SQL: project metric -> FunctionMetrics column
+eFuncMetricLimits = OrderedDict( (
+    (PF.eMetricFunc, 'countLine'),
+    (PF.eMetricMcCabe, 'cyclomatic'),
+    (PF.eMetricNesting, 'maxNesting'),
+    (PF.eMetricReturns, 'returns'),
+    ))
+
+# below this many jobs starting a pool costs more than it saves
+eMinPoolJobs = 16
+eNameChunk = 500
+
+# per file facts
+#   funcInfo: the U4cDb function info for the file (no Understand objects)
+#   contentHash: the hash of the file contents the facts were taken from
+FileFacts = namedtuple( 'FileFacts', 'fpfn rpfn fn funcInfo contentHash')
+
+# per named entity facts
+#   kind: Var, Func, Def, Enum
+#   parent: full path name of the parent, None if it has no parent
+#   defLoc/decLoc: (fpfn, line) of the define/declare ref, None if there is none
+NameFacts = namedtuple( 'NameFacts', 'kind longname name func parent defLoc decLoc')
+
+# per object facts for the base type check
+#   type: the Understand type string, None if it has none
+#   defLoc: (fpfn, line) where the object is declared (or defined), None for a library object
+TypeFacts = namedtuple( 'TypeFacts', 'name type kindname defLoc')
+
+eNamingKeys = {
+    'Var': PF.eNameVar,
+    'Func': PF.eNameFunc,
+    'Def': PF.eNameDef,
+    'Enum': PF.eNameEnum,
+}
+
+# worker process state, see InitWorker
+workerState = {}
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def ReadLineN( projFile, filename, lineNumber):
+    """ return the text of 'lineNumber' in file 'filename'
+    """
+    fpfn = filename if os.path.isfile( filename) else None
+    if fpfn is None:
+        fullPathName = projFile.FullPathName( filename)
+        # TODO: handle non-unique filenames in different srcRoots
+        fpfn = fullPathName[0] if fullPathName else None
+
+    txt = srcCache.GetLine( fpfn, lineNumber) if fpfn else None
+    if txt is None:
+        txt = 'Filename: %s does not exist or has been moved.'
+    return txt
+
+#-----------------------------------------------------------------------------------------------
+def SaveFacts( fpfn, facts):
+    """ save the extracted facts so they can be checked again without Understand """
+    f = open( fpfn, 'wb')
+    pickle.dump( facts, f, pickle.HIGHEST_PROTOCOL)
+    f.close()
+
+#-----------------------------------------------------------------------------------------------
+def LoadFacts( fpfn):
+    """ load the facts saved by the last run, None if there are none """
+    facts = None
+    if os.path.isfile( fpfn):
+        f = open( fpfn, 'rb')
+        try:
+            facts = pickle.load( f)
+        except Exception:
+            facts = None
+        f.close()
+    return facts
+
+#-----------------------------------------------------------------------------------------------
+def CheckConfigHash( projFile, settings=''):
+    """ return the hash of the project config the per file checks depend on, settings holds
+        anything else that changes the facts (i.e., the Understand settings)
+    """
+    config = [eCheckLayout, settings,
+              sorted( projFile.metrics.items()),
+              sorted( (k, str( v)) for k, v in projFile.formats.items()),
+              sorted( (k, str( v)) for k, v in getattr( projFile, 'rawFormats', {}).items())]
+    return hashlib.md5( repr( config).encode( 'utf-8')).hexdigest()
+
+#-----------------------------------------------------------------------------------------------
+def SelectChecks( checks=None, violationIds=None):
+    """ Resolve a selection of check names and/or violationId prefixes
+        returns (checks, violationIds) the checks to run and the violationIds they are to report,
+        (None, None) means everything
+    """
+    checks = list( checks or [])
+    violationIds = list( violationIds or [])
+
+    for check in checks:
+        if check not in eChecks:
+            raise ValueError( 'Unknown check <%s> use one of: %s' % (check, ', '.join( eChecks)))
+
+    if not checks and not violationIds:
+        return None, None
+
+    # the checks that report a requested violationId
+    for vid in violationIds:
+        owners = [c for c in eChecks
+                  if [p for p in eChecks[c] if vid.startswith( p) or p.startswith( vid)]]
+        if not owners:
+            raise ValueError( 'No check reports violationId <%s>' % vid)
+        checks.extend( [c for c in owners if c not in checks])
+
+    if not violationIds:
+        for check in checks:
+            violationIds.extend( eChecks[check])
+
+    return set( checks), violationIds
+
+#-----------------------------------------------------------------------------------------------
+def CompileFormats( projFile):
+    """ compile the format descriptions of the project once, returns [(desc, rawDesc, template)]
+        so the templates can be handed to the worker processes
+    """
+    rawFormats = getattr( projFile, 'rawFormats', {})
+    templates = []
+    for name in sorted( projFile.formats):
+        desc = projFile.formats[name]
+        rawDesc = rawFormats.get( name, '')
+        # only the text descriptions are format checked (i.e., not the naming settings)
+        if not isinstance( desc, str) or not isinstance( rawDesc, str):
+            continue
+        templates.append( (desc, rawDesc, formatTemplates.Get( desc, rawDesc)))
+    return templates
+
+#-----------------------------------------------------------------------------------------------
+def InitWorker( projFile, updateTime, detectedBy, fileChecks=None, templates=()):
+    """ set up the check objects once per worker process """
+    for desc, rawDesc, template in templates:
+        formatTemplates.Put( desc, rawDesc, template)
+
+    workerState['files'] = FileChecker( projFile, updateTime, detectedBy, fileChecks)
+    workerState['names'] = NameChecker( projFile, updateTime, detectedBy)
+
+#-----------------------------------------------------------------------------------------------
+def CheckFileWorker( facts):
+    return workerState['files'].Check( facts)
+
+#-----------------------------------------------------------------------------------------------
+def CheckNamesWorker( factsList):
+    return workerState['names'].Check( factsList)
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class ViolationList:
+    """ Collect violations with the same interface as ViolationDb.Insert, a worker returns them
+        to the main process which inserts them into the DB
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self):
+        self.violations = []
+
+    #-----------------------------------------------------------------------------------------------
+    def __len__( self):
+        return len( self.violations)
+
+    #-----------------------------------------------------------------------------------------------
+    def Insert( self, fName, func, sev, violationId, desc, details, line, detectedBy, updateTime):
+        self.violations.append( (fName, func, sev, violationId, desc, details, line,
+                                 detectedBy, updateTime))
+
+#---------------------------------------------------------------------------------------------------
+class CheckRunner:
+    """ Map check jobs over a process pool, or in this process when a pool is not worth it
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, projFile, updateTime, detectedBy, jobCount, fileChecks=None):
+        self.pool = None
+
+        # the format descriptions are parsed here once, not in each worker
+        templates = CompileFormats( projFile)
+
+        workers = multiprocessing.cpu_count()
+        if workers > 1 and jobCount >= eMinPoolJobs:
+            try:
+                self.pool = multiprocessing.Pool( workers, InitWorker,
+                                                  (projFile, updateTime, detectedBy, fileChecks,
+                                                   templates))
+            except (OSError, ValueError, TypeError, pickle.PicklingError):
+                self.pool = None
+
+        if self.pool is None:
+            InitWorker( projFile, updateTime, detectedBy, fileChecks)
+
+        self.workers = workers if self.pool else 1
+
+    #-----------------------------------------------------------------------------------------------
+    def Map( self, func, jobs, chunksize=1):
+        """ return an iterator over the results of func for each job, in job order """
+        if self.pool is not None:
+            return self.pool.imap( func, jobs, chunksize)
+        return map( func, jobs)
+
+    #-----------------------------------------------------------------------------------------------
+    def Close( self, abort=False):
+        if self.pool is not None:
+            if abort:
+                self.pool.terminate()
+            else:
+                self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+#---------------------------------------------------------------------------------------------------
+class FileChecker:
+    """ The per file checks
+        1. file length
+        2. line checks and the file format
+        3. function header format
+        The function metric limits are checked in SQL, see ViolationDb.CheckFunctionMetrics
+        checks: the file checks to run (eCheckMetrics, eCheckFormats), None for both
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, projFile, updateTime, detectedBy, checks=None):
+        self.projFile = projFile
+        self.updateTime = updateTime
+        self.detectedBy = detectedBy
+        self.vDb = ViolationList()
+
+        self.doMetrics = checks is None or eCheckMetrics in checks
+        self.doFormats = checks is None or eCheckFormats in checks
+
+        # in the function header we look for important items
+        fhDesc = self.projFile.formats[PF.eFmtFunction]
+        fhRawDesc = self.projFile.rawFormats[PF.eFmtFunction]
+        self.fhFc = FormatChecker( detectedBy, updateTime, fhDesc, fhRawDesc)
+
+    #-----------------------------------------------------------------------------------------------
+    def Check( self, facts):
+        """ run all the checks on one file, returns the violation list """
+        self.vDb = ViolationList()
+
+        fileLimit = self.projFile.metrics[PF.eMetricFile]
+        lines = self.projFile.GetFileContents( facts.fpfn)
+
+        # check to file size violation
+        fileSize = len(lines)
+        if fileSize > fileLimit and self.doMetrics:
+            line = fileSize
+            severity = 'Error'
+            violationId = 'Metric.File'
+            desc = 'File Length Exceeded: %s total lines %d' % (facts.fn, fileSize)
+            details = 'Total line count exceeds project maximum %d' % (fileLimit)
+            self.vDb.Insert( facts.rpfn, eNoFunc, severity, violationId, desc,
+                             details, line, self.detectedBy, self.updateTime)
+
+        # check the length of each line
+        self.CheckLine( facts.fpfn, facts.rpfn, FuncIndex( facts.funcInfo), lines)
+
+        # check the function headers
+        if self.doFormats:
+            self.FunctionHeaderFormat( facts.rpfn, facts.funcInfo)
+
+        return self.vDb.violations
+
+    #-----------------------------------------------------------------------------------------------
+    def CheckLine(self, fpfn, rpfn, funcIndex, lines):
+        """ Analyze for:
+        1. Lines exceed the max line length
+        2. Lines with the word TODO, TBD
+        3. No tabs in the file
+        report the line number(s) for the above
+        """
+        # File Specific keywords
+        eFileName = '<TheFileName>'
+        eTheDescription = '<TheDescription>'
+        # leave these - PCLint should report these may need to do some work on it
+        eLocalFuncProto = '<TheLocalFunctionPrototypes>'
+        eLocalFunctions = '<TheLocalFunctions>'
+        eGlobalFunctions = '<TheGlobalFunctions>'
+
+        # check all line lengths
+        fn = os.path.split(rpfn)[1]
+        lineLimit = self.projFile.metrics[PF.eMetricLine]
+
+        #--------------------------------- init the file format check
+        # determine file type c/h
+        ext = os.path.splitext( rpfn)[1]
+        # build format name
+        fmtName = 'File_%s' % ext.replace('.','').upper()
+        fileDescLines = self.projFile.formats.get( fmtName, '')
+        rawDescLines = self.projFile.rawFormats.get( fmtName, '')
+        fc = FormatChecker( self.detectedBy, self.updateTime, fileDescLines, rawDescLines,
+                            eEngineAutomaton, eMaxKeywordLines)
+
+        # feed the file format checker, the header items are usually all found in the first lines
+        if self.doFormats:
+            for lx, line in enumerate( lines):
+                fc.CheckLine( lx, line)
+                if fc.IsDone():
+                    break
+
+        # whole file scan, only lines with a hit come back to us
+        scan = LineScan( fpfn, lineLimit)
+        for lx in scan.HitLineIndexes():
+            u4cLine = lx + 1 # U4C refs start at line 1
+            func = funcIndex.FuncAt( u4cLine)
+
+            if lx in scan.longLines and self.doMetrics:
+                txt = scan.longLines[lx]
+                severity = 'Warning'
+                violationId = 'Metric.Line'
+                desc = 'Line Length in %s line %d' % (fn, lx)
+                details = '%3d: %s' % (len(txt), txt.strip())
+                self.vDb.Insert( rpfn, func, severity, violationId, desc,
+                                 details, u4cLine, self.detectedBy, self.updateTime)
+
+            # check for TO-DO or T.B.D.
+            if lx in scan.todoLines and self.doFormats:
+                txt = scan.todoLines[lx]
+                severity = 'Info'
+                violationId = 'Misc.TODO'
+                desc = 'Line contains TODO/TBD %s line %d' % (fn, lx)
+                details = '%s' % (txt.strip())
+                self.vDb.Insert( rpfn, func, severity, violationId, desc,
+                                 details, u4cLine, self.detectedBy, self.updateTime)
+
+            # check for tabs
+            if lx in scan.tabLines and self.doFormats:
+                txt = scan.tabLines[lx]
+                severity = 'Error'
+                violationId = 'Misc.TAB'
+                desc = 'Line contains TAB(s) %s line %d' % (fn, lx)
+                details = '%s' % (txt.strip())
+                self.vDb.Insert( rpfn, func, severity, violationId, desc,
+                                 details, u4cLine, self.detectedBy, self.updateTime)
+
+        if not self.doFormats:
+            return
+
+        # check any lines remaining in the line buffer
+        fc.FinishBuffer()
+
+        #------------------------------------------------- report and file format errors
+        fc.ReportErrors( self.vDb, rpfn, -1, 'File Format', rpfn, 'FileFmt')
+
+        # check for the filename being were it is supposed to be
+        keyItems = fc.GetKeywordItems( eFileName)
+        if keyItems:
+            for item in keyItems:
+                keyInfo = item.keywords[eFileName]
+                text = '\n'.join(keyInfo.lines)
+                if text.lower().find( fn.lower()) == -1:
+                    # no mention of file name
+                    severity = 'Error'
+                    violationId = 'FileFmt.FileName'
+                    func = 'N/A'
+                    desc = 'Missing Filename near line %d' % keyInfo.line0
+                    details = 'Expected filename at line %d [Item %d]' % (keyInfo.line0,
+                                                                          item.itemId)
+                    self.vDb.Insert( rpfn, func, severity, violationId,
+                                     desc, details, keyInfo.line0, self.detectedBy, self.updateTime)
+
+        # check for a file description
+        keyItems = fc.GetKeywordItems( eTheDescription)
+        if keyItems:
+            for item in keyItems:
+                keyInfo = item.keywords[eTheDescription]
+                text = '\n'.join(keyInfo.lines)
+                rawText = item.JoinRaw()
+                replaceTxt = rawText.replace( eTheDescription, '').strip()
+                text = text.replace( replaceTxt, '').strip()
+                if not text:
+                    # no mention of file name
+                    severity = 'Error'
+                    violationId = 'FileFmt.NoDesc'
+                    func = 'N/A'
+                    desc = 'Missing File Desc near line %d' % keyInfo.line0
+                    details = 'Expected file description at line %d [Item %d]' % (keyInfo.line0,
+                                                                                  item.itemId)
+                    self.vDb.Insert( rpfn, func, severity, violationId,
+                                     desc, details, keyInfo.line0, self.detectedBy, self.updateTime)
+
+    #-----------------------------------------------------------------------------------------------
+    def FunctionHeaderFormat(self, rpfn, funcInfo):
+        """ Verify the function header format and content
+            keywords:
+                <TheFunctionName> matches the current functions name
+                <TheParameters> names of parameters must match, void matches empty string
+                <TheReturnType> names the return type, void matches empty string
+
+        """
+        # Function Header Specific keywords
+        eFunctionName = '<TheFunctionName>'
+        eParams = '<TheParameters>'
+        eParamsIn = '<TheParametersIn>'
+        eParamsOut = '<TheParametersOut>'
+        eParamsInOut = '<TheParametersInOut>'
+        eReturnType = '<TheReturnType>'
+
+        fc = self.fhFc
+
+        for func in funcInfo:
+            # get function info
+            fi = funcInfo[func]
+            hdr = fi['header']
+            params = fi['parameters']
+            lineNum = fi['start']
+
+            # header split by line
+            if hdr:
+                hdrLines = hdr.split('\n')
+                fc.Check(hdr)
+                fc.ReportErrors( self.vDb, rpfn, lineNum, 'Function Header',
+                                 func, 'FuncHdr')
+            else:
+                # No function header
+                severity = 'Error'
+                violationId = 'FuncHdr.NoHeader'
+                desc = 'Function Header %s is missing' % (func)
+                details = 'N/A'
+                self.vDb.Insert(rpfn, func, severity, violationId, desc,
+                                details, lineNum, self.detectedBy, self.updateTime)
+                continue
+
+            # is the function name supposed to be in the header?
+            keyItems = fc.GetKeywordItems(eFunctionName)
+            if keyItems:
+                for item in keyItems:
+                    keyInfo = item.keywords[eFunctionName]
+                    searchIn = '\n'.join(keyInfo.lines)
+                    if searchIn.find( func) == -1:
+                        severity = 'Error'
+                        violationId = 'FuncHdr.FuncName'
+                        desc = 'Function Name %s Missing in header' % func
+                        details = 'Expected at offset %d of %d lines' % (keyInfo.line0, len(hdrLines))
+                        self.vDb.Insert(rpfn, func, severity, violationId, desc,
+                                        details, lineNum, self.detectedBy, self.updateTime)
+
+            # check parameters - if requested and collect associated lines
+            # TODO: detect actual out param types *, & report misplaced comments
+            expectParams = False
+            paramLines = []
+            for p in (eParams, eParamsIn, eParamsOut, eParamsInOut):
+                keyItems = fc.GetKeywordItems(p)
+                for item in keyItems:
+                    expectParams = True
+                    paramLines.extend( item.keywords[p].lines)
+
+            # collect any lines associated with parameters and see if all the params are defined
+            if expectParams:
+                searchIn = '\n'.join( paramLines)
+                for px,p in enumerate(params):
+                    if searchIn.find( p) == -1:
+                        severity = 'Error'
+                        violationId = 'FuncHdr.Param'
+                        desc = 'Function Header %s Missing Param %s' % (func, p)
+                        details = 'Parameter <%s> not in description' % p
+                        self.vDb.Insert(rpfn, func, severity, violationId, desc,
+                                        details, lineNum, self.detectedBy, self.updateTime)
+
+            # check return type - if requested
+            keyItems = fc.GetKeywordItems(eReturnType)
+            for item in keyItems:
+                searchIn = '\n'.join(item.keywords[eReturnType].lines)
+                rawText = item.JoinRaw()
+                rtnLineDesc = rawText.replace(eReturnType, '')
+                searchIn = searchIn.replace( rtnLineDesc, '').strip()
+                if not searchIn and fi['returnType'] != 'void':
+                    severity = 'Error'
+                    violationId = 'FuncHdr.Return'
+                    desc = 'Function Header %s Missing return info' % (func)
+                    details = 'Function header consists of %d lines' % len(hdrLines)
+                    self.vDb.Insert(rpfn, func, severity, violationId, desc,
+                                    details, lineNum, self.detectedBy, self.updateTime)
+
+#---------------------------------------------------------------------------------------------------
+class NameChecker:
+    """ The naming checks for Variables, Functions, Defines and Enums
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, projFile, updateTime, detectedBy):
+        self.projFile = projFile
+        self.updateTime = updateTime
+        self.detectedBy = detectedBy
+
+        # kind -> (regex, max length)
+        self.rules = {}
+        for kind in eNamingKeys:
+            size, fmt = self.projFile.naming[eNamingKeys[kind]]
+            try:
+                self.rules[kind] = (re.compile( fmt), size)
+            except re.error:
+                self.rules[kind] = None
+
+    #-----------------------------------------------------------------------------------------------
+    def Check( self, factsList):
+        """ check a list of NameFacts
+            returns: violations, {kind: [good, bad, badNr, libItem]}, log lines
+        """
+        vDb = ViolationList()
+        stats = {}
+        log = []
+
+        for facts in factsList:
+            counts = stats.setdefault( facts.kind, [0, 0, 0, 0])
+            rule = self.rules[facts.kind]
+            if rule is None:
+                continue
+            theRe, maxLength = rule
+
+            # don't report library file problems
+            if facts.parent and not self.projFile.IsLibraryFile( facts.parent):
+                defLoc = facts.defLoc
+
+                # log a declared but not defined variable
+                if defLoc is None and facts.decLoc is not None:
+                    violationId = 'Undefined.%s' % (facts.kind)
+                    defLoc = facts.decLoc
+                    fpfn, decLine = facts.decLoc
+                    rpfn, fn = self.projFile.RelativePathName(fpfn)
+                    desc = '%s not defined: %s declared at line %d' % (facts.longname,
+                                                                       facts.name,
+                                                                       decLine)
+                    details = ReadLineN( self.projFile, fpfn, decLine)
+                    # TODO: remove if U4C responds with a fix
+                    # PWC Specific
+                    if details.strip().find('EXPORT') != 0:
+                        vDb.Insert( rpfn, 'N/A', 'Error', violationId, desc,
+                                    details, decLine, self.detectedBy, self.updateTime)
+
+                match = theRe.match( facts.name)
+                iLen = len(facts.name)
+                tooBig = iLen > maxLength
+                if not match or tooBig:
+                    counts[1] += 1
+                    severity = 'Error'
+                    violationId = 'Naming.%s' % facts.kind
+
+                    if defLoc is not None:
+                        fpfn, defLine = defLoc
+                        rpfn, fn = self.projFile.RelativePathName(fpfn)
+                        dispName = '%s%s' % (facts.name, '(Len:%d)' % iLen if tooBig else '')
+                        desc = '%s naming error: %s defined at line %d' % (facts.longname,
+                                                                           dispName,
+                                                                           defLine)
+                        details = ReadLineN( self.projFile, fpfn, defLine)
+                        vDb.Insert( rpfn, facts.func, severity, violationId, desc,
+                                    details, defLine, self.detectedBy, self.updateTime)
+                    else:
+                        counts[2] += 1
+                        log.append('CheckBadNr %s - %s' % (facts.kind, facts.name))
+                else:
+                    counts[0] += 1
+            else:
+                counts[3] += 1
+                log.append('CheckLib %s - %s' % (facts.kind, facts.name))
+
+        return vDb.violations, stats, log
@@ -19,6 +19,10 @@ import understand
 #---------------------------------------------------------------------------------------------------
 # Knowlogic Modules
 #---------------------------------------------------------------------------------------------------
+from tools.u4c.u4cCache import FuncInfoCache, ContentHash
+from tools.u4c.u4cDigest import FileDigest
+from tools.u4c.u4cFuncIndex import FuncIndex
+from tools.u4c.u4cMetrics import MetricsExport, eMetricsName, eFuncMetrics
 
 #---------------------------------------------------------------------------------------------------
 # Data
@@ -37,6 +41,9 @@ eFiReturnType = 'returnType'
 
 eFiMxLines = 'CountLine'
 
+# bump when the layout of the cached file data changes
+eCacheLayout = 4
+
 #---------------------------------------------------------------------------------------------------
 # Functions
 #---------------------------------------------------------------------------------------------------
@@ -49,7 +56,11 @@ class U4cDb:
     Class description
     """
     #-----------------------------------------------------------------------------------------------
-    def __init__(self, name):
+    def __init__(self, name, stamp='', keywords=()):
+        """ stamp: what the analysis of a file depends on besides the file itself (see
+            U4c.UdbStamp), the cached function info of another stamp is not used
+            keywords: the keywords whose lines are kept in the file digests besides return
+        """
         # two tries to open the DB
         self.db = None
         tryCount = 0
@@ -67,6 +78,27 @@ class U4cDb:
 
         # hold function info for all requested functions
         self.fileFuncInfo = {}
+        # line -> function interval index for each file in fileFuncInfo
+        self.fileFuncIndex = {}
+        # token stream digest and full path for each file in fileFuncInfo
+        self.fileDigest = {}
+        self.fileFullPath = {}
+        self.keywords = tuple( sorted( set( keywords)))
+
+        # persistent function info, reused across runs for unchanged files
+        self.funcCache = None
+        if self.db is not None:
+            try:
+                build = str( understand.version())
+            except AttributeError:
+                build = ''
+            build = '%s/%s/%s/%d' % (build, stamp, ','.join( self.keywords), eCacheLayout)
+            self.funcCache = FuncInfoCache( os.path.split( name)[0], build)
+
+        # the function metrics exported by the batch run, metric() is only asked when missing
+        self.metricsExport = MetricsExport( os.path.join( os.path.split( name)[0], eMetricsName))
+        self.metricHits = 0
+        self.metricCalls = 0
 
     #-----------------------------------------------------------------------------------------------
     def __del__(self):
@@ -77,6 +109,9 @@ class U4cDb:
 
     #-----------------------------------------------------------------------------------------------
     def Close(self):
+        if self.funcCache is not None:
+            self.funcCache.Close()
+            self.funcCache = None
         self.db.close()
 
     #-----------------------------------------------------------------------------------------------
@@ -105,32 +140,47 @@ class U4cDb:
     #-----------------------------------------------------------------------------------------------
     def GetFileFunctionInfo(self, filename):
         """ return the function info for all function in a file
+            Function info is served from the persistent cache when the file contents and the
+            Understand build are unchanged since it was computed, the file digest is cached with it
         """
         funcInfo = {}
+        digest = None
 
         if filename not in self.fileFuncInfo:
             fileEnt = self.GetFileEnt( filename)
 
             if fileEnt is not None:
-                functions = fileEnt.ents( 'Define', 'Function')
+                fpfn = fileEnt.longname()
 
                 # incase someone deleted the file let's check
-                if os.path.isfile( fileEnt.longname()):
-                    lxr = fileEnt.lexer()
-                    returnsAt = self.GetReturnsInFile( lxr)
-
-                    for f in functions:
-                        funcInfo[f.name()] = self.GetFuncInfo( f, returnsAt)
-                        funcInfo[f.name()][eFiFullPath] = self.GetFileEnt( filename).longname()
+                if os.path.isfile( fpfn):
+                    contentHash = ContentHash( fpfn)
+                    cached = self.funcCache.Get( fpfn, contentHash)
+                    if cached is None:
+                        funcInfo = {}
+                        functions = fileEnt.ents( 'Define', 'Function')
+                        # the only walk of the lexer for this file
+                        digest = FileDigest( fileEnt.lexer(), self.keywords)
+
+                        for f in functions:
+                            funcInfo[f.name()] = self.GetFuncInfo( f, digest)
+                            funcInfo[f.name()][eFiFullPath] = fpfn
+
+                        self.funcCache.Put( fpfn, contentHash, (funcInfo, digest))
+                    else:
+                        funcInfo, digest = cached
 
                     self.fileFuncInfo[filename] = funcInfo
+                    self.fileFuncIndex[filename] = FuncIndex( funcInfo)
+                    self.fileDigest[filename] = digest
+                    self.fileFullPath[filename] = fpfn
         else:
             funcInfo = self.fileFuncInfo[filename]
 
         return funcInfo
 
     #-----------------------------------------------------------------------------------------------
-    def GetFuncInfo(self, function, returnsAt):
+    def GetFuncInfo(self, function, digest):
         """ This function returns the following data about all of the functions within a file
             Function Header
             Content
@@ -142,10 +192,10 @@ class U4cDb:
         info[eFiHeader] = function.comments('before')
         info[eFiContent] = function.contents()
 
-        metrics = function.metric( function.metrics())
-
         # find the start, end line of the functions
         defFile, defLine = self.RefAt( function)
+
+        metrics = self.GetFuncMetrics( function, defFile)
         info[eFiStart] = defLine
         info[eFiEnd] = info[eFiStart] + (metrics[eFiMxLines] - 1)
 
@@ -165,16 +215,44 @@ class U4cDb:
         # declare/define
         decFile, decLine = self.RefAt( function, 'Declare')
         defFile, defLine = self.RefAt( function, 'Define')
+        # keep file names not ents so the info can be cached
+        decFile = decFile.longname() if decFile else ''
+        defFile = defFile.longname() if defFile else ''
         info[eDeclareDefine] = ((decFile, decLine), (defFile, defLine))
 
         # count how many returns there are in the functions
-        info[eFiReturns] = 0
-        for l in returnsAt:
-            if l >= info[eFiStart] and l <= info[eFiEnd]:
-                info[eFiReturns] += 1
+        info[eFiReturns] = digest.ReturnsIn( info[eFiStart], info[eFiEnd])
 
         return info
 
+    #-----------------------------------------------------------------------------------------------
+    def GetFuncMetrics(self, function, defFile):
+        """ return the function metrics we check from the metrics export, when the export does
+            not have the function ask Understand for just those metrics
+        """
+        metrics = None
+        if self.metricsExport.isValid:
+            fpfn = defFile.longname() if defFile else ''
+            metrics = self.metricsExport.Lookup( function.longname(), fpfn)
+            if metrics is None and function.longname() != function.name():
+                metrics = self.metricsExport.Lookup( function.name(), fpfn)
+
+        if metrics is None:
+            self.metricCalls += 1
+            metrics = function.metric( eFuncMetrics)
+        else:
+            self.metricHits += 1
+            metrics = dict( metrics)
+
+        return metrics
+
+    #-----------------------------------------------------------------------------------------------
+    def CacheStats(self):
+        """ report the function info cache hit/miss counts """
+        stats = self.funcCache.Stats() if self.funcCache else 'FuncInfo Cache: not open'
+        stats += ', Metrics export/metric(): %d/%d' % (self.metricHits, self.metricCalls)
+        return stats
+
     #-----------------------------------------------------------------------------------------------
     def GetItemRefs(self, itemName, kindIs = None):
         """ Search the udb for an object named itemname
@@ -195,37 +273,43 @@ class U4cDb:
         return itemRefs
 
     #-----------------------------------------------------------------------------------------------
-    def GetReturnsInFile(self, lxr):
-        """ return a list of line numbers where a return statement is performed in a function
-        - the lxr is the function of interest
+    def GetFileDigest(self, filename):
+        """ return the token digest for a filename, None if Understand does not know the file
         """
-        returnsAt = []
-        for l in lxr:
-            if l.text() == 'return':
-                returnsAt.append( l.line_begin())
+        if filename not in self.fileDigest:
+            self.GetFileFunctionInfo( filename)
 
-        return returnsAt
+        return self.fileDigest.get( filename)
 
     #-----------------------------------------------------------------------------------------------
-    def InFunction(self, filename, line):
-        """ This funtion returns the function that contains a line number in a filename
+    def GetKeywordRefs(self, filename, keyword):
+        """ return the (fpfn, line) of each use of keyword in filename
         """
-        if filename not in self.fileFuncInfo:
+        refs = []
+        digest = self.GetFileDigest( filename)
+        if digest is not None:
+            fpfn = self.fileFullPath[filename]
+            refs = [(fpfn, line) for line in digest.KeywordLines( keyword)]
+
+        return refs
+
+    #-----------------------------------------------------------------------------------------------
+    def GetFuncIndex(self, filename):
+        """ return the function interval index for a filename
+        """
+        if filename not in self.fileFuncIndex:
             funcInfo = self.GetFileFunctionInfo( filename)
-            if funcInfo:
-                self.fileFuncInfo[filename] = funcInfo
-        else:
-            funcInfo = self.fileFuncInfo[filename]
+            if filename not in self.fileFuncIndex:
+                # no function info available for this file
+                return FuncIndex( funcInfo)
 
-        theFunc = 'N/A'
-        info = {}
-        for func in funcInfo:
-            info = funcInfo[func]
-            if info[eFiStart] <= line <= info[eFiEnd]:
-                theFunc = func
-                break
+        return self.fileFuncIndex[filename]
 
-        return theFunc, info
+    #-----------------------------------------------------------------------------------------------
+    def InFunction(self, filename, line):
+        """ This funtion returns the function that contains a line number in a filename
+        """
+        return self.GetFuncIndex( filename).InFunction( line)
 
     #-----------------------------------------------------------------------------------------------
     def RefAt(self, item, refType = 'Define'):
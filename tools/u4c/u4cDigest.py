@@ -0,0 +1,65 @@
+"""
+U4c File Token Digest
+This file implements a digest of the Understand token stream of a source file.  The lexer is walked
+once per file and the lines of the keywords the checks need are kept: return (the return points of
+each function) and the keywords a project excludes (e.g., register, goto).
+
+The digest holds no Understand objects so it can be pickled into the function info cache.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eTokKeyword = 'Keyword'
+
+eReturn = 'return'
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class FileDigest:
+    """ One pass summary of the lexer of a file
+        keywords: {keyword: [line, ...]} for return and the keywords asked for
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, lxr, keywords=()):
+        self.keywords = {}
+
+        wanted = set( keywords)
+        wanted.add( eReturn)
+
+        for l in lxr:
+            if l.token() == eTokKeyword:
+                text = l.text()
+                if text in wanted:
+                    self.keywords.setdefault( text, []).append( l.line_begin())
+
+    #-----------------------------------------------------------------------------------------------
+    def KeywordLines( self, keyword):
+        """ return the lines holding keyword """
+        return self.keywords.get( keyword, [])
+
+    #-----------------------------------------------------------------------------------------------
+    def Returns( self):
+        """ return the lines holding a return statement """
+        return self.KeywordLines( eReturn)
+
+    #-----------------------------------------------------------------------------------------------
+    def ReturnsIn( self, start, end):
+        """ count the return statements between lines start and end """
+        return len( [l for l in self.Returns() if start <= l <= end])
@@ -0,0 +1,74 @@
+"""
+Function Interval Index
+This file implements a per file index of function line spans so finding the function that holds a
+line is a bisect rather than a scan of every function in the file.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import bisect
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eNoFunc = 'N/A'
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class FuncIndex:
+    """ Sorted interval index over the functions of one file
+        funcInfo: {funcName: {'start': line, 'end': line, ...}}
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, funcInfo):
+        self.funcInfo = funcInfo
+
+        # sort by start, outer spans before the spans they contain
+        spans = [(funcInfo[f]['start'], -funcInfo[f]['end'], f) for f in funcInfo]
+        spans.sort()
+
+        self.starts = [s for s, e, f in spans]
+        self.ends = [-e for s, e, f in spans]
+        self.names = [f for s, e, f in spans]
+
+        # parent[i] is the closest earlier span that encloses span i (-1 if none), this lets a
+        # lookup step out of a nested span that ends before the line of interest
+        self.parent = []
+        stack = []
+        for ix in range( len( spans)):
+            while stack and self.ends[stack[-1]] < self.starts[ix]:
+                stack.pop()
+            self.parent.append( stack[-1] if stack else -1)
+            stack.append( ix)
+
+    #-----------------------------------------------------------------------------------------------
+    def __len__( self):
+        return len( self.starts)
+
+    #-----------------------------------------------------------------------------------------------
+    def FuncAt( self, line):
+        """ return the name of the innermost function holding line, 'N/A' if none """
+        ix = bisect.bisect_right( self.starts, line) - 1
+        while ix != -1 and self.ends[ix] < line:
+            ix = self.parent[ix]
+
+        return self.names[ix] if ix != -1 else eNoFunc
+
+    #-----------------------------------------------------------------------------------------------
+    def InFunction( self, line):
+        """ return the function name and its info for the function holding line """
+        func = self.FuncAt( line)
+        return func, self.funcInfo.get( func, {})
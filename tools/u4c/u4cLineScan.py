@@ -0,0 +1,125 @@
+"""
+Source File Line Scanner
+This file implements a whole file scan for the simple line checks (line length, TODO/TBD, TABs).
+The file is taken from the source cache (read once) and searched with compiled byte
+regexes, line numbers are then resolved from its line offset array.  Only lines that hit one of the
+checks are decoded and looked at in Python.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import re
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+from utils.SrcCache import srcCache
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+# candidate searches over the whole buffer, every hit is verified on the decoded line
+eTodoBufRe = re.compile( br'(?:todo|tbd)[: ]', re.I)
+eTodoAnyBufRe = re.compile( br'todo|tbd', re.I)
+eTabBufRe = re.compile( br'\t')
+
+# the per line checks, applied to hit lines only
+eTodoRe = re.compile( r' ?todo[: ]+')
+eTbdRe = re.compile( r' ?tbd[: ]+')
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class LineScan:
+    """ Scan a file for the Metric.Line, Misc.TODO and Misc.TAB hits
+        All line indexes are 0 based (i.e., the same as enumerate(f.readlines()))
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, fpfn, lineLimit):
+        self.fpfn = fpfn
+        self.lineLimit = lineLimit
+
+        self.lineCount = 0
+        self.longLines = {}  # lx -> text
+        self.todoLines = {}  # lx -> text
+        self.tabLines = {}   # lx -> text
+
+        self.src = srcCache.Get( fpfn)
+        if self.src is not None:
+            self.lineCount = self.src.lineCount
+            if self.src.size > 0:
+                self.Scan()
+
+    #-----------------------------------------------------------------------------------------------
+    def Scan( self):
+        """ compute all the hit sets for the file """
+        buf = self.src.buf
+        size = len( buf)
+        newLines = self.src.newLines
+
+        # long lines: compare the raw byte length, trailing white space is removed on verify
+        if numpy is not None:
+            starts = numpy.concatenate( ([0], newLines + 1))
+            ends = numpy.concatenate( (newLines, [size]))
+            longAt = numpy.flatnonzero( (ends - starts) > self.lineLimit)
+            longAt = [int(lx) for lx in longAt if lx < self.lineCount]
+        else:
+            longRe = re.compile( br'(?:^|(?<=\r))[^\r\n]{%d,}' % (self.lineLimit + 1), re.M)
+            longAt = [self.src.LineOf( m.start()) for m in longRe.finditer( buf)]
+
+        for lx in longAt:
+            txt = self.Text( lx)
+            if len( txt) > self.lineLimit:
+                self.longLines[lx] = txt
+
+        # TODO/TBD
+        for lx in self.HitLines( eTodoBufRe, buf):
+            txt = self.Text( lx)
+            txtl = txt.lower()
+            if eTodoRe.search( txtl) or eTbdRe.search( txtl):
+                self.todoLines[lx] = txt
+
+        # TABs - only reported when the line also mentions todo/tbd
+        tabAt = self.HitLines( eTabBufRe, buf)
+        if tabAt:
+            tabAt &= self.HitLines( eTodoAnyBufRe, buf)
+        for lx in tabAt:
+            txt = self.Text( lx)
+            if txt.find('\t') != -1:
+                txtl = txt.lower()
+                if txtl.find('todo') != -1 or txtl.find('tbd') != -1:
+                    self.tabLines[lx] = txt
+
+    #-----------------------------------------------------------------------------------------------
+    def HitLines( self, theRe, buf):
+        """ return the set of line indexes holding a match of theRe """
+        offsets = [m.start() for m in theRe.finditer( buf)]
+        if numpy is not None and offsets and len( self.src.newLines):
+            lines = numpy.searchsorted( self.src.newLines, offsets, side='left')
+            return set( int(lx) for lx in lines)
+        return set( self.src.LineOf( at) for at in offsets)
+
+    #-----------------------------------------------------------------------------------------------
+    def Text( self, lx):
+        """ return the decoded text of line lx without trailing white space """
+        return self.src.Text( lx).rstrip()
+
+    #-----------------------------------------------------------------------------------------------
+    def HitLineIndexes( self):
+        """ all the lines that have at least one hit, in line order """
+        hits = set( self.longLines)
+        hits.update( self.todoLines)
+        hits.update( self.tabLines)
+        return sorted( hits)
@@ -0,0 +1,125 @@
+"""
+U4c Metrics Export
+This file reads the metrics export written by the 'metrics' command in the U4c batch run.  The
+file is read once, streaming, into a per function index so the function metrics are a dictionary
+lookup rather than a metric() call on every function.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import csv
+import os
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eMetricsName = r'metrics.csv'
+
+# the function metrics the checks use
+eFuncMetrics = ['CountLine', 'Cyclomatic', 'MaxNesting']
+
+eColKind = 'Kind'
+eColName = 'Name'
+eColFile = 'File'
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def MetricValue( text):
+    """ convert an export cell to a number, None if it is empty """
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        return int( text)
+    except ValueError:
+        try:
+            return float( text)
+        except ValueError:
+            return None
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class MetricsExport:
+    """ Index of the function rows in an Understand metrics export
+        byFile: {(name, fpfn lower case): {metric: value}} when the export holds the declaring file
+        byName: {name: [{metric: value}, ...]}
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, fpfn, metrics=eFuncMetrics):
+        self.fpfn = fpfn
+        self.metrics = list( metrics)
+
+        self.byFile = {}
+        self.byName = {}
+        self.rows = 0
+        self.isValid = False
+
+        if os.path.isfile( fpfn):
+            f = open( fpfn, 'r', newline='')
+            try:
+                self.Read( csv.reader( f))
+            finally:
+                f.close()
+
+    #-----------------------------------------------------------------------------------------------
+    def Read( self, reader):
+        try:
+            hdr = [i.strip() for i in next( reader)]
+        except StopIteration:
+            return
+
+        if eColKind not in hdr or eColName not in hdr:
+            return
+
+        kindAt = hdr.index( eColKind)
+        nameAt = hdr.index( eColName)
+        fileAt = hdr.index( eColFile) if eColFile in hdr else None
+        metricAt = [(m, hdr.index( m)) for m in self.metrics if m in hdr]
+        if not metricAt:
+            return
+
+        self.isValid = True
+        for row in reader:
+            if len( row) != len( hdr) or row[kindAt].find( 'Function') == -1:
+                continue
+
+            values = {}
+            for m, at in metricAt:
+                v = MetricValue( row[at])
+                if v is not None:
+                    values[m] = v
+
+            name = row[nameAt]
+            self.byName.setdefault( name, []).append( values)
+            if fileAt is not None and row[fileAt]:
+                self.byFile[(name, os.path.normcase( row[fileAt]))] = values
+            self.rows += 1
+
+    #-----------------------------------------------------------------------------------------------
+    def Lookup( self, name, fpfn=''):
+        """ return the metrics for function name defined in fpfn, None if the export can't say
+            which function it is or is missing one of the metrics
+        """
+        values = None
+        if fpfn:
+            values = self.byFile.get( (name, os.path.normcase( fpfn)))
+
+        if values is None:
+            rows = self.byName.get( name, [])
+            if len( rows) == 1:
+                values = rows[0]
+
+        if values is not None and len( values) != len( self.metrics):
+            values = None
+
+        return values
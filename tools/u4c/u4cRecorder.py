@@ -0,0 +1,140 @@
+"""
+U4c Fixture Recorder
+This file records the part of an Understand DB that a U4c run touches (entities, refs, lexer tokens,
+comments and metrics) into a fixture that fake/understand.py replays.  Run it on a machine with an
+Understand license, the fixture can then be used to run/time U4c anywhere.
+
+    python u4cRecorder.py <db.udb> [fixture]
+
+The fixture defaults to <db.udb>.fixture, the name fake/understand.py looks for.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import os
+import pickle
+import sys
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__)), '..', '..'))
+from tools.u4c.u4cMetrics import eFuncMetrics
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eFixtureExt = '.fixture'
+
+# the entities U4c asks for by kind, these are recorded with all their refs
+eRecordKinds = ('File', 'Function', 'Object', 'Macro', 'Enumerator', 'Typedef', 'Parameter')
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class FixtureRecorder:
+    """ Record an open Understand DB into the fixture layout of fake/understand.py """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, db, version=''):
+        self.db = db
+        self.version = version
+
+        self.ents = []
+        self.entIds = {}  # Understand ent id -> fixture id
+        self.pending = []  # fixture ids waiting on their refs
+
+    #-----------------------------------------------------------------------------------------------
+    def Record( self):
+        """ record all the entities U4c can reach, return the fixture data """
+        for kind in eRecordKinds:
+            for ent in self.db.ents( kind):
+                ex = self.EntId( ent)
+                self.pending.append( (ex, ent))
+
+        # only the kinds above have their refs recorded, other ents just need to be resolvable
+        while self.pending:
+            ex, ent = self.pending.pop()
+            if 'refs' not in self.ents[ex]:
+                self.RecordDetails( ex, ent)
+
+        return {'version': self.version, 'ents': self.ents}
+
+    #-----------------------------------------------------------------------------------------------
+    def EntId( self, ent):
+        """ return the fixture id for ent, adding its basic data on the 1st visit """
+        if ent is None:
+            return None
+
+        key = ent.id()
+        ex = self.entIds.get( key)
+        if ex is None:
+            ex = len( self.ents)
+            self.entIds[key] = ex
+            data = {
+                'name': ent.name(),
+                'longname': ent.longname(),
+                'kindname': ent.kindname(),
+                'type': ent.type(),
+                }
+            self.ents.append( data)
+            data['parent'] = self.EntId( ent.parent())
+        return ex
+
+    #-----------------------------------------------------------------------------------------------
+    def RecordDetails( self, ex, ent):
+        data = self.ents[ex]
+        kindname = ent.kindname()
+
+        data['refs'] = [(r.kindname(), self.EntId( r.file()), r.line(), self.EntId( r.ent()))
+                        for r in ent.refs()]
+
+        if kindname.find( 'File') != -1:
+            try:
+                data['lexer'] = [(l.token(), l.text(), l.line_begin(), l.line_end())
+                                 for l in ent.lexer()]
+            except Exception:
+                data['lexer'] = None
+
+        elif kindname.find( 'Function') != -1:
+            data['contents'] = ent.contents()
+            data['comments'] = ent.comments( 'before')
+            values = ent.metric( eFuncMetrics)
+            data['metrics'] = dict( [(m, values[m]) for m in values if values[m] is not None])
+
+    #-----------------------------------------------------------------------------------------------
+    def Save( self, fixture):
+        data = self.Record()
+        f = open( fixture, 'wb')
+        try:
+            pickle.dump( data, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        return len( data['ents'])
+
+#===================================================================================================
+if __name__ == '__main__':
+    import understand
+
+    if len( sys.argv) < 2:
+        print( __doc__)
+        sys.exit( 1)
+
+    dbName = sys.argv[1]
+    fixture = sys.argv[2] if len( sys.argv) > 2 else dbName + eFixtureExt
+
+    db = understand.open( dbName)
+    try:
+        recorder = FixtureRecorder( db, str( understand.version()))
+        count = recorder.Save( fixture)
+    finally:
+        db.close()
+
+    print( 'Recorded %d entities from %s to %s' % (count, dbName, fixture))
@@ -0,0 +1,108 @@
+"""
+U4c Type Resolver
+This file implements the base type verdicts for CheckBaseTypes.  The typedef names in the
+Understand DB are collected once, and the verdict for each distinct type string is computed once
+and remembered, so checking an object is a dictionary hit.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import re
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+# must be 1st or escaped ']' and '-'
+eCleanRe = re.compile(r'const|volatile|[()+\-*/]+?')
+eNumRe = re.compile(r'\[[0-9A-Za-z_\- ]*\]')
+
+# stop following a typedef chain after this many steps (i.e., it loops)
+eMaxChain = 32
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def CleanType( oType):
+    """ remove qualifiers, pointer/math operators and array dimensions from a type string """
+    for i in eCleanRe.findall( oType):
+        oType = oType.replace(i,'')
+
+    for i in eNumRe.findall( oType):
+        oType = oType.replace(i,'')
+
+    return oType.strip()
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class TypeResolver:
+    """ Decide if a type string is built on the project base types
+        typedefs: [(name, type), ...] for every Typedef entity in the DB
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, baseTypes, typedefs):
+        self.baseTypes = list( baseTypes)
+        self.baseSet = set( self.baseTypes)
+
+        # name -> the types it is defined as, a name defined more than once is ambiguous
+        self.typedefs = {}
+        for name, tdType in typedefs:
+            self.typedefs.setdefault( name, []).append( tdType)
+
+        self.verdicts = {}
+        self.hits = 0
+
+    #-----------------------------------------------------------------------------------------------
+    def Verdict( self, oType):
+        """ return (typeOk, cleanType) for a type string
+            typeOk when the type is a base type, contains a base type or names a unique typedef
+            cleanType is the type with qualifiers etc. removed ('' when it was not needed)
+        """
+        verdict = self.verdicts.get( oType)
+        if verdict is not None:
+            self.hits += 1
+            return verdict
+
+        if oType in self.baseSet:
+            verdict = (True, '')
+        else:
+            # check is part of type is in any basetype
+            for b in self.baseTypes:
+                if oType.find( b) != -1:
+                    verdict = (True, '')
+                    break
+            else:
+                cleanType = CleanType( oType)
+                verdict = (len( self.typedefs.get( cleanType, [])) == 1, cleanType)
+
+        self.verdicts[oType] = verdict
+        return verdict
+
+    #-----------------------------------------------------------------------------------------------
+    def Resolve( self, typeName):
+        """ follow a typedef chain, return the list of types visited ending in the underlying type
+        """
+        chain = [typeName]
+        name = CleanType( typeName)
+        while len( self.typedefs.get( name, [])) == 1 and len( chain) < eMaxChain:
+            tdType = self.typedefs[name][0]
+            if not tdType or tdType in chain:
+                break
+            chain.append( tdType)
+            if tdType in self.baseSet:
+                break
+            name = CleanType( tdType)
+
+        return chain
+
+    #-----------------------------------------------------------------------------------------------
+    def Stats( self):
+        return 'Type verdicts: %d distinct types, %d reused' % (len( self.verdicts), self.hits)
@@ -0,0 +1,400 @@
+"""
+U4c What-If
+This file answers "what happens to the Knowlogic violations if the project settings change" without
+running PC-Lint or Understand.  The proposed metrics, naming, base types and language restriction
+(excluded/restricted) settings are evaluated against the facts saved by the last full U4c run
+(facts.pkl and the FunctionMetrics of that run) and compared with the current settings evaluated
+the same way.  Only the rules whose settings differ are evaluated.
+
+    python u4cWhatIf.py <project.crp> [-proposed <proposed.crp>] [-set <setting> ...] [-details]
+
+The proposal is the proposed project file and/or settings named after the project file sections:
+    -set Metrics.lengthFunction=300
+    -set Naming.variable=40:[a-z][A-Za-z0-9]*
+    -set Base_Types=UINT8,UINT16,UINT32
+    -set Restricted_Functions=memcpy,memset
+    -set Exclude_Functions=malloc,free
+    -set Exclude_Keywords=goto,register
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+from collections import OrderedDict
+
+import argparse
+import copy
+import datetime
+import os
+import re
+import sys
+import time
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.abspath( __file__)), '..', '..'))
+from tools.u4c.u4cChecks import NameChecker, LoadFacts, eFactsName, eToolRoot, eDbDetectId
+from tools.u4c.u4cChecks import eCheckMetrics, eCheckNaming, eCheckRestrictions, eCheckBaseTypes
+from tools.u4c.u4cChecks import eFuncMetricLimits
+from tools.u4c.u4cFuncIndex import FuncIndex, eNoFunc
+from tools.u4c.u4cLineScan import LineScan
+from tools.u4c.u4cTypes import TypeResolver
+
+import ProjFile as PF
+import ViolationDb as VDB
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eNoFacts = 'No U4c facts in %s, run a full analysis first'
+eNoEntityFacts = 'The facts predate the entity facts, run a full analysis to evaluate %s'
+eNoFuncMetrics = 'No FunctionMetrics run, run a full analysis to evaluate the function limits'
+eFactsMismatch = ('The facts are from the run of %s but the function metrics are from the run of '
+                  '%s (a partial run), run a full analysis to evaluate them together')
+eNoKeywordFacts = ('The facts only hold the lines of the excluded keywords, run a full analysis '
+                   'with %s excluded to evaluate it')
+
+# a violation as compared between the settings
+#   (filename, function, violationId, lineNumber, description)
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+def SplitList( value):
+    return [i.strip() for i in value.split(',') if i.strip()]
+
+#---------------------------------------------------------------------------------------------------
+def ApplySetting( projFile, setting):
+    """ apply a '<section>[.<item>]=<value>' setting (see the module doc) to projFile
+        raises ValueError for a setting that does not name a known section/item
+    """
+    name, sep, value = setting.partition( '=')
+    section, dot, item = name.strip().partition( '.')
+    value = value.strip()
+    if not sep:
+        raise ValueError( 'Setting <%s> is not <section>[.<item>]=<value>' % setting)
+
+    if section == 'Metrics' and item in projFile.metrics:
+        projFile.metrics[item] = int( value)
+
+    elif section == 'Naming' and item in projFile.naming:
+        # same layout as the project file [<max length>:]<regex>
+        szFmt = value.split( ':', 1)
+        if len( szFmt) == 2 and szFmt[0].strip().isdigit():
+            size, fmt = int( szFmt[0]), szFmt[1]
+        else:
+            size, fmt = 32, value
+        try:
+            re.compile( fmt)
+        except re.error as e:
+            raise ValueError( 'Naming <%s> regex error: %s' % (item, e))
+        projFile.naming[item] = (size, fmt)
+
+    elif section == 'Base_Types':
+        projFile.baseTypes = SplitList( value)
+
+    elif section.startswith( 'Restricted_') and section[11:] in projFile.restricted:
+        projFile.restricted[section[11:]] = SplitList( value)
+
+    elif section.startswith( 'Exclude_') and section[8:] in (PF.eExcludeFunc, PF.eExcludeKeywords):
+        projFile.exclude[section[8:]] = SplitList( value)
+
+    else:
+        raise ValueError( 'Unknown setting <%s>' % name.strip())
+
+#---------------------------------------------------------------------------------------------------
+def Report( results, notes, details=False):
+    """ return the lines reporting the evaluation results """
+    lines = []
+    if not results:
+        lines.append( 'The proposal does not change any Knowlogic check settings')
+
+    for check, delta in results.items():
+        lines.append( '%s: %d added, %d removed' % (check, len( delta.added), len( delta.removed)))
+        for title, counts in (('Rule', delta.ByRule()), ('File', delta.ByFile())):
+            if counts:
+                width = max( [len( i) for i in counts] + [len( title)])
+                lines.append( '    %-*s  %7s %7s' % (width, title, 'Added', 'Removed'))
+                for name, (added, removed) in counts.items():
+                    lines.append( '    %-*s  %7d %7d' % (width, name, added, removed))
+
+        if details:
+            for sign, violations in (('+', delta.added), ('-', delta.removed)):
+                for filename, func, violationId, line, desc in violations:
+                    lines.append( '    %s %s(%d) %s %s: %s' % (sign, filename, line, func,
+                                                             violationId, desc))
+        lines.append( '')
+
+    for i in notes:
+        lines.append( 'Note: %s' % i)
+
+    return lines
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class ViolationDelta:
+    """ The violations a proposal adds/removes for one check """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, current, proposed):
+        self.added = sorted( proposed - current)
+        self.removed = sorted( current - proposed)
+
+    #-----------------------------------------------------------------------------------------------
+    def Counts( self, keyAt):
+        """ {key: [added, removed]} in key order """
+        counts = {}
+        for cx, violations in enumerate( (self.added, self.removed)):
+            for v in violations:
+                counts.setdefault( v[keyAt], [0, 0])[cx] += 1
+        return OrderedDict( sorted( counts.items()))
+
+    #-----------------------------------------------------------------------------------------------
+    def ByRule( self):
+        return self.Counts( 2)
+
+    #-----------------------------------------------------------------------------------------------
+    def ByFile( self):
+        return self.Counts( 0)
+
+#---------------------------------------------------------------------------------------------------
+class WhatIf:
+    """ Evaluate proposed project settings against the facts of the last full U4c run
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, projFile):
+        self.projFile = projFile
+        projRoot = projFile.paths[PF.ePathProject]
+
+        self.factsName = os.path.join( projRoot, eToolRoot, eFactsName)
+        self.facts = LoadFacts( self.factsName)
+        self.isValid = self.facts is not None
+        self.entities = self.facts.get( 'entities') if self.isValid else None
+
+        self.vDb = VDB.ViolationDb( projRoot)
+        self.runTime = self.vDb.LastMetricsRun( eDbDetectId)
+        # when the facts were saved, None for facts older than the run time
+        self.factsTime = self.facts.get( 'runTime') if self.isValid else None
+        self.updateTime = datetime.datetime.today()
+
+        # the function index of each source file to place the refs, by normcase fpfn
+        self.funcIndex = {}
+        self.files = self.facts['files'] if self.isValid else []
+        for facts in self.files:
+            self.funcIndex[os.path.normcase( facts.fpfn)] = FuncIndex( facts.funcInfo)
+        self.noFuncs = FuncIndex( {})
+
+        self.notes = []
+
+    #-----------------------------------------------------------------------------------------------
+    def Close( self):
+        self.vDb.Close()
+
+    #-----------------------------------------------------------------------------------------------
+    def Evaluate( self, proposed):
+        """ Evaluate the proposed project file, return {check: ViolationDelta} for each check
+            whose settings differ from the current ones
+        """
+        self.notes = []
+        if self.isValid and self.runTime is not None and str( self.factsTime) != str( self.runTime):
+            self.notes.append( eFactsMismatch % (self.factsTime or 'an unknown time', self.runTime))
+
+        evaluators = (
+            (eCheckMetrics, self.Metrics),
+            (eCheckNaming, self.Naming),
+            (eCheckRestrictions, self.Restrictions),
+            (eCheckBaseTypes, self.BaseTypes),
+            )
+
+        results = OrderedDict()
+        for check, evaluator in evaluators:
+            violations = evaluator( self.projFile, proposed)
+            if violations is not None:
+                results[check] = ViolationDelta( *violations)
+
+        return results
+
+    #-----------------------------------------------------------------------------------------------
+    def FuncAt( self, fpfn, line):
+        return self.funcIndex.get( os.path.normcase( fpfn), self.noFuncs).FuncAt( line)
+
+    #-----------------------------------------------------------------------------------------------
+    def Metrics( self, current, proposed):
+        """ the metric violations for the limits that differ, None if none do """
+        changed = [m for m in current.metrics if current.metrics[m] != proposed.metrics.get( m)]
+        if not changed:
+            return None
+
+        settings = (current, proposed)
+        violations = (set(), set())
+
+        # function limits from the metrics saved by the last run
+        funcLimits = [m for m in changed if m in eFuncMetricLimits]
+        if funcLimits and self.runTime is None:
+            self.notes.append( eNoFuncMetrics)
+        elif funcLimits:
+            for pf, found in zip( settings, violations):
+                limits = dict( [(eFuncMetricLimits[m], pf.metrics[m]) for m in funcLimits])
+                for filename, func, violationId, desc, details, line in \
+                        self.vDb.FunctionMetricViolations( eDbDetectId, self.runTime, limits):
+                    found.add( (filename, func, violationId, line, desc))
+
+        # file length, see FileChecker.Check
+        if PF.eMetricFile in changed:
+            for facts in self.files:
+                size = len( self.projFile.GetFileContents( facts.fpfn))
+                desc = 'File Length Exceeded: %s total lines %d' % (facts.fn, size)
+                for pf, found in zip( settings, violations):
+                    if size > pf.metrics[PF.eMetricFile]:
+                        found.add( (facts.rpfn, eNoFunc, 'Metric.File', size, desc))
+
+        # line length, one scan at the lower limit serves both, see FileChecker.CheckLine
+        if PF.eMetricLine in changed:
+            lowest = min( [pf.metrics[PF.eMetricLine] for pf in settings])
+            for facts in self.files:
+                scan = LineScan( facts.fpfn, lowest)
+                for lx, txt in scan.longLines.items():
+                    item = (facts.rpfn, self.FuncAt( facts.fpfn, lx + 1), 'Metric.Line', lx + 1,
+                            'Line Length in %s line %d' % (facts.fn, lx))
+                    for pf, found in zip( settings, violations):
+                        if len( txt) > pf.metrics[PF.eMetricLine]:
+                            found.add( item)
+
+        return violations
+
+    #-----------------------------------------------------------------------------------------------
+    def Naming( self, current, proposed):
+        """ the naming violations of each setting, None if the naming rules are the same """
+        if current.naming == proposed.naming:
+            return None
+
+        violations = []
+        for pf in (current, proposed):
+            checker = NameChecker( pf, self.updateTime, eDbDetectId)
+            found, stats, log = checker.Check( self.facts['names'])
+            violations.append( set( [(v[0], v[1], v[3], v[6], v[4]) for v in found]))
+
+        return violations
+
+    #-----------------------------------------------------------------------------------------------
+    def Restrictions( self, current, proposed):
+        """ the excluded/restricted violations of the items only one of the settings lists, None if
+            the lists are the same, see U4c.CheckLanguageRestrictions
+        """
+        rules = (
+            # settings, item, violationId, description
+            ('exclude', PF.eExcludeFunc, 'Excluded.Func', 'Excluded function %s at line %d'),
+            ('exclude', PF.eExcludeKeywords, 'Excluded.Keyword', 'Excluded keyword %s at line %d'),
+            ('restricted', PF.eRestrictedFunc, 'Restricted.Func',
+             'Restricted function %s at line %d'),
+            )
+
+        changed = [r for r in rules
+                   if getattr( current, r[0])[r[1]] != getattr( proposed, r[0])[r[1]]]
+        if not changed:
+            return None
+        if self.entities is None:
+            self.notes.append( eNoEntityFacts % eCheckRestrictions)
+            return None
+
+        funcRefs = self.entities['funcRefs']
+        keywords = self.entities['keywords']
+        keywordNames = self.entities.get( 'keywordNames')
+
+        violations = (set(), set())
+        for group, key, violationId, descFmt in changed:
+            currentItems = set( getattr( current, group)[key])
+            proposedItems = set( getattr( proposed, group)[key])
+
+            # the items in both settings report the same violations
+            for item in currentItems ^ proposedItems:
+                refs = list( funcRefs.get( item, []))
+                if key == PF.eExcludeKeywords:
+                    if keywordNames is not None and item not in keywordNames:
+                        self.notes.append( eNoKeywordFacts % item)
+                    for fpfn in keywords:
+                        refs.extend( [(fpfn, line) for line in keywords[fpfn].get( item, [])])
+
+                found = violations[0] if item in currentItems else violations[1]
+                for fpfn, line in sorted( set( refs)):
+                    rpfn, title = self.projFile.RelativePathName( fpfn)
+                    found.add( (rpfn, self.FuncAt( fpfn, line), violationId, line,
+                                descFmt % (item, line)))
+
+        return violations
+
+    #-----------------------------------------------------------------------------------------------
+    def BaseTypes( self, current, proposed):
+        """ the base type violations of each setting, None if the base types are the same, see
+            U4c.CheckBaseTypes
+        """
+        if current.baseTypes == proposed.baseTypes:
+            return None
+        if self.entities is None:
+            self.notes.append( eNoEntityFacts % eCheckBaseTypes)
+            return None
+
+        violations = []
+        for pf in (current, proposed):
+            found = set()
+            if pf.baseTypes:
+                resolver = TypeResolver( pf.baseTypes + ['void'], self.entities['typedefs'])
+                for obj in self.entities['objects']:
+                    if obj.type is None:
+                        typeOk = obj.kindname.lower() == 'typedef'
+                    else:
+                        typeOk, cleanType = resolver.Verdict( obj.type)
+
+                    if not typeOk and obj.defLoc is not None:
+                        fpfn, defLine = obj.defLoc
+                        rpfn, title = self.projFile.RelativePathName( fpfn)
+                        found.add( (rpfn, self.FuncAt( fpfn, defLine), 'BaseType', defLine,
+                                    'Base Type Error: %s line %d' % (obj.name, defLine)))
+            violations.append( found)
+
+        return violations
+
+#===================================================================================================
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser( description='Evaluate proposed Knowlogic check settings')
+    parser.add_argument( 'projFile')
+    parser.add_argument( '-proposed', help='the proposed project file')
+    parser.add_argument( '-set', action='append', default=[], dest='settings',
+                         help='a proposed setting e.g., Metrics.lengthFunction=300')
+    parser.add_argument( '-details', action='store_true', help='list each violation')
+    args = parser.parse_args()
+
+    # no tool is run, so the tool path errors don't matter here
+    projFile = PF.ProjectFile( args.projFile)
+    if not projFile.isValid:
+        print( 'Warnings:\n%s\n' % '\n'.join( projFile.errors))
+
+    if args.proposed:
+        proposed = PF.ProjectFile( args.proposed)
+    else:
+        proposed = copy.deepcopy( projFile)
+
+    try:
+        for setting in args.settings:
+            ApplySetting( proposed, setting)
+    except ValueError as e:
+        print( e)
+        sys.exit( 1)
+
+    start = time.time()
+    whatIf = WhatIf( projFile)
+    if not whatIf.isValid:
+        print( eNoFacts % whatIf.factsName)
+        sys.exit( 1)
+
+    try:
+        results = whatIf.Evaluate( proposed)
+    finally:
+        whatIf.Close()
+
+    print( '\n'.join( Report( results, whatIf.notes, args.details)))
+    print( 'Evaluated in %.2fs' % (time.time() - start))
@@ -0,0 +1,142 @@
+"""
+Exclude Matcher
+This file compiles the project exclude lists (Exclude_Dirs, Exclude_Files_PcLint, Exclude_Files_U4c)
+into a matcher.  An entry can be:
+    a full path       - that directory/file
+    a name            - any directory/file with that name (i.e., build, test.c)
+    a relative path   - any directory/file whose path ends with it (i.e., test\\unit)
+    a glob            - fnmatch pattern matched against the name and the full path (i.e., *_test.c)
+
+Paths are compared case insensitive when the platform paths are (see ProjectFile.pathCaseMatters).
+An excluded directory excludes everything below it, PruneWalk drops them from an os.walk in place.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import fnmatch
+import os
+import re
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eGlobChars = '*?['
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class ExcludeRule:
+    """ One exclude list compiled for matching """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, entries, norm):
+        self.paths = set()      # full paths
+        self.names = set()      # names
+        self.suffixes = []      # relative paths, with a leading separator
+        globs = []
+
+        for entry in entries:
+            entry = entry.strip()
+            if not entry:
+                continue
+
+            if [c for c in eGlobChars if c in entry]:
+                globs.append( fnmatch.translate( norm( entry)))
+            elif os.path.isabs( entry):
+                self.paths.add( norm( entry))
+            else:
+                entry = norm( entry)
+                if os.sep in entry:
+                    self.suffixes.append( os.sep + entry)
+                else:
+                    self.names.add( entry)
+
+        self.suffixes = tuple( self.suffixes)
+        self.globRe = re.compile( '|'.join( globs)) if globs else None
+        self.isEmpty = not (self.paths or self.names or self.suffixes or globs)
+
+    #-----------------------------------------------------------------------------------------------
+    def Match( self, path, name):
+        """ path and name are normalized """
+        if self.isEmpty:
+            return False
+
+        if path in self.paths or name in self.names:
+            return True
+
+        if self.suffixes and path.endswith( self.suffixes):
+            return True
+
+        if self.globRe is not None:
+            if self.globRe.match( name) or self.globRe.match( path):
+                return True
+
+        return False
+
+#---------------------------------------------------------------------------------------------------
+class ExcludeMatcher:
+    """ The directory and file excludes of a tool
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, excludeDirs=(), excludedFiles=(), caseMatters=True):
+        self.caseMatters = caseMatters
+        self.key = (frozenset( excludeDirs), frozenset( excludedFiles), caseMatters)
+        self.dirKey = (self.key[0], caseMatters)
+
+        self.dirRule = ExcludeRule( excludeDirs, self.Norm)
+        self.fileRule = ExcludeRule( excludedFiles, self.Norm)
+
+    #-----------------------------------------------------------------------------------------------
+    def Norm( self, path):
+        path = os.path.normpath( path)
+        if not self.caseMatters:
+            path = path.lower()
+        return path
+
+    #-----------------------------------------------------------------------------------------------
+    def SkipDir( self, dirPath):
+        """ is dirPath excluded (it and all the dirs below it) """
+        path = self.Norm( dirPath)
+        return self.dirRule.Match( path, os.path.basename( path))
+
+    #-----------------------------------------------------------------------------------------------
+    def SkipFile( self, ffn):
+        path = self.Norm( ffn)
+        return self.fileRule.Match( path, os.path.basename( path))
+
+    #-----------------------------------------------------------------------------------------------
+    def PruneWalk( self, dirPath, dirs, skipped=None):
+        """ remove the excluded dirs from the dirs of an os.walk step so the walk does not go into
+            them, the full paths removed are added to skipped
+        """
+        if self.dirRule.isEmpty:
+            return
+
+        keep = []
+        for d in dirs:
+            path = os.path.join( dirPath, d)
+            if self.SkipDir( path):
+                if skipped is not None:
+                    skipped.append( path)
+            else:
+                keep.append( d)
+        dirs[:] = keep
+
+    #-----------------------------------------------------------------------------------------------
+    def Report( self, skippedDirs, skippedFiles):
+        """ return the lines reporting what the excludes skipped """
+        lines = ['Excluded %d directories, %d files' % (len( skippedDirs), len( skippedFiles))]
+        lines.extend( ['    dir:  %s' % i for i in skippedDirs])
+        lines.extend( ['    file: %s' % i for i in skippedFiles])
+        return lines
@@ -0,0 +1,143 @@
+"""
+Root Trie
+This file implements the lookup of the root directory a path is under.  The roots (i.e., the src
+roots or the include dirs of a project) are split into path components and held in a trie, a path
+is matched a component at a time so the cost does not depend on the number of roots.  Components
+are compared case insensitive when the platform paths are (see ProjectFile.pathCaseMatters), either
+path separator is accepted.
+
+RootResolver memoizes the ProjectFile.RelativePathName and ProjectFile.IsLibraryFile results per
+path, the checks ask for the same few hundred files for every entity.  The project resolver matches
+case sensitive and skips a src root with a trailing separator unless it is the last one, as the
+text replace lookups it replaced did, so the relative paths (the filename of the violations in the
+DB) and the library files stay what they were.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import os
+import re
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eComponentRe = re.compile( r'[^/\\]+')
+
+# the trie node key holding the index of the root ending at the node
+eRootAt = None
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class RootTrie:
+    """ A trie of the path components of a list of roots """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, roots, caseMatters=True):
+        self.roots = tuple( roots)
+        self.caseMatters = caseMatters
+        self.trie = {}
+
+        for rx, root in enumerate( self.roots):
+            parts = [self.Norm( m.group()) for m in eComponentRe.finditer( root)]
+            parts = [i for i in parts if i != '.']
+            if not parts:
+                continue
+
+            node = self.trie
+            for part in parts:
+                node = node.setdefault( part, {})
+            # the first of two equal roots is the one found
+            node.setdefault( eRootAt, rx)
+
+    #-----------------------------------------------------------------------------------------------
+    def Norm( self, part):
+        return part if self.caseMatters else part.lower()
+
+    #-----------------------------------------------------------------------------------------------
+    def Match( self, path):
+        """ return the index of the first root (in the roots order) path is under and the offset in
+            path where the root ends, (-1, 0) when it is not under any of them
+        """
+        found = -1
+        end = 0
+        node = self.trie
+        for m in eComponentRe.finditer( path):
+            part = self.Norm( m.group())
+            if part == '.':
+                continue
+
+            node = node.get( part)
+            if node is None:
+                break
+
+            rx = node.get( eRootAt)
+            if rx is not None and (found == -1 or rx < found):
+                found = rx
+                end = m.end()
+
+        return found, end
+
+#---------------------------------------------------------------------------------------------------
+class RootResolver:
+    """ The memoized relative path and library file answers for a project's roots
+        srcRoots: the roots a relative path is computed from
+        includeDirs: a file under one of these is a library file
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, srcRoots, includeDirs, caseMatters=True):
+        self.key = (tuple( srcRoots), tuple( includeDirs), caseMatters)
+
+        # taking a root ending in a separator off left no separator to strip, so the old lookup
+        # only used it when it was the last root (the index keeps the roots order)
+        srcRoots = [r if r[-1:] not in ('/', '\\') or rx == len( srcRoots) - 1 else ''
+                    for rx, r in enumerate( srcRoots)]
+        self.srcTrie = RootTrie( srcRoots, caseMatters)
+
+        # include dirs given as full paths are matched as prefixes, the others anywhere in the path
+        absolute = [i for i in includeDirs if os.path.isabs( i) or i[:1] in ('/', '\\')]
+        self.incTrie = RootTrie( absolute, caseMatters)
+        self.incParts = [i for i in includeDirs if i not in absolute and i]
+
+        self.relative = {}
+        self.library = {}
+
+    #-----------------------------------------------------------------------------------------------
+    def RelativePathName( self, fpfn):
+        """ return rpfn, title, rpfn is fpfn with the first src root it is under taken off """
+        result = self.relative.get( fpfn)
+        if result is None:
+            rx, end = self.srcTrie.Match( fpfn)
+            if rx == -1:
+                rpfn = fpfn
+            else:
+                rpfn = fpfn[end:]
+                if rpfn[:1] in ('/', '\\'):
+                    rpfn = rpfn[1:]
+
+            result = (rpfn, os.path.split( rpfn)[1])
+            self.relative[fpfn] = result
+
+        return result
+
+    #-----------------------------------------------------------------------------------------------
+    def IsLibraryFile( self, fpfn):
+        isLibrary = self.library.get( fpfn)
+        if isLibrary is None:
+            isLibrary = self.incTrie.Match( fpfn)[0] != -1
+            if not isLibrary and self.incParts:
+                isLibrary = [i for i in self.incParts if fpfn.find( i) != -1] != []
+            self.library[fpfn] = isLibrary
+
+        return isLibrary
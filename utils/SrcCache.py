@@ -0,0 +1,219 @@
+"""
+Source File Cache
+This file implements a process wide cache of source files.  Each file is read once (into bytes,
+no file handle or map is kept open so the file can still be edited) and indexed by line offsets so
+any line can be fetched without re-reading the file.  Entries are keyed by path, modification time
+and size, and the least recently used files are dropped when the cached size goes over the memory
+bound.
+
+All readers of source text (line lookups for violation details, file contents for the file checks,
+the line scanner) should go through srcCache so a file is only read once per run.
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+from collections import OrderedDict
+
+import bisect
+import locale
+import os
+import re
+import threading
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+eMaxCacheBytes = 256 * 1024 * 1024
+
+# text mode reads treat a lone '\r' as a line end as well
+eNewLineRe = re.compile( br'\r(?!\n)|\n')
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class SrcFile:
+    """ The contents of a source file and its line offset index
+        newLines[i] is the offset of the last byte of the line end of line i (0 based)
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, fpfn, mtime, size, encoding):
+        self.fpfn = fpfn
+        self.mtime = mtime
+        # decode the same way a text mode open() would have
+        self.encoding = encoding
+
+        self.buf = b''
+        if size > 0:
+            f = open( fpfn, 'rb')
+            try:
+                self.buf = f.read()
+            finally:
+                f.close()
+        # what was read, a file that changed since the stat is read again by the next Get
+        self.size = size = len( self.buf)
+
+        self.newLines = self.LineEnds()
+        self.lineCount = len( self.newLines)
+        if size and self.buf[size-1:size] not in (b'\n', b'\r'):
+            self.lineCount += 1
+
+    #-----------------------------------------------------------------------------------------------
+    def LineEnds( self):
+        """ compute the line end offsets of the buffer """
+        size = len( self.buf)
+        if size == 0:
+            newLines = []
+        elif numpy is not None:
+            data = numpy.frombuffer( self.buf, dtype=numpy.uint8)
+            newLines = numpy.flatnonzero( data == 10)
+            cr = numpy.flatnonzero( data == 13)
+            if len( cr):
+                nextByte = data[numpy.minimum( cr + 1, size - 1)]
+                loneCr = cr[(nextByte != 10) | (cr == size - 1)]
+                if len( loneCr):
+                    newLines = numpy.union1d( newLines, loneCr)
+        else:
+            newLines = [m.start() for m in eNewLineRe.finditer( self.buf)]
+
+        return newLines
+
+    #-----------------------------------------------------------------------------------------------
+    def Span( self, lx):
+        """ return the start/end offsets of the text of line lx (0 based, no line end) """
+        start = int(self.newLines[lx-1]) + 1 if lx > 0 else 0
+        end = int(self.newLines[lx]) if lx < len( self.newLines) else len( self.buf)
+        return start, end
+
+    #-----------------------------------------------------------------------------------------------
+    def LineOf( self, offset):
+        """ return the line index (0 based) holding the byte offset """
+        if numpy is not None and len( self.newLines):
+            return int( numpy.searchsorted( self.newLines, offset, side='left'))
+        return bisect.bisect_left( self.newLines, offset)
+
+    #-----------------------------------------------------------------------------------------------
+    def Text( self, lx):
+        """ return the decoded text of line lx (0 based) without the line end """
+        start, end = self.Span( lx)
+        txt = self.buf[start:end].decode( self.encoding, 'replace')
+        if txt[-1:] == '\r':
+            txt = txt[:-1]
+        return txt
+
+    #-----------------------------------------------------------------------------------------------
+    def Line( self, lx):
+        """ return line lx (0 based) as readlines() would have (i.e., with a '\n' line end) """
+        txt = self.Text( lx)
+        if lx < len( self.newLines):
+            txt += '\n'
+        return txt
+
+    #-----------------------------------------------------------------------------------------------
+    def Lines( self):
+        """ return all the lines in the file as readlines() would have """
+        text = self.buf.decode( self.encoding, 'replace')
+        text = text.replace( '\r\n', '\n').replace( '\r', '\n')
+        lines = [i + '\n' for i in text.split( '\n')]
+        # the last piece is whatever followed the last line end
+        last = lines.pop()[:-1]
+        if last:
+            lines.append( last)
+        return lines
+
+#---------------------------------------------------------------------------------------------------
+class SourceCache:
+    """ LRU cache of SrcFile objects bounded by the total cached file size
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, maxBytes=eMaxCacheBytes, encoding=None):
+        self.maxBytes = maxBytes
+        self.encoding = encoding or locale.getpreferredencoding( False)
+
+        self.files = OrderedDict()
+        self.cachedBytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    #-----------------------------------------------------------------------------------------------
+    def Get( self, fpfn):
+        """ return the SrcFile for fpfn, None if the file does not exist """
+        try:
+            st = os.stat( fpfn)
+        except OSError:
+            return None
+
+        with self.lock:
+            src = self.files.get( fpfn)
+            if src is not None and src.mtime == st.st_mtime and src.size == st.st_size:
+                self.files.move_to_end( fpfn)
+                self.hits += 1
+                return src
+
+            if src is not None:
+                self.Remove( fpfn)
+
+            self.misses += 1
+            src = SrcFile( fpfn, st.st_mtime, st.st_size, self.encoding)
+            self.files[fpfn] = src
+            self.cachedBytes += src.size
+
+            # drop the least recently used files, but always keep the one just asked for
+            while self.cachedBytes > self.maxBytes and len( self.files) > 1:
+                oldest = next( iter( self.files))
+                self.Remove( oldest)
+
+        return src
+
+    #-----------------------------------------------------------------------------------------------
+    def Remove( self, fpfn):
+        """ forget about a file """
+        src = self.files.pop( fpfn, None)
+        if src is not None:
+            self.cachedBytes -= src.size
+
+    #-----------------------------------------------------------------------------------------------
+    def GetLine( self, fpfn, lineNumber):
+        """ return line 'lineNumber' (1 based) of fpfn, None if it does not exist """
+        src = self.Get( fpfn)
+        if src is not None and 0 < lineNumber <= src.lineCount:
+            return src.Line( lineNumber - 1)
+        return None
+
+    #-----------------------------------------------------------------------------------------------
+    def GetLines( self, fpfn):
+        """ return all the lines of fpfn, [] if it does not exist """
+        src = self.Get( fpfn)
+        return src.Lines() if src is not None else []
+
+    #-----------------------------------------------------------------------------------------------
+    def Stats( self):
+        return 'Source Cache hits/misses: %d/%d (%d files, %d bytes)' % (
+            self.hits, self.misses, len( self.files), self.cachedBytes)
+
+    #-----------------------------------------------------------------------------------------------
+    def Clear( self):
+        with self.lock:
+            self.files = OrderedDict()
+            self.cachedBytes = 0
+
+#---------------------------------------------------------------------------------------------------
+# the process wide source cache
+srcCache = SourceCache()
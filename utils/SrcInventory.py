@@ -0,0 +1,368 @@
+"""
+Source Inventory
+This file implements an inventory of the source files under the project source roots.  Each
+directory is listed once (os.scandir) and its listing is kept with the directory modification time,
+a refresh stats the directories and only lists again the ones that changed.  The results of a file
+query (extensions and excludes) are kept until a refresh finds a change.
+
+ProjectFile.GetSrcCodeFiles is served from the project's inventory, the results are the same as a
+walk of the roots (same files in the same order) with the excluded directories pruned.
+
+The inventory also indexes the files under the roots by name and by path relative to each root,
+ProjectFile.FullPathName resolves a file name with a lookup in it (see Resolve).
+"""
+#---------------------------------------------------------------------------------------------------
+# Python Modules
+#---------------------------------------------------------------------------------------------------
+import os
+import threading
+import time
+
+#---------------------------------------------------------------------------------------------------
+# Third Party Modules
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Knowlogic Modules
+#---------------------------------------------------------------------------------------------------
+from utils.ExcludeMatcher import ExcludeMatcher
+
+#---------------------------------------------------------------------------------------------------
+# Data
+#---------------------------------------------------------------------------------------------------
+# how long a walk of a root is trusted before the directory times are checked again
+eRefreshSecs = 2.0
+
+#---------------------------------------------------------------------------------------------------
+# Functions
+#---------------------------------------------------------------------------------------------------
+
+#---------------------------------------------------------------------------------------------------
+# Classes
+#---------------------------------------------------------------------------------------------------
+class DirScan:
+    """ The listing of one directory
+        files: [(name, ext, isFile)] in listing order
+        subdirs: the sub directories a walk goes into (not the links to directories)
+    """
+    __slots__ = ('path', 'mtime', 'files', 'subdirs', 'hasHeader')
+
+    def __init__( self, path, mtime):
+        self.path = path
+        self.mtime = mtime
+        self.files = []
+        self.subdirs = []
+        self.hasHeader = False
+
+    #-----------------------------------------------------------------------------------------------
+    def List( self):
+        """ list the directory, return False if it can not be read """
+        try:
+            entries = list( os.scandir( self.path))
+        except OSError:
+            return False
+
+        for entry in entries:
+            try:
+                isDir = entry.is_dir()
+            except OSError:
+                isDir = False
+
+            if isDir:
+                try:
+                    isLink = entry.is_symlink()
+                except OSError:
+                    isLink = False
+                if not isLink:
+                    self.subdirs.append( entry.name)
+            else:
+                try:
+                    isFile = entry.is_file()
+                except OSError:
+                    isFile = False
+                ext = os.path.splitext( entry.name)[1]
+                if ext == '.h':
+                    self.hasHeader = True
+                self.files.append( (entry.name, ext, isFile))
+
+        return True
+
+#---------------------------------------------------------------------------------------------------
+class FileIndex:
+    """ The files under a set of roots by name and by (root, relative path), the keys are
+        normalized for the platform case sensitivity
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, roots, walks, caseMatters):
+        self.caseMatters = caseMatters
+        self.roots = roots
+
+        self.byName = {}    # name -> [full path name] in walk order
+        self.byRelPath = {} # (root, relative path) -> full path name
+        self.paths = set()  # full path names
+
+        for root, (scans, pruned) in zip( roots, walks):
+            for scan in scans:
+                for name, ext, isFile in scan.files:
+                    if not isFile:
+                        continue
+
+                    ffn = os.path.join( scan.path, name)
+                    key = self.Norm( ffn)
+                    if key not in self.paths:
+                        self.paths.add( key)
+                        self.byName.setdefault( self.Norm( name), []).append( ffn)
+
+                    relPath = self.Norm( os.path.relpath( ffn, root))
+                    self.byRelPath.setdefault( (root, relPath), ffn)
+
+    #-----------------------------------------------------------------------------------------------
+    def Norm( self, path):
+        path = os.path.normpath( path)
+        if not self.caseMatters:
+            path = path.lower()
+        return path
+
+    #-----------------------------------------------------------------------------------------------
+    def Lookup( self, fn):
+        """ return the full path names fn names, see SrcInventory.Resolve """
+        if not fn:
+            return []
+
+        if os.path.isabs( fn):
+            return [fn] if self.Norm( fn) in self.paths else []
+
+        path, title = os.path.split( fn)
+        if not path:
+            return list( self.byName.get( self.Norm( title), []))
+
+        fullPathNames = []
+        title = self.Norm( title)
+        relPath = self.Norm( fn)
+        for root in self.roots:
+            ffn = self.byRelPath.get( (root, title)) or self.byRelPath.get( (root, relPath))
+            if ffn:
+                fullPathNames.append( ffn)
+        return fullPathNames
+
+#---------------------------------------------------------------------------------------------------
+class SrcInventory:
+    """ The directories under the source roots and the file queries made of them
+    """
+    #-----------------------------------------------------------------------------------------------
+    def __init__( self, refreshSecs=eRefreshSecs):
+        self.refreshSecs = refreshSecs
+
+        self.dirs = {}      # dir path -> DirScan
+        self.walks = {}     # (root, dir excludes) -> ([DirScan] in os.walk order, pruned dirs)
+        self.checked = {}   # walk key -> when the walk was last checked
+        self.matchers = {}  # excludes -> ExcludeMatcher
+        self.queries = {}   # query key -> (includeDirs, srcFiles, skippedDirs, skippedFiles)
+        self.indexes = {}   # (roots, caseMatters) -> FileIndex
+        self.generation = 0 # bumped each time a refresh finds a change
+
+        self.lock = threading.RLock()
+
+        self.listed = 0
+        self.hits = 0
+        self.misses = 0
+
+    #-----------------------------------------------------------------------------------------------
+    def __getstate__( self):
+        """ the inventory goes with the project file to the worker processes, not the lock """
+        state = self.__dict__.copy()
+        state.pop( 'lock', None)
+        return state
+
+    #-----------------------------------------------------------------------------------------------
+    def __setstate__( self, state):
+        self.__dict__.update( state)
+        self.lock = threading.RLock()
+
+    #-----------------------------------------------------------------------------------------------
+    def Walk( self, root, matcher=None, force=False):
+        """ return the DirScans of root in os.walk order and the dirs the matcher pruned from the
+            walk, refreshed when they are older than refreshSecs (or force)
+        """
+        key = (root, matcher.dirKey if matcher is not None else None)
+        with self.lock:
+            now = time.time()
+            walk = self.walks.get( key)
+            if walk is None or force or now - self.checked.get( key, 0) > self.refreshSecs:
+                walk = self.Refresh( key, matcher)
+                self.checked[key] = now
+            return walk
+
+    #-----------------------------------------------------------------------------------------------
+    def Refresh( self, key, matcher):
+        """ stat the directories under the root and list again the ones that changed, the excluded
+            directories are not gone into
+        """
+        root = key[0]
+        scans = []
+        pruned = []
+        changed = False
+
+        if matcher is not None and matcher.SkipDir( root):
+            stack = []
+            pruned.append( root)
+        else:
+            stack = [root]
+
+        while stack:
+            path = stack.pop()
+            scan = self.ScanDir( path)
+            if scan is None:
+                changed = changed or path in self.dirs
+                continue
+
+            if self.dirs.get( path) is not scan:
+                self.dirs[path] = scan
+                changed = True
+
+            scans.append( scan)
+            subdirs = list( scan.subdirs)
+            if matcher is not None:
+                matcher.PruneWalk( path, subdirs, pruned)
+
+            # top down, each sub directory is walked in full before the next
+            stack.extend( [os.path.join( path, i) for i in reversed( subdirs)])
+
+        old = self.walks.get( key)
+        if old is None or changed or old[0] != scans:
+            self.generation += 1
+            self.queries = {}
+            self.indexes = {}
+
+        self.walks[key] = (scans, pruned)
+
+        # forget the directories no walk goes into
+        if changed:
+            used = set()
+            for walkScans, walkPruned in self.walks.values():
+                used.update( [scan.path for scan in walkScans])
+            for path in [i for i in self.dirs if i not in used]:
+                del self.dirs[path]
+
+        return self.walks[key]
+
+    #-----------------------------------------------------------------------------------------------
+    def ScanDir( self, path):
+        """ return the DirScan for path, listed again if the directory changed, None if it can
+            not be read
+        """
+        try:
+            mtime = os.stat( path).st_mtime_ns
+        except OSError:
+            return None
+
+        scan = self.dirs.get( path)
+        if scan is None or scan.mtime != mtime:
+            scan = DirScan( path, mtime)
+            self.listed += 1
+            if not scan.List():
+                return None
+
+        return scan
+
+    #-----------------------------------------------------------------------------------------------
+    def SrcCodeFiles( self, roots, extensions, excludeDirs=(), excludedFiles=(), caseMatters=True):
+        """ Return the include dirs (the dirs holding .h files) and the files with an extension in
+            extensions under the roots, skipping what excludeDirs and excludedFiles match (see
+            ExcludeMatcher).  The lists are in os.walk order.
+        """
+        matcher, result = self.Lookup( roots, extensions, excludeDirs, excludedFiles, caseMatters)
+        includeDirs, srcFiles, skippedDirs, skippedFiles = result
+        return list( includeDirs), list( srcFiles)
+
+    #-----------------------------------------------------------------------------------------------
+    def SkipReport( self, roots, extensions, excludeDirs=(), excludedFiles=(), caseMatters=True):
+        """ return the lines reporting what the excludes skipped in SrcCodeFiles """
+        matcher, result = self.Lookup( roots, extensions, excludeDirs, excludedFiles, caseMatters)
+        includeDirs, srcFiles, skippedDirs, skippedFiles = result
+        return matcher.Report( skippedDirs, skippedFiles)
+
+    #-----------------------------------------------------------------------------------------------
+    def Lookup( self, roots, extensions, excludeDirs, excludedFiles, caseMatters):
+        """ return the matcher and the (cached) query result """
+        matchKey = (frozenset( excludeDirs), frozenset( excludedFiles), caseMatters)
+        key = (tuple( roots), tuple( extensions), matchKey)
+
+        with self.lock:
+            matcher = self.matchers.get( matchKey)
+            if matcher is None:
+                matcher = ExcludeMatcher( excludeDirs, excludedFiles, caseMatters)
+                self.matchers[matchKey] = matcher
+
+            walks = [self.Walk( root, matcher) for root in roots]
+
+            result = self.queries.get( key)
+            if result is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                result = self.Query( walks, set( extensions), matcher)
+                self.queries[key] = result
+
+        return matcher, result
+
+    #-----------------------------------------------------------------------------------------------
+    def Query( self, walks, extensions, matcher):
+        includeDirs = []
+        seen = set()
+        srcFiles = []
+        skippedDirs = []
+        skippedFiles = []
+        for scans, pruned in walks:
+            skippedDirs.extend( pruned)
+            for scan in scans:
+                if scan.hasHeader and scan.path not in seen:
+                    seen.add( scan.path)
+                    includeDirs.append( scan.path)
+
+                for name, ext, isFile in scan.files:
+                    if isFile and ext in extensions:
+                        ffn = os.path.join( scan.path, name)
+                        if matcher.SkipFile( ffn):
+                            skippedFiles.append( ffn)
+                        else:
+                            srcFiles.append( ffn)
+
+        return tuple( includeDirs), tuple( srcFiles), tuple( skippedDirs), tuple( skippedFiles)
+
+    #-----------------------------------------------------------------------------------------------
+    def Resolve( self, roots, fn, caseMatters=True):
+        """ Return the full path names under the roots fn can be:
+            a full path - [fn] when it is under the roots (or exists)
+            a name      - every file with that name, more than one means the name is ambiguous
+            a relative path - the file under each root at root/name or root/fn
+            Only a name that is not found in the index is checked on disk.
+        """
+        with self.lock:
+            key = (tuple( roots), caseMatters)
+            walks = [self.Walk( root) for root in roots]
+            index = self.indexes.get( key)
+            if index is None:
+                index = FileIndex( roots, walks, caseMatters)
+                self.indexes[key] = index
+
+        fullPathNames = index.Lookup( fn)
+        if not fullPathNames and os.path.isfile( fn):
+            fullPathNames = [fn]
+        return fullPathNames
+
+    #-----------------------------------------------------------------------------------------------
+    def Stats( self):
+        return 'Source Inventory hits/misses: %d/%d (%d dirs, %d listed)' % (
+            self.hits, self.misses, len( self.dirs), self.listed)
+
+    #-----------------------------------------------------------------------------------------------
+    def Clear( self):
+        with self.lock:
+            self.dirs = {}
+            self.walks = {}
+            self.checked = {}
+            self.matchers = {}
+            self.queries = {}
+            self.indexes = {}
+            self.generation += 1